@@ -0,0 +1,349 @@
+"""Benchmark every blueprint route: `python -m bench.run --db sqlite:///bench.db`
+
+Seeds the organizations of bench/seed.py if they are missing, then calls
+each route through the Flask test client and records latency percentiles,
+SQL statement counts and response sizes per organization size. GET routes
+are found in the URL map; writes run as pairs that leave the data as they
+found it (update then restore, create then delete), so repeated runs
+measure the same rows.
+
+Results are written as JSON next to the commit they were taken on. Pass a
+previous file as --baseline to compare: the run exits with status 1 when a
+route got slower than --threshold times its baseline median or runs more
+queries than before.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timedelta
+
+# Slow request logging would flood the output on the large organization
+os.environ.setdefault("SLOW_REQUEST_MS", "0")
+
+from src.app import create_app
+from src.cache import cache
+from src.config import db
+from src.lib import count_queries, generate_token
+from src.models import User
+from bench.seed import OWNER_EMAIL, OWNER_PASSWORD, parse_sizes, prepare, fixtures
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = "sqlite:///" + os.path.join(BENCH_DIR, "bench.db")
+
+# Query strings for GET routes that need one, by endpoint
+QUERY_ARGS = {
+    "budget.get_budget_analytics": lambda f: {"include": "budgets,spend", "period": "week"},
+    "event.search_events": lambda f: {"q": "Event 1"},
+    "event.get_events_in_range": lambda f: {
+        "orgId": f["org_id"],
+        "from": (datetime.utcnow() - timedelta(days=30)).date().isoformat(),
+        "to": (datetime.utcnow() + timedelta(days=30)).date().isoformat(),
+    },
+    "org.search_orgs": lambda f: {"q": "Bench"},
+}
+
+
+# Write scenarios. Each is a generator that yields (method, url, json body)
+# and receives the response, and leaves the database as it found it.
+
+def _login(f):
+    yield "POST", "/api/auth/login", {"email": OWNER_EMAIL, "password": OWNER_PASSWORD}
+
+
+def _updates(f):
+    yield "PATCH", f"/api/org/update/{f['org_id']}", {"description": "Benchmark organization"}
+    yield "PATCH", f"/api/team/update/{f['team_id']}", {"description": "Benchmark team"}
+    yield "PATCH", f"/api/event/update/{f['event_id']}", {"description": "Benchmark event"}
+    yield "PATCH", f"/api/task/update/{f['task_id']}", {"description": "Benchmark task"}
+    yield "PATCH", f"/api/budget/update/{f['budget_id']}", {"description": "Benchmark budget"}
+
+
+def _task_status(f):
+    yield "PATCH", f"/api/task/update-status/{f['task_id']}", {"status": "completed"}
+    yield "PATCH", f"/api/task/update-status/{f['task_id']}", {"status": f["task_status"]}
+
+
+def _bulk_task_status(f):
+    tasks = f["owned_tasks"]
+    yield "PATCH", "/api/task/bulk-update-status", {
+        "updates": [{"taskId": task_id, "status": "completed"} for task_id, _ in tasks]}
+    yield "PATCH", "/api/task/bulk-update-status", {
+        "updates": [{"taskId": task_id, "status": status} for task_id, status in tasks]}
+
+
+def _assignment(f):
+    yield "POST", "/api/task/assign", {"taskId": f["task_id"], "userIds": [f["member_id"]]}
+    yield "DELETE", "/api/task/unassign", {"task_id": f["task_id"], "user_ids": [f["member_id"]]}
+
+
+def _expense(f):
+    yield "POST", f"/api/budget/add-expense/{f['budget_id']}", {"amount": 1}
+    yield "POST", f"/api/budget/remove-expense/{f['budget_id']}", {"amount": 1}
+    yield "POST", "/api/budget/bulk-add-expenses", {"expenses": [{"budgetId": f["budget_id"], "amount": 1}] * 10}
+    yield "POST", f"/api/budget/remove-expense/{f['budget_id']}", {"amount": 10}
+
+
+def _lifecycles(f):
+    now = datetime.utcnow()
+    response = yield "POST", "/api/team/create", {"orgId": f["org_id"], "name": f"Bench team {now.timestamp()}"}
+    yield "DELETE", f"/api/team/delete/{response.json['data']['id']}", None
+
+    response = yield "POST", "/api/event/create", {
+        "orgId": f["org_id"], "title": "Bench event", "location": "Bench hall", "eventType": "workshop",
+        "startDate": (now + timedelta(days=10)).isoformat(), "endDate": (now + timedelta(days=11)).isoformat(),
+    }
+    yield "DELETE", f"/api/event/delete/{response.json['data']['id']}", None
+
+    task = {"orgId": f["org_id"], "teamId": f["team_id"], "title": "Bench task",
+            "dueDate": (now + timedelta(days=10)).isoformat(), "userIds": [f["member_id"]]}
+    response = yield "POST", "/api/task/create", task
+    yield "DELETE", f"/api/task/delete/{response.json['task']['id']}", None
+
+    response = yield "POST", "/api/task/bulk-create", {"tasks": [task] * 20}
+    for result in response.json["results"]:
+        yield "DELETE", f"/api/task/delete/{result['task']['id']}", None
+
+    response = yield "POST", "/api/budget/create", {"orgId": f["org_id"], "name": "Bench budget", "totalAmount": 100}
+    yield "DELETE", f"/api/budget/delete/{response.json['data']['id']}", None
+
+
+WRITES = [_login, _updates, _task_status, _bulk_task_status, _assignment, _expense, _lifecycles]
+
+
+def bench_app(database_url):
+    """The application, without the background jobs main.py starts.
+
+    Not in testing mode: a route that raises is recorded as a 500 like in
+    production instead of stopping the run.
+    """
+    return create_app(database_url)
+
+
+def _get(url):
+    yield "GET", url, None
+
+
+def _read_requests(app, f):
+    """(name, scenario) for every blueprint GET route whose arguments the fixtures cover"""
+    adapter = app.url_map.bind("localhost")
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if "." not in rule.endpoint or "GET" not in rule.methods:
+            continue
+        if not all(argument in f for argument in rule.arguments):
+            continue
+
+        values = {argument: f[argument] for argument in rule.arguments}
+        values.update(QUERY_ARGS.get(rule.endpoint, lambda f: {})(f))
+        yield rule.endpoint, lambda url=adapter.build(rule.endpoint, values): _get(url)
+
+
+def _scenarios(app, f):
+    yield from _read_requests(app, f)
+    for scenario in WRITES:
+        yield scenario.__name__.lstrip("_"), lambda scenario=scenario: scenario(f)
+
+
+class Recorder:
+    """Samples per (endpoint, method) for one organization size"""
+
+    def __init__(self, app, client, headers, cold):
+        self.app = app
+        self.client = client
+        self.headers = headers
+        self.cold = cold
+        self.adapter = app.url_map.bind("localhost")
+        self.samples = {}
+
+    def play(self, steps, record=True):
+        """Send the requests of one scenario run, feeding each response back"""
+        response = None
+        while True:
+            try:
+                method, url, body = steps.send(response)
+            except StopIteration:
+                return
+            response = self.request(method, url, body, record)
+
+    def request(self, method, url, body, record):
+        if self.cold:
+            cache.backend.flushdb()
+
+        with count_queries() as counter:
+            started = time.perf_counter()
+            response = self.client.open(url, method=method, json=body, headers=self.headers)
+            data = response.get_data()
+            elapsed = time.perf_counter() - started
+
+        if record:
+            endpoint, _ = self.adapter.match(url.split("?")[0], method=method)
+            view = self.app.view_functions[endpoint]
+            sample = self.samples.setdefault((endpoint, method), {
+                "url": url, "statuses": set(), "seconds": [], "queries": [], "bytes": [],
+                "queryBudget": getattr(view, "query_budget", None),
+            })
+            sample["statuses"].add(response.status_code)
+            sample["seconds"].append(elapsed)
+            sample["queries"].append(counter.count)
+            sample["bytes"].append(len(data))
+        return response
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def summarize(size, endpoint, method, sample):
+    ms = [seconds * 1000 for seconds in sample["seconds"]]
+    return {
+        "size": size,
+        "endpoint": endpoint,
+        "method": method,
+        "url": sample["url"],
+        "statuses": sorted(sample["statuses"]),
+        "samples": len(ms),
+        "p50Ms": round(percentile(ms, 50), 3),
+        "p90Ms": round(percentile(ms, 90), 3),
+        "p99Ms": round(percentile(ms, 99), 3),
+        "maxMs": round(max(ms), 3),
+        "meanMs": round(sum(ms) / len(ms), 3),
+        "queries": max(sample["queries"]),
+        "queryBudget": sample["queryBudget"],
+        "bytes": max(sample["bytes"]),
+    }
+
+
+def run_size(app, size, org_id, iterations, warmup, cold, only):
+    with app.app_context():
+        f = fixtures(org_id)
+        owner = db.session.get(User, f["user_id"])
+        f["task_status"] = next(status for task_id, status in f["owned_tasks"] if task_id == f["task_id"])
+        token = generate_token(owner.id, owner.email)
+        if isinstance(token, bytes):
+            token = token.decode()
+
+    recorder = Recorder(app, app.test_client(), {"Authorization": f"Bearer {token}"}, cold)
+    for name, steps in _scenarios(app, f):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for _ in range(warmup):
+            recorder.play(steps(), record=False)
+        for _ in range(iterations):
+            recorder.play(steps())
+
+    return [summarize(size, endpoint, method, sample)
+            for (endpoint, method), sample in sorted(recorder.samples.items())]
+
+
+def uncovered(app, results):
+    """Blueprint routes no scenario reached, so new routes do not go unmeasured silently"""
+    covered = {(result["endpoint"], result["method"]) for result in results}
+    return sorted(
+        f"{method} {rule.rule}" for rule in app.url_map.iter_rules() if "." in rule.endpoint
+        for method in rule.methods - {"HEAD", "OPTIONS"} if (rule.endpoint, method) not in covered)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print routes that got slower or run more queries than in `baseline`. Returns the regression count"""
+    before = {(r["size"], r["endpoint"], r["method"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'} (threshold {threshold}x p50):")
+    for result in results:
+        old = before.get((result["size"], result["endpoint"], result["method"]))
+        if old is None:
+            continue
+
+        ratio = result["p50Ms"] / old["p50Ms"] if old["p50Ms"] else 1.0
+        # Sub-millisecond routes jitter by more than the threshold on their own
+        slower = ratio > threshold and result["p50Ms"] - old["p50Ms"] > 1.0
+        more_queries = result["queries"] > old["queries"]
+        if slower or more_queries:
+            regressions += 1
+            print(f"  REGRESSION {result['size']:>6} {result['method']:<6} {result['endpoint']:<40} "
+                  f"p50 {old['p50Ms']:.1f} -> {result['p50Ms']:.1f} ms ({ratio:.2f}x), "
+                  f"queries {old['queries']} -> {result['queries']}")
+        elif ratio < 1 / threshold and old["p50Ms"] - result["p50Ms"] > 1.0:
+            print(f"  faster     {result['size']:>6} {result['method']:<6} {result['endpoint']:<40} "
+                  f"p50 {old['p50Ms']:.1f} -> {result['p50Ms']:.1f} ms ({ratio:.2f}x)")
+    if not regressions:
+        print("  no regressions")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'size':>6} {'method':<6} {'endpoint':<40} {'status':<8} {'p50':>9} {'p90':>9} {'p99':>9} "
+          f"{'queries':>8} {'bytes':>10}")
+    for r in results:
+        budget = r["queries"] if r["queryBudget"] is None else f"{r['queries']}/{r['queryBudget']}"
+        status = ",".join(str(code) for code in r["statuses"])
+        print(f"{r['size']:>6} {r['method']:<6} {r['endpoint']:<40} {status:<8} {r['p50Ms']:>7.1f}ms "
+              f"{r['p90Ms']:>7.1f}ms {r['p99Ms']:>7.1f}ms {budget:>8} {r['bytes']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLAlchemy URL of the benchmark database")
+    parser.add_argument("--sizes", default="small,medium,large", help="small, medium, large or member counts")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs of each scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs of each scenario first")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Keep the read cache between requests instead of measuring the database path")
+    parser.add_argument("--only", action="append", help="Only scenarios whose name contains this (repeatable)")
+    parser.add_argument("--out", help="Results file (default bench/results/<commit>.json)")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed p50 slowdown against the baseline")
+    args = parser.parse_args()
+
+    app = bench_app(args.db)
+    with app.app_context():
+        org_ids = prepare(parse_sizes(args.sizes))
+        dialect = db.engine.dialect.name
+
+    results = []
+    for size, org_id in org_ids.items():
+        print(f"Benchmarking the {size} member organization...", file=sys.stderr)
+        results += run_size(app, size, org_id, args.iterations, args.warmup, not args.warm_cache, args.only)
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--", "src", "bench")),
+        "createdAt": datetime.utcnow().isoformat(),
+        "database": dialect,
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "warmCache": args.warm_cache,
+        "results": results,
+        "uncovered": [] if args.only else uncovered(app, results),
+    }
+
+    print_table(results)
+    if report["uncovered"]:
+        print("\nNot benchmarked: " + ", ".join(report["uncovered"]))
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as fp:
+        json.dump(report, fp, indent=2)
+    print(f"\nWrote {out}")
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            if compare(results, json.load(fp), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Seed benchmark organizations: `python -m bench.seed --db sqlite:///bench.db`
+
+Each organization has `size` members, events, tasks and budgets, with one
+team per 50 members. The same owner leads every organization and team, so
+a single token can reach every route. Rows are generated from a fixed seed
+and inserted with executemany, so a given size always produces the same
+data and seeding 50k rows takes seconds rather than minutes.
+"""
+import random
+import argparse
+from decimal import Decimal
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from src.config import db
+from src.stats import rebuild_org_stats
+from src.ledger import rebuild_rollups
+from src.search import invalidate_fallback_index
+from src.models import (User, Organization, OrganizationMember, Team, TeamMember, Event, Task, TaskAssignee,
+                        Budget, Expense, Job, JobStatus, OrgRole, EventStatus, TaskStatus, Priority,
+                        create_missing_indexes, upgrade_money_columns)
+
+SIZES = {"small": 10, "medium": 1000, "large": 50000}
+
+OWNER_EMAIL = "bench-owner@example.com"
+OWNER_PASSWORD = "bench-password"
+
+# Members per team, rows per INSERT
+TEAM_SIZE = 50
+INSERT_BATCH = 5000
+
+
+def parse_sizes(value):
+    """"small,large" or "10,1000" -> [10, 50000]"""
+    sizes = []
+    for name in value.split(","):
+        name = name.strip()
+        sizes.append(SIZES[name] if name in SIZES else int(name))
+    return sizes
+
+
+def org_code(size):
+    return f"BENCH{size}"
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(db.insert(model), rows[start:start + INSERT_BATCH])
+
+
+def _ids(model, org_id):
+    return db.session.scalars(db.select(model.id).where(model.org_id == org_id).order_by(model.id)).all()
+
+
+def _ensure_users(count, now):
+    """The owner and `count` other users, creating the missing ones. Returns (owner id, user ids)"""
+    password = generate_password_hash(OWNER_PASSWORD)
+    emails = [OWNER_EMAIL] + [f"bench-user-{i}@example.com" for i in range(count)]
+    existing = dict(db.session.query(User.email, User.id).filter(User.email.like("bench-%@example.com")))
+    missing = [email for email in emails if email not in existing]
+    _insert(User, [
+        {"first_name": "Bench", "last_name": email.split("@")[0], "email": email, "password": password,
+         "college": "Benchmark College", "created_at": now, "updated_at": now}
+        for email in missing
+    ])
+    if missing:
+        existing = dict(db.session.query(User.email, User.id).filter(User.email.in_(emails)))
+    return existing[OWNER_EMAIL], [existing[email] for email in emails[1:]]
+
+
+def seed_org(size, rng=None):
+    """Create the benchmark organization of `size`, unless it already exists. Returns its id"""
+    org = Organization.query.filter_by(code=org_code(size)).first()
+    if org:
+        return org.id
+
+    rng = rng or random.Random(size)
+    now = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    owner_id, user_ids = _ensure_users(size - 1, now)
+
+    org = Organization(owner_id=owner_id, name=f"Bench Club {size}", college="Benchmark College",
+                       description=f"Benchmark organization with {size} members",
+                       contact_email=OWNER_EMAIL, contact_phone="0000000000", code=org_code(size))
+    db.session.add(org)
+    db.session.flush()
+    org_id = org.id
+
+    # Members, in teams of TEAM_SIZE led by the owner
+    member_roles = [OrgRole.COLEADER, OrgRole.MEMBER, OrgRole.MEMBER, OrgRole.VOLUNTEER]
+    _insert(OrganizationMember, [{"org_id": org_id, "user_id": owner_id, "role": OrgRole.LEADER}] + [
+        {"org_id": org_id, "user_id": uid, "role": member_roles[i % len(member_roles)]}
+        for i, uid in enumerate(user_ids)
+    ])
+
+    team_count = max(1, size // TEAM_SIZE)
+    _insert(Team, [
+        {"org_id": org_id, "leader_id": owner_id, "name": f"Team {i}", "description": f"Benchmark team {i}",
+         "created_at": now, "updated_at": now}
+        for i in range(team_count)
+    ])
+    team_ids = _ids(Team, org_id)
+    team_members = {team_id: [] for team_id in team_ids}
+    for i, uid in enumerate(user_ids):
+        team_members[team_ids[i % team_count]].append(uid)
+    _insert(TeamMember, [{"team_id": team_id, "user_id": owner_id, "role": OrgRole.LEADER} for team_id in team_ids] + [
+        {"team_id": team_id, "user_id": uid, "role": OrgRole.MEMBER}
+        for team_id, uids in team_members.items() for uid in uids
+    ])
+
+    # Events a year either side of today
+    event_statuses = list(EventStatus)
+    events = []
+    for i in range(size):
+        start = now + timedelta(days=rng.randint(-365, 365), hours=rng.randint(8, 18))
+        events.append({
+            "org_id": org_id, "creator_id": owner_id, "title": f"Event {i}",
+            "description": f"Benchmark event {i}", "start_date": start, "end_date": start + timedelta(hours=3),
+            "registration_deadline": start - timedelta(days=7), "capacity": rng.randint(20, 500),
+            "location": f"Hall {i % 20}", "event_type": rng.choice(["workshop", "talk", "hackathon", "social"]),
+            "status": event_statuses[i % len(event_statuses)], "is_public": i % 3 != 0,
+            "registration_required": i % 2 == 0, "entry_fee": float(i % 5 * 10), "certificate_provided": i % 4 == 0,
+            "created_at": now, "updated_at": now,
+        })
+    _insert(Event, events)
+    event_ids = _ids(Event, org_id)
+
+    # Tasks spread over the teams and half of the events, each with one
+    # assignee; every tenth task is also assigned to the owner
+    task_statuses = list(TaskStatus)
+    _insert(Task, [
+        {"org_id": org_id, "team_id": team_ids[i % team_count],
+         "event_id": event_ids[i % len(event_ids)] if i % 2 == 0 else None, "creator_id": owner_id,
+         "title": f"Task {i}", "description": f"Benchmark task {i}", "priority": rng.choice(list(Priority)),
+         "status": task_statuses[i % len(task_statuses)], "due_date": now + timedelta(days=rng.randint(-60, 120)),
+         "created_at": now, "updated_at": now}
+        for i in range(size)
+    ])
+    assignees = []
+    for i, task_id in enumerate(_ids(Task, org_id)):
+        members = team_members[team_ids[i % team_count]]
+        if members:
+            assignees.append({"task_id": task_id, "user_id": rng.choice(members), "assigned_at": now})
+        if i % 10 == 0:
+            assignees.append({"task_id": task_id, "user_id": owner_id, "assigned_at": now})
+    _insert(TaskAssignee, assignees)
+
+    budgets = []
+    for i in range(size):
+        total = Decimal(rng.randint(100, 100000))
+        budgets.append({
+            "org_id": org_id, "name": f"Budget {i}", "description": f"Benchmark budget {i}",
+            "total_amount": total, "spent_amount": (total * Decimal(rng.random())).quantize(Decimal("0.01")),
+            "created_at": now, "updated_at": now,
+        })
+    _insert(Budget, budgets)
+
+    # One ledger entry per budget adding up to its spent_amount, over the past year
+    _insert(Expense, [
+        {"budget_id": budget_id, "org_id": org_id, "user_id": owner_id,
+         "amount": budget["spent_amount"], "description": "Benchmark expense",
+         "spent_at": now - timedelta(days=rng.randint(0, 365)), "created_at": now}
+        for budget_id, budget in zip(_ids(Budget, org_id), budgets)
+    ])
+
+    # A finished background job, for the job status routes
+    _insert(Job, [{"kind": "rebuild-org-stats", "status": JobStatus.SUCCEEDED, "payload": {}, "org_id": org_id,
+                   "created_by": owner_id, "progress": 0, "attempts": 1, "run_after": now, "started_at": now,
+                   "finished_at": now, "created_at": now, "updated_at": now}])
+
+    # Core inserts skip the flush listeners and the ledger's rollups
+    db.session.commit()
+    rebuild_org_stats(org_id)
+    rebuild_rollups(org_id)
+    invalidate_fallback_index(Organization)
+    invalidate_fallback_index(Event)
+    return org_id
+
+
+def fixtures(org_id):
+    """Ids the driver fills route arguments and request bodies with"""
+    org = db.session.get(Organization, org_id)
+    owned_task = db.session.scalar(
+        db.select(TaskAssignee.task_id).join(Task, Task.id == TaskAssignee.task_id)
+        .where(Task.org_id == org_id, TaskAssignee.user_id == org.owner_id).order_by(TaskAssignee.task_id))
+    task = db.session.get(Task, owned_task)
+    # A team member not yet on the task, for the assign/unassign pair
+    assigned = db.select(TaskAssignee.user_id).where(TaskAssignee.task_id == task.id)
+    f = {
+        "org_id": org_id,
+        "user_id": org.owner_id,
+        "team_id": task.team_id,
+        "event_id": db.session.scalar(db.select(Event.id).where(Event.org_id == org_id).order_by(Event.id)),
+        "task_id": task.id,
+        "budget_id": db.session.scalar(db.select(Budget.id).where(Budget.org_id == org_id).order_by(Budget.id)),
+        "member_id": db.session.scalar(
+            db.select(TeamMember.user_id)
+            .where(TeamMember.team_id == task.team_id, TeamMember.user_id.not_in(assigned))
+            .order_by(TeamMember.user_id)),
+        # Up to 50 of the owner's tasks with their seeded status, for the bulk status pair
+        "owned_tasks": [
+            (row.id, row.status.value) for row in db.session.execute(
+                db.select(Task.id, Task.status).join(TaskAssignee, TaskAssignee.task_id == Task.id)
+                .where(Task.org_id == org_id, TaskAssignee.user_id == org.owner_id).order_by(Task.id).limit(50))
+        ],
+    }
+    # Organizations seeded before jobs existed have none; their job route is reported as not benchmarked
+    job_id = db.session.scalar(db.select(Job.id).where(Job.org_id == org_id).order_by(Job.id))
+    if job_id is not None:
+        f["job_id"] = job_id
+    return f
+
+
+def prepare(sizes, reset=False):
+    """Create the schema and seed every size. Returns {size: org id}"""
+    if reset:
+        db.drop_all()
+    db.create_all()
+    upgrade_money_columns()
+    create_missing_indexes()
+    return {size: seed_org(size) for size in sizes}
+
+
+def main():
+    from bench.run import DEFAULT_DB, bench_app
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLAlchemy URL of the benchmark database")
+    parser.add_argument("--sizes", default="small,medium,large", help="small, medium, large or member counts")
+    parser.add_argument("--reset", action="store_true", help="Drop every table first")
+    args = parser.parse_args()
+
+    with bench_app(args.db).app_context():
+        for size, org_id in prepare(parse_sizes(args.sizes), args.reset).items():
+            print(f"Organization {org_id}: {size} members, events, tasks and budgets")
+
+
+if __name__ == "__main__":
+    main()
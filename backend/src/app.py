@@ -0,0 +1,61 @@
+from flask import Flask
+from flask_cors import CORS
+from src.config import db, SECRET_KEY
+from src.engine import engine_options
+from src.routing import REPLICA_BIND
+
+
+def create_app(database_url, replica_url=None):
+    """Build the Flask app with every blueprint, the metrics hooks and the CLI commands"""
+    app = Flask(__name__)
+    CORS(app)
+
+    app.config['SECRET_KEY'] = SECRET_KEY
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {"url": replica_url, **engine_options(replica_url)},
+        }
+
+    db.init_app(app)
+
+    # Import blueprints after initialization
+    from src.auth import auth_bp
+    from src.user import user_bp
+    from src.org import org_bp
+    from src.team import team_bp
+    from src.task import task_bp
+    from src.event import event_bp
+    from src.budget import budget_bp
+    from src.job import job_bp
+
+    # Register blueprints
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(user_bp, url_prefix='/api/user')
+    app.register_blueprint(org_bp, url_prefix='/api/org')
+    app.register_blueprint(team_bp, url_prefix='/api/team')
+    app.register_blueprint(task_bp, url_prefix='/api/task')
+    app.register_blueprint(event_bp, url_prefix='/api/event')
+    app.register_blueprint(budget_bp, url_prefix='/api/budget')
+    app.register_blueprint(job_bp, url_prefix='/api/job')
+
+    # Per-request timings, Server-Timing headers and /metrics
+    from src.metrics import init_metrics
+
+    init_metrics(app)
+
+    # CLI commands
+    from src.stats import rebuild_org_stats_command
+    from src.sweeper import sweep_overdue_tasks_command
+    from src.ledger import rebuild_expense_rollups_command
+    from src.worker import enqueue_job_command, run_worker_command
+
+    app.cli.add_command(rebuild_org_stats_command)
+    app.cli.add_command(sweep_overdue_tasks_command)
+    app.cli.add_command(rebuild_expense_rollups_command)
+    app.cli.add_command(enqueue_job_command)
+    app.cli.add_command(run_worker_command)
+
+    return app
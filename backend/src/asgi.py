@@ -0,0 +1,188 @@
+"""ASGI entry point: `uvicorn src.asgi:application`
+
+The org details dashboard is served by an async handler that runs its
+independent queries concurrently on asyncpg. Every other route is the
+regular Flask app, run through asgiref's WSGI adapter.
+"""
+import re
+import jwt
+import asyncio
+from asgiref.wsgi import WsgiToAsgi
+from flask import g, jsonify, make_response, request
+from sqlalchemy import select, or_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.config import DATABASE_URL, SECRET_KEY
+from src.engine import async_url, async_engine_options
+from src.lib import Principal, TokenCache, token_cache, check_query_budget
+from src.conditional import validators_statement, validate, tag_response
+from src.org import org_details_sources
+from src.models import Organization, OrganizationMember, Team, Event, Task, Budget, User, orgs_being_deleted
+
+_ORG_DETAILS = re.compile(r"^/api/org/details/(\d+)/?$")
+_ORG_DETAILS_ENDPOINT = "org.get_org_full_details"
+
+
+def _read_token():
+    """Check the Authorization header like token_required.
+
+    Returns (token cache key, cached Principal, decoded claims, error
+    message), with None for whatever does not apply.
+    """
+    token = request.headers.get("Authorization")
+    if not token:
+        return None, None, None, "Token is missing"
+    if token.startswith("Bearer "):
+        token = token.split(" ")[1]
+
+    key = TokenCache.key(token)
+    principal = token_cache.get(key)
+    if principal is not None:
+        return key, principal, None, None
+    try:
+        return key, None, jwt.decode(token, SECRET_KEY, algorithms=["HS256"]), None
+    except jwt.ExpiredSignatureError:
+        return None, None, None, "Token expired"
+    except jwt.InvalidTokenError:
+        return None, None, None, "Invalid token"
+
+
+def create_asgi_app(flask_app, database_url=DATABASE_URL):
+    """Wrap `flask_app` in an ASGI app with an async org details route.
+
+    The handler runs inside a Flask request context and goes through the
+    app's before/after request hooks, so /metrics, CORS and the token cache
+    see it like any other request. It answers conditional GETs with the
+    same validators, ETag and query budget as the Flask view.
+    """
+    engine = create_async_engine(async_url(database_url), **async_engine_options(database_url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    wsgi = WsgiToAsgi(flask_app)
+    budget = flask_app.view_functions[_ORG_DETAILS_ENDPOINT].query_budget
+
+    async def fetch(statement):
+        # One session per query, so the queries can run at the same time
+        async with sessions() as session:
+            return (await session.execute(statement)).all()
+
+    async def details_response(org_id):
+        key, principal, claims, error = _read_token()
+        if error:
+            return jsonify({"message": error}), 401
+
+        user_id = principal.id if principal else claims["id"]
+        caller = await fetch(
+            select(User.id, User.email, OrganizationMember.role, Organization.id.label("org_id"))
+            .outerjoin(OrganizationMember, (OrganizationMember.user_id == User.id) & (OrganizationMember.org_id == org_id))
+            .outerjoin(Organization, (Organization.id == org_id)
+                       & Organization.id.not_in(orgs_being_deleted()))
+            .where(User.id == user_id))
+        if not caller:
+            return jsonify({"message": "Invalid token"}), 401
+
+        caller = caller[0]
+        if principal is None:
+            token_cache.put(key, Principal(caller.id, caller.email), claims.get("exp", float("inf")))
+        if caller.org_id is None:
+            return jsonify({"message": "Organization not found"}), 404
+        if caller.role is None:
+            return jsonify({"message": "Not authorized. Only members can view full organization details"}), 403
+
+        values = await fetch(validators_statement(org_details_sources(org_id)))
+        etag, last_modified, not_modified = validate(tuple(values[0]), user_id)
+        if not_modified:
+            return tag_response(make_response("", 304), etag, last_modified)
+
+        team_ids = select(Team.id).where(Team.org_id == org_id)
+        task_ids = select(Task.id).where(or_(Task.org_id == org_id, Task.team_id.in_(team_ids)))
+        org, members, teams, events, tasks, budgets, assignee_rows = await asyncio.gather(
+            fetch(select(Organization).where(Organization.id == org_id)),
+            fetch(select(OrganizationMember).where(OrganizationMember.org_id == org_id)
+                  .options(joinedload(OrganizationMember.user))),
+            fetch(select(Team).where(Team.org_id == org_id).options(*Team.load_options())),
+            fetch(select(Event).where(Event.org_id == org_id)),
+            fetch(select(Task).where(Task.org_id == org_id)),
+            fetch(select(Budget).where(Budget.org_id == org_id)),
+            fetch(Task.assignees_statement(task_ids)),
+        )
+        if not org:
+            return jsonify({"message": "Organization not found"}), 404
+
+        org = org[0][0]
+        tasks = [row[0] for row in tasks]
+        teams = [row[0] for row in teams]
+        all_task_ids = {t.id for t in tasks} | {t.id for team in teams for t in team.tasks}
+        task_assignees = Task.group_assignees(all_task_ids, assignee_rows)
+
+        members_data = []
+        for (m,) in members:
+            user_data = m.user.to_json()
+            user_data["orgRole"] = m.role.value
+            user_data["isOwner"] = m.user_id == org.owner_id
+            members_data.append(user_data)
+
+        response = make_response(jsonify({
+            "org": org.to_json(),
+            "userRole": caller.role.value,
+            "isOwner": org.owner_id == user_id,
+            "members": members_data,
+            "teams": [t.to_json(task_assignees=task_assignees) for t in teams],
+            "events": [e.to_json() for (e,) in events],
+            "tasks": [t.to_json(assignees=task_assignees[t.id]) for t in tasks],
+            "budgets": [b.to_json() for (b,) in budgets],
+        }), 200)
+        return tag_response(response, etag, last_modified)
+
+    async def org_full_details(scope, send, org_id):
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]]
+        client = scope.get("client") or ("127.0.0.1", 0)
+        with flask_app.test_request_context(scope["path"], query_string=scope["query_string"], headers=headers,
+                                            environ_base={"REMOTE_ADDR": client[0]}):
+            response = flask_app.preprocess_request()
+            if response is None:
+                response = flask_app.make_response(await details_response(org_id))
+                # The metrics hooks count this request's statements, the gathered ones included
+                check_query_budget(g.request_metrics["queries"], budget)
+            response = flask_app.process_response(flask_app.make_response(response))
+
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in response.headers.items()],
+        })
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def application(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await lifespan(receive, send)
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = _ORG_DETAILS.match(scope["path"])
+            if match:
+                return await org_full_details(scope, send, int(match.group(1)))
+
+        await wsgi(scope, receive, send)
+
+    return application
+
+
+def __getattr__(name):
+    # Built on first access (uvicorn looks it up after import), so tests can
+    # import create_asgi_app without configuring the production database
+    if name == "application":
+        from src.main import app
+
+        globals()["application"] = create_asgi_app(app)
+        return globals()["application"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
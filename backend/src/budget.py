@@ -1,11 +1,29 @@
 from src.config import db
-from src.lib import token_required
+from sqlalchemy import func
+from datetime import date, datetime
+from src.lib import token_required, paginated_response, bulk_items, is_id
+from src.ledger import PERIODS, parse_amount, post_expenses, set_total, to_cents
+from src.conditional import conditional
 from sqlalchemy.exc import IntegrityError
 from flask import Blueprint, request, jsonify
-from src.models import Budget, Organization, OrganizationMember, OrgRole
+from src.models import Budget, Expense, ExpenseRollup, Organization, OrgRole
 
 budget_bp = Blueprint("budget", __name__)
 
+
+def _budget_sources(current_user, org_id):
+    if not current_user.is_org_member(org_id):
+        return None
+    return [(Budget, Budget.org_id == org_id)]
+
+
+def _single_budget_sources(current_user, budget_id):
+    budget = db.session.get(Budget, budget_id)
+    if not budget or not current_user.is_org_member(budget.org_id):
+        return None
+    return [(Budget, Budget.id == budget_id)]
+
+
 @budget_bp.route("/create", methods=["POST"])
 @token_required
 def create_budget(current_user):
@@ -28,6 +46,12 @@ def create_budget(current_user):
                 "message": f"Missing required fields: {', '.join(missing_fields)}"
             }), 400
 
+        try:
+            total_amount = to_cents(total_amount, "Total amount")
+            spent_amount = to_cents(data.get("spentAmount", 0), "Spent amount")
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
         # Validate total_amount is positive
         if total_amount <= 0:
             return jsonify({"message": "Total amount must be greater than 0"}), 400
@@ -38,21 +62,17 @@ def create_budget(current_user):
             return jsonify({"message": "Organization not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=org_id
-        ).first()
+        role = current_user.get_org_role(org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         # Check if user has permission to create budget (leader or coleader)
-        if membership.role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
             return jsonify({"message": "Only leaders and co-leaders can create budgets"}), 403
 
         # Extract optional fields
         description = data.get("description", "")
-        spent_amount = data.get("spentAmount", 0.0)
 
         # Validate spent_amount is not negative and not greater than total_amount
         if spent_amount < 0:
@@ -66,8 +86,8 @@ def create_budget(current_user):
             org_id=org_id,
             name=name,
             description=description,
-            total_amount=float(total_amount),
-            spent_amount=float(spent_amount)
+            total_amount=total_amount,
+            spent_amount=spent_amount
         )
 
         db.session.add(new_budget)
@@ -87,6 +107,7 @@ def create_budget(current_user):
 
 @budget_bp.route("/get-all/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(_budget_sources)
 def get_all_budgets_by_org_id(current_user, org_id):
     try:
         # Verify organization exists
@@ -95,22 +116,21 @@ def get_all_budgets_by_org_id(current_user, org_id):
             return jsonify({"message": "Organization not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=org_id
-        ).first()
+        role = current_user.get_org_role(org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
-        budgets = Budget.query.filter_by(org_id=org_id).all()
-        return jsonify({"data": [budget.to_json() for budget in budgets]}), 200
+        return paginated_response(
+            Budget.query.filter_by(org_id=org_id), Budget,
+            lambda budgets: [budget.to_json() for budget in budgets])
 
     except Exception as e:
         return jsonify({"message": "An error occurred", "error": str(e)}), 500
 
 @budget_bp.route("/get/<int:budget_id>", methods=["GET"])
 @token_required
+@conditional(_single_budget_sources)
 def get_budget_by_id(current_user, budget_id):
     try:
         budget = Budget.query.get(budget_id)
@@ -118,12 +138,9 @@ def get_budget_by_id(current_user, budget_id):
             return jsonify({"message": "Budget not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=budget.org_id
-        ).first()
+        role = current_user.get_org_role(budget.org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         return jsonify({"data": budget.to_json()}), 200
@@ -140,37 +157,43 @@ def update_budget(current_user, budget_id):
             return jsonify({"message": "Budget not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=budget.org_id
-        ).first()
+        role = current_user.get_org_role(budget.org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         # Check if user has permission to update budget (leader or coleader)
-        if membership.role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
             return jsonify({"message": "Only leaders and co-leaders can update budgets"}), 403
 
         data = request.json
 
+        # spent_amount is the running total of the expense ledger
+        if "spentAmount" in data:
+            return jsonify({
+                "message": "Spent amount cannot be set directly; use add-expense or remove-expense"
+            }), 400
+
+        try:
+            total_amount = to_cents(data["totalAmount"], "Total amount") if "totalAmount" in data else None
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
         # Update fields if provided
         if "name" in data:
             budget.name = data["name"]
         if "description" in data:
             budget.description = data["description"]
-        if "totalAmount" in data:
-            total_amount = float(data["totalAmount"])
+        if total_amount is not None:
             if total_amount <= 0:
                 return jsonify({"message": "Total amount must be greater than 0"}), 400
-            budget.total_amount = total_amount
-        if "spentAmount" in data:
-            spent_amount = float(data["spentAmount"])
-            if spent_amount < 0:
-                return jsonify({"message": "Spent amount cannot be negative"}), 400
-            if spent_amount > budget.total_amount:
-                return jsonify({"message": "Spent amount cannot be greater than total amount"}), 400
-            budget.spent_amount = spent_amount
+            # Rejected by the database if more than that is already spent
+            if set_total(budget_id, total_amount) is None:
+                db.session.rollback()
+                current = _current_budget(budget_id)
+                return jsonify({
+                    "message": f"Total amount cannot be less than the spent amount. Current spent: {current['spentAmount']}"
+                }), 400
 
         db.session.commit()
 
@@ -192,16 +215,13 @@ def delete_budget(current_user, budget_id):
             return jsonify({"message": "Budget not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=budget.org_id
-        ).first()
+        role = current_user.get_org_role(budget.org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         # Check if user has permission to delete budget (leader or coleader)
-        if membership.role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
             return jsonify({"message": "Only leaders and co-leaders can delete budgets"}), 403
 
         db.session.delete(budget)
@@ -213,6 +233,23 @@ def delete_budget(current_user, budget_id):
         db.session.rollback()
         return jsonify({"message": "Delete failed", "error": str(e)}), 400
 
+def _current_budget(budget_id):
+    """The budget as stored now, for messages about a rejected change"""
+    return db.session.get(Budget, budget_id, populate_existing=True).to_json()
+
+
+def _expense_fields(data):
+    """Amount, description and spentAt of an expense payload, or ValueError"""
+    amount = parse_amount((data or {}).get("amount"))
+    spent_at = data.get("spentAt")
+    if spent_at:
+        try:
+            spent_at = datetime.fromisoformat(spent_at.replace('Z', '+00:00')).replace(tzinfo=None)
+        except (ValueError, AttributeError):
+            raise ValueError("Invalid spentAt format")
+    return amount, data.get("description"), spent_at or None
+
+
 @budget_bp.route("/add-expense/<int:budget_id>", methods=["POST"])
 @token_required
 def add_expense(current_user, budget_id):
@@ -222,41 +259,35 @@ def add_expense(current_user, budget_id):
             return jsonify({"message": "Budget not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=budget.org_id
-        ).first()
+        role = current_user.get_org_role(budget.org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         # Check if user has permission to add expenses (leader or coleader)
-        if membership.role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
             return jsonify({"message": "Only leaders and co-leaders can add expenses"}), 403
 
-        data = request.json
-        expense_amount = data.get("amount")
-
-        if not expense_amount:
-            return jsonify({"message": "Expense amount is required"}), 400
+        try:
+            amount, description, spent_at = _expense_fields(request.json)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
-        expense_amount = float(expense_amount)
-        if expense_amount <= 0:
-            return jsonify({"message": "Expense amount must be greater than 0"}), 400
-
-        # Check if adding this expense would exceed the total budget
-        new_spent_amount = budget.spent_amount + expense_amount
-        if new_spent_amount > budget.total_amount:
+        # Rejected by the database if it would exceed the budget
+        expense = post_expenses(current_user.id, [(budget, amount, description, spent_at)])[0]
+        if expense is None:
+            db.session.rollback()
+            current = _current_budget(budget_id)
             return jsonify({
-                "message": f"Adding this expense would exceed the budget. Current spent: {budget.spent_amount}, Total budget: {budget.total_amount}, Expense: {expense_amount}"
+                "message": f"Adding this expense would exceed the budget. Current spent: {current['spentAmount']}, Total budget: {current['totalAmount']}, Expense: {float(amount)}"
             }), 400
 
-        budget.spent_amount = new_spent_amount
         db.session.commit()
 
         return jsonify({
             "message": "Expense added successfully",
-            "data": budget.to_json()
+            "data": budget.to_json(),
+            "expense": expense.to_json()
         }), 200
 
     except Exception as e:
@@ -272,50 +303,181 @@ def remove_expense(current_user, budget_id):
             return jsonify({"message": "Budget not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=budget.org_id
-        ).first()
+        role = current_user.get_org_role(budget.org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
         # Check if user has permission to remove expenses (leader or coleader)
-        if membership.role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
             return jsonify({"message": "Only leaders and co-leaders can remove expenses"}), 403
 
-        data = request.json
-        expense_amount = data.get("amount")
-
-        if not expense_amount:
-            return jsonify({"message": "Expense amount is required"}), 400
-
-        expense_amount = float(expense_amount)
-        if expense_amount <= 0:
-            return jsonify({"message": "Expense amount must be greater than 0"}), 400
+        try:
+            amount, description, spent_at = _expense_fields(request.json)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
-        # Check if removing this expense would make spent amount negative
-        new_spent_amount = budget.spent_amount - expense_amount
-        if new_spent_amount < 0:
+        # Recorded as a refund; rejected by the database if spent would go negative
+        expense = post_expenses(current_user.id, [(budget, -amount, description, spent_at)])[0]
+        if expense is None:
+            db.session.rollback()
+            current = _current_budget(budget_id)
             return jsonify({
-                "message": f"Cannot remove expense. Current spent: {budget.spent_amount}, Expense to remove: {expense_amount}"
+                "message": f"Cannot remove expense. Current spent: {current['spentAmount']}, Expense to remove: {float(amount)}"
             }), 400
 
-        budget.spent_amount = new_spent_amount
         db.session.commit()
 
         return jsonify({
             "message": "Expense removed successfully",
-            "data": budget.to_json()
+            "data": budget.to_json(),
+            "expense": expense.to_json()
         }), 200
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to remove expense", "error": str(e)}), 400
 
+@budget_bp.route("/bulk-add-expenses", methods=["POST"])
+@token_required
+def bulk_add_expenses(current_user):
+    """Post many expenses, possibly across budgets, in one transaction with a result per item"""
+    try:
+        items = bulk_items(request.get_json(), "expenses")
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    budget_ids = {item.get("budgetId") for item in items if is_id(item.get("budgetId"))}
+    budgets = {b.id: b for b in Budget.query.filter(Budget.id.in_(budget_ids))} if budget_ids else {}
+
+    results = [None] * len(items)
+    entries, indexes = [], []
+    for index, item in enumerate(items):
+        if not is_id(item.get("budgetId")):
+            results[index] = {"index": index, "status": 400, "message": "budgetId must be an integer"}
+            continue
+
+        budget = budgets.get(item["budgetId"])
+        if not budget:
+            results[index] = {"index": index, "status": 404, "message": "Budget not found"}
+            continue
+
+        role = current_user.get_org_role(budget.org_id)
+        if role not in [OrgRole.LEADER, OrgRole.COLEADER]:
+            results[index] = {"index": index, "status": 403,
+                              "message": "Only leaders and co-leaders can add expenses"}
+            continue
+
+        try:
+            amount, description, spent_at = _expense_fields(item)
+        except ValueError as e:
+            results[index] = {"index": index, "status": 400, "message": str(e)}
+            continue
+
+        entries.append((budget, amount, description, spent_at))
+        indexes.append(index)
+
+    try:
+        expenses = post_expenses(current_user.id, entries) if entries else []
+        for index, expense in zip(indexes, expenses):
+            if expense is None:
+                results[index] = {"index": index, "status": 400,
+                                  "message": "Adding this expense would exceed the budget"}
+            else:
+                results[index] = {"index": index, "status": 201, "expense": expense.to_json()}
+
+        posted = {expense.budget_id for expense in expenses if expense is not None}
+        touched = [budgets[budget_id].to_json() for budget_id in sorted(posted)]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to add expenses", "error": str(e)}), 400
+
+    return jsonify({
+        "message": f"Posted {sum(result['status'] == 201 for result in results)} of {len(items)} expenses",
+        "results": results,
+        "budgets": touched,
+    }), 201 if posted else 400
+
+@budget_bp.route("/expenses/<int:budget_id>", methods=["GET"])
+@token_required
+@conditional(_single_budget_sources)
+def get_budget_expenses(current_user, budget_id):
+    budget = Budget.query.get(budget_id)
+    if not budget:
+        return jsonify({"message": "Budget not found"}), 404
+
+    if not current_user.is_org_member(budget.org_id):
+        return jsonify({"message": "You are not a member of this organization"}), 403
+
+    return paginated_response(
+        Expense.query.filter_by(budget_id=budget_id), Expense,
+        lambda expenses: [expense.to_json() for expense in expenses])
+
+def _budget_breakdown(org_id):
+    """Every budget of an org with its utilization and expense count, from one query"""
+    ledger = (
+        db.select(Expense.budget_id, func.count().label("expenses"), func.max(Expense.spent_at).label("last_spent_at"))
+        .where(Expense.org_id == org_id)
+        .group_by(Expense.budget_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Budget, ledger.c.expenses, ledger.c.last_spent_at)
+        .outerjoin(ledger, ledger.c.budget_id == Budget.id)
+        .filter(Budget.org_id == org_id)
+        .order_by(Budget.id)
+    )
+
+    breakdown = []
+    for budget, expenses, last_spent_at in rows:
+        data = budget.to_json()
+        data["utilizationPercentage"] = (
+            float(budget.spent_amount or 0) / float(budget.total_amount) * 100) if budget.total_amount else 0
+        data["expenseCount"] = expenses or 0
+        data["lastExpenseAt"] = last_spent_at.isoformat() if last_spent_at else None
+        breakdown.append(data)
+    return breakdown
+
+
+def _spend_series(org_id, args):
+    """Spend per day, week or month from the rollup table, or ValueError"""
+    period = args.get("period", "month")
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+    query = (
+        db.session.query(ExpenseRollup.period_start, func.sum(ExpenseRollup.amount), func.sum(ExpenseRollup.entries))
+        .filter(ExpenseRollup.org_id == org_id, ExpenseRollup.period == period)
+    )
+    if args.get("budgetId"):
+        try:
+            query = query.filter(ExpenseRollup.budget_id == int(args["budgetId"]))
+        except ValueError:
+            raise ValueError("budgetId must be an integer")
+    try:
+        if args.get("from"):
+            query = query.filter(ExpenseRollup.period_start >= date.fromisoformat(args["from"]))
+        if args.get("to"):
+            query = query.filter(ExpenseRollup.period_start <= date.fromisoformat(args["to"]))
+    except ValueError:
+        raise ValueError("from and to must be dates like 2024-01-31")
+
+    rows = query.group_by(ExpenseRollup.period_start).order_by(ExpenseRollup.period_start)
+    return {
+        "period": period,
+        "series": [
+            {"periodStart": start.isoformat(), "amount": float(amount), "entries": entries}
+            for start, amount, entries in rows
+        ],
+    }
+
+
 @budget_bp.route("/analytics/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(_budget_sources)
 def get_budget_analytics(current_user, org_id):
+    """Org budget totals; ?include=budgets,spend adds the per-budget breakdown and a spend series"""
     try:
         # Verify organization exists
         org = Organization.query.get(org_id)
@@ -323,30 +485,37 @@ def get_budget_analytics(current_user, org_id):
             return jsonify({"message": "Organization not found"}), 404
 
         # Check if user is a member of the organization
-        membership = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=org_id
-        ).first()
+        role = current_user.get_org_role(org_id)
 
-        if not membership:
+        if not role:
             return jsonify({"message": "You are not a member of this organization"}), 403
 
-        budgets = Budget.query.filter_by(org_id=org_id).all()
+        include = {part.strip() for part in request.args.get("include", "").split(",") if part.strip()}
 
-        # Calculate analytics
-        total_budget = sum(budget.total_amount for budget in budgets)
-        total_spent = sum(budget.spent_amount for budget in budgets)
-        total_remaining = total_budget - total_spent
+        total_budgets, total_budget, total_spent = db.session.query(
+            func.count(Budget.id),
+            func.coalesce(func.sum(Budget.total_amount), 0),
+            func.coalesce(func.sum(Budget.spent_amount), 0),
+        ).filter(Budget.org_id == org_id).one()
+        total_budget, total_spent = float(total_budget), float(total_spent)
 
         analytics = {
-            "totalBudgets": len(budgets),
+            "totalBudgets": total_budgets,
             "totalBudgetAmount": total_budget,
             "totalSpentAmount": total_spent,
-            "totalRemainingAmount": total_remaining,
+            "totalRemainingAmount": total_budget - total_spent,
             "utilizationPercentage": (total_spent / total_budget * 100) if total_budget > 0 else 0,
-            "budgets": [budget.to_json() for budget in budgets]
         }
 
+        if "spend" in include:
+            try:
+                analytics["spend"] = _spend_series(org_id, request.args)
+            except ValueError as e:
+                return jsonify({"message": str(e)}), 400
+
+        if "budgets" in include:
+            analytics["budgets"] = _budget_breakdown(org_id)
+
         return jsonify({"data": analytics}), 200
 
     except Exception as e:
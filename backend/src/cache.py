@@ -0,0 +1,202 @@
+import json
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.config import db, CACHE_URL, CACHE_TTL, CACHE_SIZE
+from src.routing import read_from_primary
+from src.models import Organization, Event, Team, TeamMember, Task, TaskAssignee, User
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryBackend:
+    """In-process LRU store with per-key TTL.
+
+    It implements the subset of the Redis client API the cache uses (get, mget,
+    set with ex, incr, delete), so it also stands in for Redis in tests.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        expires_at = time.time() + ex if ex else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._entries[key] = (value, None)
+            self._entries.move_to_end(key)
+            return value
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ReadCache:
+    """Read-through cache of serialized JSON payloads.
+
+    Every entry is tied to one or more entities (e.g. "team:3"). Each entity
+    has a version counter. A payload is stored under the versions it was
+    built from, so bumping a version makes older entries unreachable. Those
+    entries then age out through TTL or LRU eviction.
+
+    A disabled cache (no backend) computes every payload.
+    """
+
+    def __init__(self, backend, ttl=CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def shared(self):
+        """Whether every process sees the same entries and invalidations"""
+        return self.backend is not None and not isinstance(self.backend, MemoryBackend)
+
+    def disable(self):
+        self.backend = None
+
+    @staticmethod
+    def from_url(url):
+        if url.startswith("redis://") or url.startswith("rediss://"):
+            if redis is None:
+                raise RuntimeError("CACHE_URL points at Redis but the redis package is not installed")
+            return ReadCache(redis.Redis.from_url(url))
+        return ReadCache(MemoryBackend())
+
+    def _versioned_key(self, key, entities):
+        versions = self.backend.mget([f"version:{entity}" for entity in entities])
+        tags = ",".join(f"{entity}@{int(version or 0)}" for entity, version in zip(entities, versions))
+        return f"cache:{key}|{tags}"
+
+    def lookup(self, key, entities, compute):
+        """Return (payload, etag) for `key`, computing and storing the payload on a miss.
+
+        Payloads are encoded once with the app's JSON provider and both a
+        hit and a miss return that encoding decoded, so dates and other
+        non-JSON values come out the same either way. The ETag is a hash of
+        the same encoding, so it always describes the body it comes with.
+        A miss is computed from the primary: a lagging replica would store
+        a stale payload under the new versions until it expires.
+        """
+        if self.backend is None:
+            encoded = current_app.json.dumps(compute())
+        else:
+            versioned_key = self._versioned_key(key, entities)
+            encoded = self.backend.get(versioned_key)
+            if encoded is None:
+                read_from_primary(db.session)
+                encoded = current_app.json.dumps(compute())
+                self.backend.set(versioned_key, encoded, ex=self.ttl)
+
+        raw = encoded if isinstance(encoded, bytes) else encoded.encode()
+        return json.loads(raw), hashlib.sha1(raw).hexdigest()
+
+    def invalidate(self, *entities):
+        if self.backend is None:
+            return
+        for entity in entities:
+            self.backend.incr(f"version:{entity}")
+
+
+cache = ReadCache.from_url(CACHE_URL)
+
+
+# Invalidation
+
+def _team_ids_of_tasks(session, task_ids):
+    rows = session.connection().execute(
+        db.select(Task.team_id).where(Task.id.in_(task_ids), Task.team_id.isnot(None)))
+    return {row.team_id for row in rows}
+
+
+def _event_ids_of_creators(session, user_ids):
+    """Events embed their creator (see get_event_by_id), so a user change reaches them"""
+    rows = session.connection().execute(db.select(Event.id).where(Event.creator_id.in_(user_ids)))
+    return {row.id for row in rows}
+
+
+def _entities_for(obj):
+    if isinstance(obj, Organization):
+        return {"orgs", f"org:{obj.id}:events"}
+    if isinstance(obj, Event):
+        org_ids = {obj.org_id, *inspect(obj).attrs.org_id.history.deleted}
+        return {f"event:{obj.id}", *(f"org:{org_id}:events" for org_id in org_ids)}
+    if isinstance(obj, Team):
+        return {f"team:{obj.id}"}
+    if isinstance(obj, TeamMember):
+        return {f"team:{obj.team_id}"}
+    if isinstance(obj, Task):
+        team_ids = {obj.team_id, *inspect(obj).attrs.team_id.history.deleted}
+        return {f"team:{team_id}" for team_id in team_ids if team_id}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault("cache_invalidations", set())
+    assigned_task_ids, user_ids = set(), set()
+
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, TaskAssignee):
+            assigned_task_ids.add(obj.task_id)
+        elif isinstance(obj, User):
+            user_ids.add(obj.id)
+        else:
+            pending.update(_entities_for(obj))
+
+    if assigned_task_ids:
+        pending.update(f"team:{team_id}" for team_id in _team_ids_of_tasks(session, assigned_task_ids))
+    if user_ids:
+        pending.update(f"event:{event_id}" for event_id in _event_ids_of_creators(session, user_ids))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop("cache_invalidations", None)
+    if pending:
+        cache.invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
@@ -0,0 +1,122 @@
+import hashlib
+from functools import wraps
+from src.config import db
+from datetime import datetime, timezone
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from flask import request, jsonify, make_response
+from src.models import Organization, OrganizationMember, Team, TeamMember, Task, TaskAssignee, Job
+
+
+def validators_statement(sources):
+    """One SELECT of (count, max(updated_at)) for every (Model, criterion) source"""
+    columns = []
+    for model, criterion in sources:
+        columns.append(select(func.count()).select_from(model).where(criterion).scalar_subquery())
+        if hasattr(model, "updated_at"):
+            columns.append(select(func.max(model.updated_at)).where(criterion).scalar_subquery())
+    return select(*columns)
+
+
+def validators(sources):
+    """Fetch (count, max(updated_at)) for every (Model, criterion) source in one query"""
+    return tuple(db.session.execute(validators_statement(sources)).one())
+
+
+def validate(values, caller):
+    """(etag, last_modified, not_modified) of the current request for validator `values`"""
+    seed = repr((request.endpoint, request.query_string, caller, values))
+    etag = hashlib.sha1(seed.encode()).hexdigest()
+
+    stamps = [value for value in values if isinstance(value, datetime)]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc, microsecond=0) if stamps else None
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = bool(last_modified and since and last_modified <= since)
+    return etag, last_modified, not_modified
+
+
+def tag_response(response, etag, last_modified):
+    """Set the ETag and Last-Modified computed by validate on `response`"""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+
+# Source for listings that leave out organizations being deleted, whose
+# own rows do not change when the deletion is queued
+DELETIONS = (Job, Job.kind == "delete-org")
+
+
+def conditional(get_sources):
+    """Answer GET requests with 304 when the data behind the response is unchanged.
+
+    `get_sources` receives the view's arguments and returns the
+    (Model, criterion) pairs the response is built from. It returns None to
+    skip validation, e.g. when the caller is not allowed to see the data. The
+    ETag covers the row counts and latest updated_at of every source, plus
+    the endpoint, query string and caller. Last-Modified is the latest
+    updated_at.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            sources = get_sources(*args, **kwargs)
+            if sources is None:
+                return f(*args, **kwargs)
+
+            caller = getattr(args[0], "id", None) if args else None
+            etag, last_modified, not_modified = validate(validators(sources), caller)
+
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return tag_response(response, etag, last_modified)
+
+        return decorated
+
+    return decorator
+
+
+def cached_response(body, etag):
+    """Answer with `body`, or 304 when the client already holds `etag`.
+
+    For views served from the read cache, whose ETag comes from the cached
+    entry itself (see ReadCache.lookup) rather than from validator queries.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(jsonify(body), 200)
+    response.set_etag(etag, weak=True)
+    return response
+
+
+# Membership rows have no updated_at of their own, so a change to one
+# touches the parent row instead. That keeps the validators above honest.
+_PARENTS = {
+    OrganizationMember: (Organization, "org_id"),
+    TeamMember: (Team, "team_id"),
+    TaskAssignee: (Task, "task_id"),
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _touch_parents(session, flush_context):
+    touched = {}
+    for obj in session.new | session.dirty | session.deleted:
+        if type(obj) in _PARENTS:
+            parent, key = _PARENTS[type(obj)]
+            touched.setdefault(parent, set()).add(getattr(obj, key))
+
+    connection = session.connection() if touched else None
+    for parent, ids in touched.items():
+        connection.execute(
+            db.update(parent).where(parent.id.in_(ids)).values(updated_at=datetime.utcnow()))
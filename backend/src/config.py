@@ -1,13 +1,58 @@
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
+from src.routing import RoutingSession
 import os
 
 load_dotenv()
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 SECRET_KEY = os.getenv("SECRET_KEY", "testing_secret")
 
+# Verified tokens are kept in-process for this many seconds
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+# List endpoints return at most this many rows per page
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# Streamed exports fetch and serialize this many rows at a time
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+# Imports validate and insert this many rows per transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+# Longest an event may last. /api/event/range only scans start dates this
+# far before its window, so longer events would drop out of it.
+MAX_EVENT_DURATION_DAYS = int(os.getenv("MAX_EVENT_DURATION_DAYS", "90"))
+
+# Bulk endpoints accept at most this many items per request
+MAX_BULK_ITEMS = int(os.getenv("MAX_BULK_ITEMS", "500"))
+
+# Overdue task sweeper: seconds between runs (0 disables) and rows per UPDATE.
+# It runs in the job worker (python -m src.worker) and the dev server, never on import.
+OVERDUE_SWEEP_INTERVAL = int(os.getenv("OVERDUE_SWEEP_INTERVAL", "0"))
+OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv("OVERDUE_SWEEP_BATCH_SIZE", "1000"))
+
+# Background jobs (src/worker.py): seconds between polls of an idle worker,
+# rows per batch of chunked jobs, seconds before a silent running job is
+# handed to another worker, and runs before a failing job is given up
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "1000"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Largest upload ?async=true imports accept; the job row holds it until it runs
+JOB_MAX_UPLOAD_BYTES = int(os.getenv("JOB_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+# Whether python -m src.serve also runs one job worker process next to gunicorn
+SERVE_JOB_WORKER = os.getenv("SERVE_JOB_WORKER", "true").lower() == "true"
+
+# Read cache: "memory://" for the in-process backend, or a redis:// URL.
+# serve.py disables memory:// when it runs more than one process.
+CACHE_URL = os.getenv("CACHE_URL", "memory://")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "5000"))
+
 USER = os.getenv("DB_USER")
 PASSWORD = os.getenv("DB_PASSWORD")
 HOST = os.getenv("DB_HOST")
@@ -15,3 +60,48 @@ PORT = os.getenv("DB_PORT")
 DBNAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
+
+# Requests slower than this are logged with their slowest SQL (0 disables);
+# SERVER_TIMING adds per-request db/serialize/total timings to responses
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "500"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+# /metrics. With several processes each one writes its totals to
+# METRICS_DIR (serve.py makes a temporary one) and a scrape adds them up.
+# Scrapes must send "Authorization: Bearer <METRICS_TOKEN>"; without a
+# token only loopback clients are answered.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Optional read replica; GET requests read from it (see routing.py)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Connection pool, per process. With DB_PGBOUNCER the pooler owns the
+# connections, so the app opens one per checkout instead of keeping a pool.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+# Server-side limits and TCP keepalives for each connection (0 disables the timeout)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_KEEPALIVES_IDLE = int(os.getenv("DB_KEEPALIVES_IDLE", "30"))
+
+# Connections the database accepts from all app workers together; serve.py
+# sizes the worker count so that every worker's pool fits
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+
+# Log checkouts that wait longer than this for a free pooled connection
+DB_POOL_WAIT_WARN_MS = int(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
+
+# Production server (python -m src.serve). Workers and threads are derived
+# from the CPU count and the DB pool unless set explicitly. WEB_PORT falls
+# back to the PORT that hosting platforms set.
+WEB_PORT = int(os.getenv("WEB_PORT", os.getenv("PORT", "5000")))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0"))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "0"))
+WEB_WORKER_CLASS = os.getenv("WEB_WORKER_CLASS", "gthread")
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "30"))
@@ -0,0 +1,111 @@
+import time
+import logging
+import threading
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+from src.config import (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+                        DB_PGBOUNCER, DB_STATEMENT_TIMEOUT_MS, DB_CONNECT_TIMEOUT, DB_KEEPALIVES_IDLE,
+                        DB_POOL_WAIT_WARN_MS)
+
+# Checkout wait totals since the process started
+pool_metrics = {"checkouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "slow_checkouts": 0}
+_metrics_lock = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = (time.perf_counter() - started) * 1000
+            slow = waited >= DB_POOL_WAIT_WARN_MS
+            with _metrics_lock:
+                pool_metrics["checkouts"] += 1
+                pool_metrics["wait_ms_total"] += waited
+                pool_metrics["wait_ms_max"] = max(pool_metrics["wait_ms_max"], waited)
+                pool_metrics["slow_checkouts"] += slow
+            if slow:
+                logging.warning("Waited %.1f ms for a database connection (%s)", waited, self.status())
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`, tuned from the DB_* settings in config.py.
+
+    Only PostgreSQL gets pool and connection settings; other databases (SQLite
+    in tests) keep SQLAlchemy's defaults.
+    """
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+
+    connect_args = {
+        "connect_timeout": DB_CONNECT_TIMEOUT,
+        "keepalives": 1,
+        "keepalives_idle": DB_KEEPALIVES_IDLE,
+        "keepalives_interval": 10,
+        "keepalives_count": 5,
+        "application_name": "eventora",
+    }
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "connect_args": connect_args}
+
+    if DB_PGBOUNCER:
+        # Transaction pooling: no client-side pool, and no startup options,
+        # which PgBouncer rejects. Set statement_timeout on the pooler's role.
+        options["poolclass"] = NullPool
+        return options
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_use_lifo=True,
+    )
+    return options
+
+
+def async_url(url):
+    """The asyncio-driver form of a DATABASE_URL, for the ASGI entry point"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+
+    # asyncpg spells sslmode as ssl
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    if DB_PGBOUNCER:
+        query["prepared_statement_cache_size"] = "0"
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+def async_engine_options(url):
+    """create_async_engine options matching engine_options, for asyncpg"""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+
+    server_settings = {"application_name": "eventora"}
+    connect_args = {"timeout": DB_CONNECT_TIMEOUT, "server_settings": server_settings}
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "connect_args": connect_args}
+
+    if DB_PGBOUNCER:
+        # Prepared statements do not survive transaction pooling
+        connect_args["statement_cache_size"] = 0
+        options["poolclass"] = NullPool
+        return options
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_use_lifo=True,
+    )
+    return options
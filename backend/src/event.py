@@ -1,12 +1,18 @@
-from src.config import db
-from datetime import datetime
-from src.lib import token_required
+from src.config import db, MAX_EVENT_DURATION_DAYS
+from datetime import datetime, timedelta
+from src.lib import token_required, paginated_response
+from src.search import search_page
+from src.cache import cache
+from sqlalchemy import true
+from src.conditional import conditional, cached_response, DELETIONS
 from sqlalchemy.exc import IntegrityError
 from flask import Blueprint, request, jsonify
-from src.models import Event, Organization, EventStatus
+from src.models import Event, Organization, EventStatus, orgs_being_deleted
 
 event_bp = Blueprint("event", __name__)
 
+MAX_EVENT_DURATION = timedelta(days=MAX_EVENT_DURATION_DAYS)
+
 @event_bp.route("/create", methods=["POST"])
 @token_required
 def create_event(current_user):
@@ -57,6 +63,9 @@ def create_event(current_user):
         if end_date <= start_date:
             return jsonify({"message": "End date must be after start date"}), 400
 
+        if end_date - start_date > MAX_EVENT_DURATION:
+            return jsonify({"message": f"Events cannot last longer than {MAX_EVENT_DURATION_DAYS} days"}), 400
+
         if registration_deadline and registration_deadline > start_date:
             return jsonify({"message": "Registration deadline must be before start date"}), 400
 
@@ -119,26 +128,34 @@ def create_event(current_user):
 
 @event_bp.route("/get-all/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, org_id: [
+    (Organization, Organization.id == org_id),
+    (Event, Event.org_id == org_id),
+])
 def get_all_events_by_org_id(current_user, org_id):
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
-    events = Event.query.filter_by(org_id=org_id).all()
-    return jsonify({"data": [e.to_json() for e in events]}), 200
+    return paginated_response(
+        Event.query.filter_by(org_id=org_id), Event, lambda events: [e.to_json() for e in events])
 
 @event_bp.route("/get/<int:event_id>", methods=["GET"])
 @token_required
 def get_event_by_id(current_user, event_id):
-    event = db.session.query(Event).options(
-        db.joinedload(Event.creator)
-    ).filter(Event.id == event_id).first()
+    def load():
+        event = db.session.query(Event).options(
+            db.joinedload(Event.creator)
+        ).filter(Event.id == event_id).first()
 
-    if not event:
+        # Use include_creator=True to automatically include creator info
+        return event.to_json(include_creator=True) if event else None
+
+    data, etag = cache.lookup(f"event:{event_id}", [f"event:{event_id}"], load)
+    if data is None:
         return jsonify({"message": "Event not found"}), 404
 
-    # Use include_creator=True to automatically include creator info
-    return jsonify({"data": event.to_json(include_creator=True)}), 200
+    return cached_response({"data": data}, etag)
 
 @event_bp.route("/update/<int:event_id>", methods=["PATCH"])
 @token_required
@@ -201,6 +218,9 @@ def update_event(current_user, event_id):
     if event.end_date <= event.start_date:
         return jsonify({"message": "End date must be after start date"}), 400
 
+    if event.end_date - event.start_date > MAX_EVENT_DURATION:
+        return jsonify({"message": f"Events cannot last longer than {MAX_EVENT_DURATION_DAYS} days"}), 400
+
     if event.registration_deadline and event.registration_deadline > event.start_date:
         return jsonify({"message": "Registration deadline must be before start date"}), 400
 
@@ -231,14 +251,13 @@ def delete_event(current_user, event_id):
 
 @event_bp.route("/search", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [(Event, true()), DELETIONS])
 def search_events(current_user):
-    query = Event.query
-    title = request.args.get("title")
+    query = Event.query.filter(Event.org_id.not_in(orgs_being_deleted()))
+    text = request.args.get("q") or request.args.get("title")
     event_type = request.args.get("type")
     status = request.args.get("status")
 
-    if title:
-        query = query.filter(Event.title.ilike(f"%{title}%"))
     if event_type:
         query = query.filter_by(event_type=event_type)
     if status:
@@ -248,19 +267,92 @@ def search_events(current_user):
         except ValueError:
             return jsonify({"message": f"Invalid status: {status}"}), 400
 
-    events = query.all()
-    return jsonify({"data": [event.to_json() for event in events]}), 200
+    serialize = lambda events: [event.to_json() for event in events]
+    if not text:
+        return paginated_response(query, Event, serialize)
+
+    try:
+        return jsonify(search_page(query, Event, text, serialize)), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+def _parse_window_bound(name):
+    value = request.args.get(name)
+    if not value:
+        raise ValueError(f"{name} is required")
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f"Invalid {name} date")
+
+def _range_criterion(current_user):
+    """Events overlapping the `from`/`to` window that the caller may see, optionally for one `orgId`.
+
+    Members see every event of their organizations, everyone else only
+    public ones. Raises ValueError on invalid arguments.
+    """
+    start = _parse_window_bound("from")
+    end = _parse_window_bound("to")
+    if end <= start:
+        raise ValueError("to must be after from")
+
+    # Events last at most MAX_EVENT_DURATION, which bounds the start_date
+    # range scan on both sides; end_date only filters within it
+    criterion = (
+        (Event.start_date < end) & (Event.start_date > start - MAX_EVENT_DURATION) & (Event.end_date > start)
+        & Event.org_id.not_in(orgs_being_deleted())
+    )
+
+    org_id = request.args.get("orgId")
+    if org_id:
+        try:
+            org_id = int(org_id)
+        except ValueError:
+            raise ValueError("orgId must be an integer")
+        criterion &= Event.org_id == org_id
+        if not current_user.is_org_member(org_id):
+            criterion &= Event.is_public == True
+    else:
+        member_org_ids = list(current_user.auth.org_roles)
+        criterion &= (Event.is_public == True) | Event.org_id.in_(member_org_ids)
+
+    return criterion
+
+def _range_sources(current_user):
+    try:
+        return [(Event, _range_criterion(current_user)), DELETIONS]
+    except ValueError:
+        return None
+
+@event_bp.route("/range", methods=["GET"])
+@token_required
+@conditional(_range_sources)
+def get_events_in_range(current_user):
+    try:
+        criterion = _range_criterion(current_user)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Ordered on start_date so the (org_id, start_date) and (is_public,
+    # start_date) indexes serve both the window scan and the sort
+    return paginated_response(
+        Event.query.filter(criterion), Event, lambda events: [e.to_json() for e in events],
+        order_by=[Event.start_date, Event.id])
 
 @event_bp.route("/upcoming/<int:org_id>", methods=["GET"])
 def get_org_upcoming_events(org_id):
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
-    now = datetime.utcnow()
-    events = Event.query.filter(
-        Event.start_date > now,
-        Event.is_public == True,
-        Event.org_id == org_id,
-    ).all()
-    return jsonify({"data": [event.to_json() for event in events]}), 200
+    def load():
+        now = datetime.utcnow()
+        events = Event.query.filter(
+            Event.start_date > now,
+            Event.is_public == True,
+            Event.org_id == org_id,
+        ).order_by(Event.start_date, Event.id).all()
+        return [event.to_json() for event in events]
+
+    data, etag = cache.lookup(f"upcoming:{org_id}", [f"org:{org_id}:events"], load)
+    return cached_response({"data": data}, etag)
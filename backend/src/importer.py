@@ -0,0 +1,382 @@
+import io
+import csv
+import json
+import math
+from itertools import islice
+from collections import Counter
+from datetime import datetime, timedelta
+from src.config import db, IMPORT_CHUNK_SIZE, MAX_EVENT_DURATION_DAYS
+from src.lib import parse_enum
+from src.cache import cache
+from src.stats import apply_deltas
+from src.search import invalidate_fallback_index
+from src.models import (Organization, OrganizationMember, Team, TeamMember, Event, Task, User, OrgRole, OrgStats,
+                        EventStatus, TaskStatus, Priority, insert_ignoring_conflicts, reset_auth_contexts)
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+
+
+def detect_format(requested, mimetype, filename):
+    """Pick "csv" or "ndjson" from an explicit ?format=, the upload's mimetype or its file name"""
+    if requested:
+        if requested not in ("csv", "ndjson"):
+            raise ValueError("format must be csv or ndjson")
+        return requested
+    if mimetype in NDJSON_MIMETYPES or (filename or "").endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def read_rows(stream, fmt):
+    """Yield (line, row) pairs from a binary CSV or NDJSON stream without reading it all"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key.strip(): (value or "").strip() for key, value in row.items()
+                                    if isinstance(key, str)}
+        return
+
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+# Row parsing. NDJSON values arrive typed, so each parser also rejects
+# values of the wrong type or out of the column's range.
+
+# Integer columns are 32-bit on PostgreSQL
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be text")
+    return value.strip() if value is not None else None
+
+
+def _required(row, *keys):
+    missing = [key for key in keys if row.get(key) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+
+def _date(row, key):
+    value = row.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f"Invalid {key} format")
+
+
+def _int(row, key):
+    value = row.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{key} must be an integer")
+    if not INT_MIN <= value <= INT_MAX:
+        raise ValueError(f"{key} is out of range")
+    return value
+
+
+def _number(row, key, default):
+    value = row.get(key)
+    if value in (None, ""):
+        return default
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{key} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{key} must be a finite number")
+    return value
+
+
+def _flag(row, key, default):
+    value = row.get(key)
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def _emails(row, key):
+    value = row.get(key)
+    if isinstance(value, list):
+        return [email.strip() for email in value if isinstance(email, str) and email.strip()]
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be a list or ;-separated text")
+    return [email.strip() for email in (value or "").split(";") if email.strip()]
+
+
+def _users_by_email(emails):
+    emails = {email for email in emails if email}
+    if not emails:
+        return {}
+    return dict(db.session.query(User.email, User.id).filter(User.email.in_(emails)).all())
+
+
+def _org_ids(model, org_id, ids):
+    """The subset of `ids` that are rows of `model` in the organization"""
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return {row.id for row in db.session.query(model.id).filter(model.org_id == org_id, model.id.in_(ids))}
+
+
+def _safe(parse, row, key):
+    """`parse(row, key)`, or None when the row is invalid; for lookups done before validation"""
+    try:
+        return parse(row, key)
+    except ValueError:
+        return None
+
+
+# Loaders. Each validates one chunk, inserts the valid rows with a single
+# executemany and returns (inserted, errors, cache entities to invalidate,
+# Counter of org_stats column deltas).
+
+def _import_members(org_id, current_user, chunk):
+    users = _users_by_email(_safe(_text, row, "email") for _, row in chunk)
+    existing = {
+        row.user_id for row in db.session.query(OrganizationMember.user_id)
+        .filter(OrganizationMember.org_id == org_id, OrganizationMember.user_id.in_(users.values()))
+    } if users else set()
+
+    values, errors = [], []
+    for line, row in chunk:
+        try:
+            email = _text(row, "email")
+            role = parse_enum(OrgRole, _text(row, "role") or OrgRole.MEMBER.value)
+        except ValueError as e:
+            errors.append({"line": line, "message": str(e)})
+            continue
+
+        if not email:
+            errors.append({"line": line, "message": "email is required"})
+        elif email not in users:
+            errors.append({"line": line, "message": f"No user with email {email}"})
+        elif role is None or role == OrgRole.LEADER:
+            errors.append({"line": line, "message": "role must be coleader, member or volunteer"})
+        elif users[email] in existing:
+            errors.append({"line": line, "message": f"{email} is already a member"})
+        else:
+            existing.add(users[email])
+            values.append({"org_id": org_id, "user_id": users[email], "role": role})
+
+    # Rows lost to a concurrent insert are not returned, so only new members are counted
+    roles = []
+    if values:
+        roles = db.session.scalars(
+            insert_ignoring_conflicts(OrganizationMember).returning(OrganizationMember.role), values).all()
+        db.session.execute(
+            db.update(Organization).where(Organization.id == org_id).values(updated_at=datetime.utcnow()))
+        reset_auth_contexts()
+    return len(roles), errors, {"orgs"}, Counter(OrgStats.member_column(role) for role in roles)
+
+
+def _import_team_members(org_id, current_user, chunk):
+    users = _users_by_email(_safe(_text, row, "email") for _, row in chunk)
+    team_ids = _org_ids(Team, org_id, (_safe(_int, row, "teamId") for _, row in chunk))
+    org_members = {
+        row.user_id for row in db.session.query(OrganizationMember.user_id)
+        .filter(OrganizationMember.org_id == org_id, OrganizationMember.user_id.in_(users.values()))
+    } if users else set()
+    existing = {
+        (row.team_id, row.user_id) for row in db.session.query(TeamMember.team_id, TeamMember.user_id)
+        .filter(TeamMember.team_id.in_(team_ids), TeamMember.user_id.in_(users.values()))
+    } if users and team_ids else set()
+
+    values, errors = [], []
+    for line, row in chunk:
+        try:
+            _required(row, "email", "teamId")
+            team_id = _int(row, "teamId")
+            email = _text(row, "email")
+            role = parse_enum(OrgRole, _text(row, "role") or OrgRole.MEMBER.value)
+        except ValueError as e:
+            errors.append({"line": line, "message": str(e)})
+            continue
+
+        if team_id not in team_ids:
+            errors.append({"line": line, "message": f"Team {team_id} not found in this organization"})
+        elif email not in users:
+            errors.append({"line": line, "message": f"No user with email {email}"})
+        elif users[email] not in org_members:
+            errors.append({"line": line, "message": f"{email} is not a member of this organization"})
+        elif role is None:
+            errors.append({"line": line, "message": "Invalid role"})
+        elif (team_id, users[email]) in existing:
+            errors.append({"line": line, "message": f"{email} is already in team {team_id}"})
+        else:
+            existing.add((team_id, users[email]))
+            values.append({"team_id": team_id, "user_id": users[email], "role": role})
+
+    touched = {value["team_id"] for value in values}
+    if values:
+        db.session.execute(insert_ignoring_conflicts(TeamMember), values)
+        db.session.execute(
+            db.update(Team).where(Team.id.in_(touched)).values(updated_at=datetime.utcnow()))
+        reset_auth_contexts()
+    return len(values), errors, {f"team:{team_id}" for team_id in touched}, Counter()
+
+
+def _import_events(org_id, current_user, chunk):
+    now = datetime.utcnow()
+    values, errors = [], []
+    for line, row in chunk:
+        try:
+            _required(row, "title", "location", "eventType", "startDate", "endDate")
+            start_date, end_date = _date(row, "startDate"), _date(row, "endDate")
+            registration_deadline = _date(row, "registrationDeadline")
+            if end_date <= start_date:
+                raise ValueError("End date must be after start date")
+            if end_date - start_date > timedelta(days=MAX_EVENT_DURATION_DAYS):
+                raise ValueError(f"Events cannot last longer than {MAX_EVENT_DURATION_DAYS} days")
+            if registration_deadline and registration_deadline > start_date:
+                raise ValueError("Registration deadline must be before start date")
+
+            status = parse_enum(EventStatus, _text(row, "status") or EventStatus.DRAFT.value)
+            if status is None:
+                raise ValueError(f"Invalid status: {row.get('status')}")
+
+            values.append({
+                "org_id": org_id,
+                "creator_id": current_user.id,
+                "title": _text(row, "title"),
+                "description": _text(row, "description") or "",
+                "start_date": start_date,
+                "end_date": end_date,
+                "registration_deadline": registration_deadline,
+                "capacity": _int(row, "capacity"),
+                "location": _text(row, "location"),
+                "event_type": _text(row, "eventType"),
+                "status": status,
+                "is_public": _flag(row, "isPublic", True),
+                "registration_required": _flag(row, "registrationRequired", False),
+                "entry_fee": _number(row, "entryFee", 0.0),
+                "certificate_provided": _flag(row, "certificateProvided", False),
+                "created_at": now,
+                "updated_at": now,
+            })
+        except ValueError as e:
+            errors.append({"line": line, "message": str(e)})
+
+    if values:
+        db.session.execute(db.insert(Event), values)
+        invalidate_fallback_index(Event)
+    return (len(values), errors, {f"org:{org_id}:events"},
+            Counter(OrgStats.event_column(value["status"]) for value in values))
+
+
+def _import_tasks(org_id, current_user, chunk):
+    team_ids = _org_ids(Team, org_id, (_safe(_int, row, "teamId") for _, row in chunk))
+    event_ids = _org_ids(Event, org_id, (_safe(_int, row, "eventId") for _, row in chunk))
+    users = _users_by_email(email for _, row in chunk for email in _safe(_emails, row, "assignees") or ())
+
+    now = datetime.utcnow()
+    values, assignees, errors = [], [], []
+    for line, row in chunk:
+        try:
+            _required(row, "teamId", "title", "dueDate")
+            team_id, event_id = _int(row, "teamId"), _int(row, "eventId")
+            if team_id not in team_ids:
+                raise ValueError(f"Team {team_id} not found in this organization")
+            if event_id is not None and event_id not in event_ids:
+                raise ValueError(f"Event {event_id} not found in this organization")
+
+            emails = _emails(row, "assignees")
+            unknown = [email for email in emails if email not in users]
+            if unknown:
+                raise ValueError(f"No user with email {', '.join(unknown)}")
+
+            values.append({
+                "org_id": org_id,
+                "team_id": team_id,
+                "event_id": event_id,
+                "creator_id": current_user.id,
+                "title": _text(row, "title"),
+                "description": _text(row, "description"),
+                "priority": parse_enum(Priority, _text(row, "priority") or "low", Priority.LOW),
+                "status": parse_enum(TaskStatus, _text(row, "status") or "pending", TaskStatus.PENDING),
+                "due_date": _date(row, "dueDate"),
+                "created_at": now,
+                "updated_at": now,
+            })
+            assignees.append([users[email] for email in emails])
+        except ValueError as e:
+            errors.append({"line": line, "message": str(e)})
+
+    if values:
+        # RETURNING the entities in parameter order lets assignees follow in one more INSERT
+        tasks = db.session.scalars(
+            db.insert(Task).returning(Task, sort_by_parameter_order=True), values).all()
+        Task.bulk_assign(list(zip(tasks, assignees)))
+    return (len(values), errors, {f"team:{value['team_id']}" for value in values},
+            Counter(OrgStats.task_column(value["status"]) for value in values))
+
+
+IMPORTERS = {
+    "members": _import_members,
+    "team-members": _import_team_members,
+    "events": _import_events,
+    "tasks": _import_tasks,
+}
+
+
+def import_rows(kind, org_id, current_user, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import (line, row) pairs into an organization, committing one chunk at a time.
+
+    Invalid rows are skipped and reported with their line number. Bulk
+    inserts bypass the flush listeners, so each chunk adds its own counts
+    to the org statistics in its transaction, and caches are invalidated
+    once at the end, even if a later chunk fails.
+    """
+    load = IMPORTERS[kind]
+    rows = iter(rows)
+    imported, errors, entities = 0, [], set()
+
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            valid = []
+            for line, row in chunk:
+                if isinstance(row, dict):
+                    valid.append((line, row))
+                else:
+                    errors.append({"line": line, "message": "Row is not a JSON object"})
+
+            count, chunk_errors, chunk_entities, deltas = load(org_id, current_user, valid)
+            apply_deltas(db.session.connection(), {org_id: deltas})
+            db.session.commit()
+            imported += count
+            errors.extend(chunk_errors)
+            entities |= chunk_entities
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if imported:
+            cache.invalidate(*entities)
+
+    errors.sort(key=lambda error: error["line"])
+    return {"imported": imported, "failed": len(errors), "errors": errors}
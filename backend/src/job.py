@@ -0,0 +1,50 @@
+from src.config import db
+from src.lib import token_required, paginated_response, parse_enum
+from src.conditional import conditional
+from flask import Blueprint, request, jsonify
+from src.models import Job, JobStatus
+
+job_bp = Blueprint("job", __name__)
+
+
+def _can_view(current_user, job):
+    """The job's creator and the admins of its organization can follow it"""
+    return job.created_by == current_user.id or (job.org_id is not None and current_user.is_org_admin(job.org_id))
+
+
+def _job_sources(current_user, job_id):
+    job = db.session.get(Job, job_id)
+    if not job or not _can_view(current_user, job):
+        return None
+    return [(Job, Job.id == job_id)]
+
+
+@job_bp.route("/get/<int:job_id>", methods=["GET"])
+@token_required
+@conditional(_job_sources)
+def get_job(current_user, job_id):
+    """Status and progress of a background job, for clients to poll"""
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+
+    if not _can_view(current_user, job):
+        return jsonify({"message": "Not authorized to view this job"}), 403
+
+    return jsonify({"data": job.to_json()}), 200
+
+
+@job_bp.route("/get-all", methods=["GET"])
+@token_required
+def get_my_jobs(current_user):
+    """Jobs started by the current user, optionally filtered by ?status="""
+    query = Job.query.filter_by(created_by=current_user.id)
+
+    status = request.args.get("status")
+    if status:
+        job_status = parse_enum(JobStatus, status)
+        if job_status is None:
+            return jsonify({"message": f"Invalid status: {status}"}), 400
+        query = query.filter(Job.status == job_status)
+
+    return paginated_response(query, Job, lambda jobs: [job.to_json() for job in jobs])
@@ -0,0 +1,175 @@
+"""Budget ledger: expenses are line items and spent_amount is their running total.
+
+spent_amount only changes through one conditional UPDATE per budget, so
+concurrent posts can neither lose updates nor overdraw a budget, and the
+row lock lasts for that statement and the inserts that follow it rather
+than a read-modify-write round trip. The same transaction adds each
+expense to its day, week and month in expense_rollup, which analytics
+read instead of scanning the ledger.
+"""
+import click
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from datetime import datetime, timedelta
+from sqlalchemy import cast, func
+from flask.cli import with_appcontext
+from src.config import db
+from src.models import Budget, Expense, ExpenseRollup, dialect_insert
+
+CENTS = Decimal("0.01")
+
+PERIODS = ("day", "week", "month")
+
+
+def to_cents(value, name):
+    """`value` as a Decimal rounded to cents, or ValueError naming the field"""
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not amount.is_finite():
+        raise ValueError(f"{name} must be a number")
+    return amount.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def parse_amount(value):
+    """A positive amount rounded to cents, or ValueError"""
+    if value in (None, ""):
+        raise ValueError("Expense amount is required")
+
+    amount = to_cents(value, "Expense amount")
+    if amount <= 0:
+        raise ValueError("Expense amount must be greater than 0")
+    return amount
+
+
+def adjust_spent(budget_id, delta):
+    """Add `delta` to a budget's spent_amount in one statement.
+
+    An increase must stay within total_amount and a decrease must not go
+    below zero, otherwise nothing changes. A NULL spent_amount counts as
+    zero. Returns the refreshed budget, or None when the change was
+    rejected.
+    """
+    spent = func.round(cast(func.coalesce(Budget.spent_amount, 0) + Decimal(delta), db.Numeric(12, 2)), 2)
+    bound = spent <= Budget.total_amount if delta > 0 else spent >= 0
+    statement = (
+        db.update(Budget)
+        .where(Budget.id == budget_id, bound)
+        .values(spent_amount=spent, updated_at=datetime.utcnow())
+        .returning(Budget)
+        .execution_options(populate_existing=True)
+    )
+    return db.session.scalars(statement).first()
+
+
+def set_total(budget_id, total):
+    """Set a budget's total_amount in one statement, unless more than `total` is already spent.
+
+    Returns the refreshed budget, or None when the change was rejected.
+    """
+    statement = (
+        db.update(Budget)
+        .where(Budget.id == budget_id, func.coalesce(Budget.spent_amount, 0) <= total)
+        .values(total_amount=total, updated_at=datetime.utcnow())
+        .returning(Budget)
+        .execution_options(populate_existing=True)
+    )
+    return db.session.scalars(statement).first()
+
+
+def post_expenses(user_id, entries):
+    """Record (budget, amount, description, spent_at) entries and add them to their budgets.
+
+    Amounts are Decimals; negative ones are refunds. Budgets are updated in
+    id order so concurrent batches lock rows in the same order. All entries
+    of a budget go in with a single UPDATE when they fit together;
+    otherwise each is tried on its own and those that would overdraw the
+    budget are rejected. Returns the Expense, or None when rejected, for
+    every entry. The caller commits.
+    """
+    by_budget = {}
+    for index, (budget, amount, _, _) in enumerate(entries):
+        by_budget.setdefault(budget.id, []).append(index)
+
+    posted = []
+    for budget_id in sorted(by_budget):
+        indexes = by_budget[budget_id]
+        if adjust_spent(budget_id, sum(entries[i][1] for i in indexes)) is not None:
+            posted += indexes
+        elif len(indexes) > 1:
+            posted += [i for i in indexes if adjust_spent(budget_id, entries[i][1]) is not None]
+
+    expenses = [None] * len(entries)
+    for index in posted:
+        budget, amount, description, spent_at = entries[index]
+        expenses[index] = Expense(budget_id=budget.id, org_id=budget.org_id, user_id=user_id, amount=amount,
+                                  description=description, spent_at=spent_at or datetime.utcnow())
+
+    # One batched INSERT for the line items, one upsert for their rollups
+    recorded = [expense for expense in expenses if expense is not None]
+    db.session.add_all(recorded)
+    db.session.flush()
+    _roll_up(recorded)
+    return expenses
+
+
+# Rollups
+
+def period_starts(moment):
+    """First day of the day, week (from Monday) and month containing `moment`"""
+    day = moment.date()
+    return {"day": day, "week": day - timedelta(days=day.weekday()), "month": day.replace(day=1)}
+
+
+def _rollup_rows(expenses):
+    totals = {}
+    for expense in expenses:
+        for period, start in period_starts(expense.spent_at).items():
+            key = (expense.budget_id, period, start)
+            row = totals.setdefault(key, {"budget_id": expense.budget_id, "period": period, "period_start": start,
+                                          "org_id": expense.org_id, "amount": Decimal(0), "entries": 0})
+            row["amount"] += Decimal(expense.amount)
+            row["entries"] += 1
+    # Key order, so concurrent transactions lock rollup rows in the same order
+    return [totals[key] for key in sorted(totals)]
+
+
+def _roll_up(expenses):
+    rows = _rollup_rows(expenses)
+    if not rows:
+        return
+
+    insert = dialect_insert(ExpenseRollup)
+    statement = insert.on_conflict_do_update(
+        index_elements=[ExpenseRollup.budget_id, ExpenseRollup.period, ExpenseRollup.period_start],
+        set_={
+            "amount": ExpenseRollup.amount + insert.excluded.amount,
+            "entries": ExpenseRollup.entries + insert.excluded.entries,
+        },
+    )
+    db.session.execute(statement, rows)
+
+
+def rebuild_rollups(org_id=None):
+    """Recompute expense_rollup from the ledger, for one org or all of them"""
+    deleted = db.delete(ExpenseRollup)
+    expenses = db.select(Expense).execution_options(yield_per=1000)
+    if org_id is not None:
+        deleted = deleted.where(ExpenseRollup.org_id == org_id)
+        expenses = expenses.where(Expense.org_id == org_id)
+
+    db.session.execute(deleted)
+    rows = _rollup_rows(db.session.scalars(expenses))
+    if rows:
+        db.session.execute(db.insert(ExpenseRollup), rows)
+    db.session.commit()
+    return len(rows)
+
+
+@click.command("rebuild-expense-rollups")
+@click.option("--org-id", type=int, default=None, help="Only rebuild this organization")
+@with_appcontext
+def rebuild_expense_rollups_command(org_id):
+    """Reconcile the expense_rollup table with the expense ledger"""
+    count = rebuild_rollups(org_id)
+    click.echo(f"Rebuilt {count} expense rollup row(s)")
@@ -1,11 +1,26 @@
+import re
 import jwt
+import json
+import time
+import base64
+import hashlib
 import string
 import random
-from src.models import  User
+import threading
+from enum import Enum
+import logging
 from functools import wraps
-from src.config import SECRET_KEY
-from flask import request, jsonify
-from datetime import datetime, timedelta
+from types import SimpleNamespace
+from contextlib import contextmanager
+from collections import OrderedDict
+from flask import current_app, request, jsonify
+from sqlalchemy import event, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import load_only
+from datetime import date, datetime, timedelta
+from src.models import User, AuthContext
+from src.config import (db, SECRET_KEY, AUTH_CACHE_TTL, AUTH_CACHE_SIZE,
+                        DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MAX_BULK_ITEMS)
 
 
 def generate_code(org_name, length=8):
@@ -27,6 +42,89 @@ def generate_token(user_id, email):
     }
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
+class Principal:
+    """The authenticated caller, built from token claims.
+
+    The full User row is only loaded when a handler touches an attribute
+    that is not on the principal itself.
+    """
+
+    def __init__(self, user_id, email):
+        self.id = user_id
+        self.email = email
+
+    @property
+    def user(self):
+        return db.session.get(User, self.id)
+
+    @property
+    def auth(self):
+        return AuthContext.for_user(self.id)
+
+    get_org_role = User.get_org_role
+    is_org_member = User.is_org_member
+    is_org_admin = User.is_org_admin
+    is_org_leader = User.is_org_leader
+    get_team_role = User.get_team_role
+    is_team_member = User.is_team_member
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
+
+
+class TokenCache:
+    """LRU cache of verified tokens, keyed by a hash of the whole token"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        # The whole token, not just its signature: a hit must mean these
+        # exact header and payload bytes were verified before
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, key, principal, token_exp):
+        expires_at = min(time.time() + self.ttl, token_exp)
+        with self._lock:
+            self._entries[key] = (principal, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict_user(self, user_id):
+        """Forget every cached token of a user, e.g. after update or delete"""
+        with self._lock:
+            stale = [key for key, (principal, _) in self._entries.items()
+                     if principal.id == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -38,14 +136,206 @@ def token_required(f):
         if token.startswith("Bearer "):
             token = token.split(" ")[1]
 
-        try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            current_user = User.query.get(data["id"])
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
+        key = TokenCache.key(token)
+        current_user = token_cache.get(key)
+
+        if current_user is None:
+            try:
+                data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            except jwt.ExpiredSignatureError:
+                return jsonify({"message": "Token expired"}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({"message": "Invalid token"}), 401
+
+            # Only a cache miss confirms the user still exists
+            user = db.session.query(User.id, User.email).filter_by(id=data["id"]).first()
+            if not user:
+                return jsonify({"message": "Invalid token"}), 401
+
+            current_user = Principal(user.id, user.email)
+            token_cache.put(key, current_user, data.get("exp", float("inf")))
 
         return f(current_user, *args, **kwargs)
 
     return decorated
+
+
+def to_json_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def parse_enum(enum, value, default=None):
+    """Convert a request string like "pending" or "PENDING" to an enum member"""
+    try:
+        return enum(value.lower() if hasattr(value, "lower") else value)
+    except ValueError:
+        return default
+
+
+def is_id(value):
+    """Whether a JSON value is an integer id; bools are ints in Python but not ids"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def bulk_items(data, key):
+    """The list of objects under `key` of a bulk request body, or ValueError"""
+    items = (data or {}).get(key)
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"{key} must be a non-empty list")
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValueError(f"At most {MAX_BULK_ITEMS} {key} are allowed per request")
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"Every entry of {key} must be an object")
+    return items
+
+
+def _column_for_field(model, field):
+    name = re.sub(r"(?<!^)(?=[A-Z])", "_", field).lower()
+    column = model.__table__.columns.get(name)
+    if column is None:
+        raise ValueError(f"Unknown field: {field}")
+    return getattr(model, column.key)
+
+
+def encode_cursor(values):
+    raw = json.dumps([to_json_value(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and column is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        decoded.append(value)
+    return decoded
+
+
+def page_limit():
+    """Page size from the `limit` request arg, capped at MAX_PAGE_SIZE"""
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate(query, model, serialize, order_by=None):
+    """Keyset-paginate a query from the `limit`, `after` and `fields` request args.
+
+    Rows are ordered by `order_by` (the primary key by default), newest
+    first with `order=desc`, and `after` is the opaque cursor returned as
+    `nextCursor` by the previous page.
+    With `fields`, only those columns are loaded and returned.
+    Raises ValueError on invalid arguments.
+    """
+    order_by = order_by or [model.id]
+    limit = page_limit()
+
+    order = request.args.get("order", "asc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    descending = order == "desc"
+
+    after = request.args.get("after")
+    if after:
+        values = decode_cursor(after, order_by)
+        if descending:
+            query = query.filter(tuple_(*order_by) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*order_by) > tuple_(*values))
+
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    if fields:
+        columns = {field: _column_for_field(model, field) for field in fields}
+        query = query.options(load_only(*columns.values(), *order_by))
+
+    sort = [column.desc() for column in order_by] if descending else order_by
+    rows = query.order_by(*sort).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if fields:
+        data = [{field: to_json_value(getattr(row, column.key)) for field, column in columns.items()}
+                for row in rows]
+    else:
+        data = serialize(rows)
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in order_by])
+
+    return {"data": data, "nextCursor": next_cursor}
+
+
+def paginated_response(query, model, serialize, order_by=None):
+    try:
+        return jsonify(paginate(query, model, serialize, order_by)), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+
+_query_counters = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_query_counters, "active", ()):
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count, and keep, the SQL statements executed on this thread inside the block"""
+    counter = SimpleNamespace(count=0, statements=[])
+    active = _query_counters.__dict__.setdefault("active", [])
+    active.append(counter)
+    try:
+        yield counter
+    finally:
+        active.remove(counter)
+
+
+def check_query_budget(count, limit):
+    """Warn, or fail under TESTING, when the current request ran more than `limit` statements"""
+    if count > limit:
+        message = f"{request.endpoint} ran {count} queries (budget {limit})"
+        if current_app.testing:
+            raise AssertionError(message)
+        logging.warning(message)
+
+
+def query_budget(limit):
+    """Log a warning when a route runs more than `limit` SQL statements.
+
+    Under TESTING the overrun fails the request instead, so a test that
+    exercises the route catches a new N+1 query. The limit is kept on the
+    view as `query_budget` so tests can assert it.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            with count_queries() as counter:
+                response = f(*args, **kwargs)
+            check_query_budget(counter.count, limit)
+            return response
+
+        decorated.query_budget = limit
+        return decorated
+
+    return decorator
@@ -0,0 +1,361 @@
+import os
+import hmac
+import json
+import time
+import fcntl
+import heapq
+import logging
+import threading
+from collections import Counter, defaultdict
+from flask import Response, g, jsonify, request, has_app_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.config import SLOW_REQUEST_MS, SERVER_TIMING, METRICS_DIR, METRICS_TOKEN
+from src.engine import pool_metrics
+from src.sweeper import sweep_metrics
+
+# Upper bounds, in seconds, of the request latency histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointStats:
+    """Totals for one (endpoint, method) since the process started"""
+
+    def __init__(self):
+        self.statuses = Counter()
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def observe(self, status, seconds, queries, db_seconds, serialize_seconds):
+        self.statuses[status] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.queries += queries
+        self.db_seconds += db_seconds
+        self.serialize_seconds += serialize_seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+_stats = defaultdict(EndpointStats)
+_stats_lock = threading.Lock()
+
+
+def _current():
+    return g.get("request_metrics") if has_app_context() else None
+
+
+# SQL timing
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    metrics = _current()
+    if started is None or metrics is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    metrics["queries"] += 1
+    metrics["db"] += elapsed
+    # Grouped by SQL text, so an N+1 shows up as one statement run many times
+    count, total = metrics["statements"].get(statement, (0, 0.0))
+    metrics["statements"][statement] = (count + 1, total + elapsed)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds its encoding time to the request metrics"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            metrics = _current()
+            if metrics is not None:
+                metrics["serialize"] += time.perf_counter() - started
+
+
+# Request hooks
+
+def _start_request():
+    g.request_metrics = {"start": time.perf_counter(), "queries": 0, "db": 0.0, "serialize": 0.0,
+                         "statements": {}}
+
+
+def _log_slow_request(metrics, total):
+    slowest = heapq.nlargest(5, metrics["statements"].items(), key=lambda item: item[1][1])
+    lines = [f"  {count}x {seconds * 1000:.1f} ms  {' '.join(statement.split())[:500]}"
+             for statement, (count, seconds) in slowest]
+    logging.warning(
+        "Slow request %s %s: %.1f ms total, %d queries in %.1f ms, %.1f ms serializing\n%s",
+        request.method, request.full_path.rstrip("?"), total * 1000, metrics["queries"],
+        metrics["db"] * 1000, metrics["serialize"] * 1000, "\n".join(lines))
+
+
+def _finish_request(response):
+    metrics = g.pop("request_metrics", None)
+    if metrics is None:
+        return response
+
+    total = time.perf_counter() - metrics["start"]
+    key = (request.endpoint or "unmatched", request.method)
+    with _stats_lock:
+        _stats[key].observe(response.status_code, total, metrics["queries"], metrics["db"], metrics["serialize"])
+    write_snapshot()
+
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = (
+            f'db;dur={metrics["db"] * 1000:.1f};desc="{metrics["queries"]} queries", '
+            f'serialize;dur={metrics["serialize"] * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}')
+
+    if SLOW_REQUEST_MS and total * 1000 >= SLOW_REQUEST_MS:
+        _log_slow_request(metrics, total)
+    return response
+
+
+# Snapshots. Each process only sees its own counters, so behind several
+# gunicorn workers a scrape would land on one of them at random and the
+# totals would jump back and forth. Every process therefore writes its
+# totals to a file in the metrics directory and a scrape adds up all files.
+# A file only ever grows, and those of exited processes are folded into
+# retired.json, so the sums never go backwards.
+
+SNAPSHOT_INTERVAL = 1.0
+
+_snapshot_dir = METRICS_DIR or None
+_snapshot_name = None
+_last_snapshot = 0.0
+
+
+def _reset_after_fork():
+    # A forked worker starts from zero under a file name of its own;
+    # otherwise whatever the master counted would be added once per worker
+    global _snapshot_name, _last_snapshot
+    _snapshot_name = None
+    _last_snapshot = 0.0
+    _stats.clear()
+    pool_metrics.update(checkouts=0, wait_ms_total=0.0, wait_ms_max=0.0, slow_checkouts=0)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def set_snapshot_dir(path):
+    """Share counters through `path` from now on; serve.py calls this before forking"""
+    global _snapshot_dir
+    _snapshot_dir = path
+
+
+def snapshot():
+    """This process's totals as plain JSON data"""
+    with _stats_lock:
+        endpoints = [[endpoint, method, {str(status): n for status, n in s.statuses.items()}, list(s.buckets),
+                      s.count, s.seconds, s.queries, s.db_seconds, s.serialize_seconds]
+                     for (endpoint, method), s in _stats.items()]
+    return {
+        "endpoints": endpoints,
+        "pool": dict(pool_metrics),
+        "sweep": {"runs": sweep_metrics["runs"], "tasks_marked_overdue": sweep_metrics["tasks_marked_overdue"]},
+    }
+
+
+def _empty():
+    return {"endpoints": [], "pool": {}, "sweep": {}}
+
+
+def merge(snapshots):
+    """Add snapshots up; the one gauge, the longest pool wait, takes the maximum"""
+    endpoints = {}
+    pool, sweep = Counter(), Counter()
+    wait_max = 0.0
+    for data in snapshots:
+        for endpoint, method, statuses, buckets, *totals in data["endpoints"]:
+            merged = endpoints.setdefault((endpoint, method), [Counter(), [0] * len(BUCKETS), 0, 0.0, 0, 0.0, 0.0])
+            merged[0].update(statuses)
+            merged[1] = [a + b for a, b in zip(merged[1], buckets)]
+            merged[2:] = [a + b for a, b in zip(merged[2:], totals)]
+        wait_max = max(wait_max, data["pool"].get("wait_ms_max", 0.0))
+        pool.update({key: value for key, value in data["pool"].items() if key != "wait_ms_max"})
+        sweep.update(data["sweep"])
+
+    return {
+        "endpoints": [[endpoint, method, dict(statuses), *rest]
+                      for (endpoint, method), (statuses, *rest) in endpoints.items()],
+        "pool": {**pool, "wait_ms_max": wait_max},
+        "sweep": dict(sweep),
+    }
+
+
+def _write_json(path, data):
+    # Written aside and renamed, so readers never see half a file
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "w") as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_snapshot(force=False):
+    """Save this process's totals to the metrics directory, at most every SNAPSHOT_INTERVAL seconds"""
+    global _last_snapshot, _snapshot_name
+    if _snapshot_dir is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_snapshot < SNAPSHOT_INTERVAL:
+        return
+    _last_snapshot = now
+    # The start time keeps a later process that reuses the pid off this file
+    _snapshot_name = _snapshot_name or f"{os.getpid()}-{time.time_ns()}.json"
+    try:
+        _write_json(os.path.join(_snapshot_dir, _snapshot_name), snapshot())
+    except OSError:
+        logging.exception("Could not write metrics to %s", _snapshot_dir)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fold_retired(directory):
+    """Merge the files of exited processes into retired.json and delete them"""
+    with open(os.path.join(directory, "retired.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired_path = os.path.join(directory, "retired.json")
+        retired = _read_json(retired_path, {"totals": _empty(), "folded": []})
+
+        # Files folded by a scrape that died before deleting them
+        present = set(os.listdir(directory))
+        folded = [name for name in retired["folded"] if name in present]
+        for name in folded:
+            os.remove(os.path.join(directory, name))
+
+        dead = [name for name in present - set(folded)
+                if name.endswith(".json") and name != "retired.json" and not _alive(int(name.split("-")[0]))]
+        if not dead:
+            if folded:
+                _write_json(retired_path, {"totals": retired["totals"], "folded": []})
+            return
+
+        totals = [_read_json(os.path.join(directory, name), _empty()) for name in dead]
+        _write_json(retired_path, {"totals": merge([retired["totals"], *totals]), "folded": dead})
+        for name in dead:
+            os.remove(os.path.join(directory, name))
+        _write_json(retired_path, {"totals": merge([retired["totals"], *totals]), "folded": []})
+
+
+def collect():
+    """Totals of every process sharing the metrics directory, or of this one without it"""
+    if _snapshot_dir is None:
+        return snapshot()
+
+    write_snapshot(force=True)
+    _fold_retired(_snapshot_dir)
+    snapshots = []
+    for name in os.listdir(_snapshot_dir):
+        path = os.path.join(_snapshot_dir, name)
+        if name == "retired.json":
+            snapshots.append(_read_json(path, {"totals": _empty()})["totals"])
+        elif name.endswith(".json"):
+            snapshots.append(_read_json(path, _empty()))
+    return merge(snapshots)
+
+
+# Prometheus text exposition
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+
+def render_metrics():
+    """All counters in the Prometheus text format, summed over every process"""
+    data = collect()
+    stats = {(endpoint, method): values for endpoint, method, *values in data["endpoints"]}
+
+    lines = [
+        "# HELP eventora_http_requests_total Requests by endpoint, method and status",
+        "# TYPE eventora_http_requests_total counter",
+    ]
+    for (endpoint, method), (statuses, *_) in sorted(stats.items()):
+        for status, count in sorted(statuses.items()):
+            lines.append(f"eventora_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+    lines += [
+        "# HELP eventora_http_request_duration_seconds Request latency",
+        "# TYPE eventora_http_request_duration_seconds histogram",
+    ]
+    for (endpoint, method), (_, buckets, count, seconds, *_) in sorted(stats.items()):
+        for bound, bucket_count in zip(BUCKETS, buckets):
+            labels = _labels(endpoint=endpoint, method=method, le=bound)
+            lines.append(f"eventora_http_request_duration_seconds_bucket{labels} {bucket_count}")
+        labels = _labels(endpoint=endpoint, method=method)
+        lines.append(f"eventora_http_request_duration_seconds_bucket{_labels(endpoint=endpoint, method=method, le='+Inf')} {count}")
+        lines.append(f"eventora_http_request_duration_seconds_sum{labels} {seconds}")
+        lines.append(f"eventora_http_request_duration_seconds_count{labels} {count}")
+
+    totals = [
+        ("eventora_db_queries_total", "SQL statements run by requests", 4),
+        ("eventora_db_duration_seconds_total", "Time requests spent in SQL", 5),
+        ("eventora_serialize_duration_seconds_total", "Time requests spent encoding JSON", 6),
+    ]
+    for name, help_text, index in totals:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (endpoint, method), values in sorted(stats.items()):
+            lines.append(f"{name}{_labels(endpoint=endpoint, method=method)} {values[index]}")
+
+    pool, sweep = data["pool"], data["sweep"]
+    process = [
+        ("eventora_db_pool_checkouts_total", "counter", pool.get("checkouts", 0)),
+        ("eventora_db_pool_wait_seconds_total", "counter", pool.get("wait_ms_total", 0.0) / 1000),
+        ("eventora_db_pool_wait_seconds_max", "gauge", pool.get("wait_ms_max", 0.0) / 1000),
+        ("eventora_db_pool_slow_checkouts_total", "counter", pool.get("slow_checkouts", 0)),
+        ("eventora_overdue_sweeps_total", "counter", sweep.get("runs", 0)),
+        ("eventora_tasks_marked_overdue_total", "counter", sweep.get("tasks_marked_overdue", 0)),
+    ]
+    for name, kind, value in process:
+        lines += [f"# TYPE {name} {kind}", f"{name} {value}"]
+
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_view():
+    # Request counts and SQL timings are not for the public internet
+    if METRICS_TOKEN:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+            return jsonify({"message": "Invalid metrics token"}), 401
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({"message": "Set METRICS_TOKEN to scrape metrics from another host"}), 403
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """Time every request of `app` and serve the totals at /metrics"""
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", _metrics_view)
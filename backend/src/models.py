@@ -1,6 +1,11 @@
 from enum import Enum
 from src.config import db
 from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import event, func, literal, literal_column, union_all
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import to_tsvector
 
 
 # ENUMS
@@ -33,6 +38,13 @@ class OrgRole(Enum):
     VOLUNTEER = "volunteer"
 
 
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 # Association Models
 class OrganizationMember(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
@@ -43,6 +55,11 @@ class OrganizationMember(db.Model):
     organization = db.relationship("Organization", back_populates="members"
                                    )
 
+    # The primary key leads with user_id, so lookups by org need their own
+    __table_args__ = (
+        db.Index("idx_org_member_org_role", "org_id", "role"),
+    )
+
 
 class TeamMember(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
@@ -63,6 +80,83 @@ class TaskAssignee(db.Model):
     )
 
 
+class AuthContext:
+    """Org and team memberships of a user, loaded once per request"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._org_roles = None
+        self._team_roles = None
+
+    @staticmethod
+    def for_user(user_id):
+        """Get the auth context of a user for the current request"""
+        if not has_app_context():
+            return AuthContext(user_id)
+
+        contexts = g.setdefault("auth_contexts", {})
+        if user_id not in contexts:
+            contexts[user_id] = AuthContext(user_id)
+        return contexts[user_id]
+
+    def _load(self):
+        # Both membership kinds come back from a single round trip. Those of
+        # organizations being deleted grant nothing, which closes them to
+        # reads and writes alike.
+        deleting = orgs_being_deleted()
+        query = union_all(
+            db.select(literal("org"), OrganizationMember.org_id, OrganizationMember.role)
+            .where(OrganizationMember.user_id == self.user_id, OrganizationMember.org_id.not_in(deleting)),
+            db.select(literal("team"), TeamMember.team_id, TeamMember.role)
+            .join(Team, Team.id == TeamMember.team_id)
+            .where(TeamMember.user_id == self.user_id, Team.org_id.not_in(deleting)),
+        )
+
+        self._org_roles = {}
+        self._team_roles = {}
+        for kind, target_id, role in db.session.execute(query):
+            roles = self._org_roles if kind == "org" else self._team_roles
+            roles[target_id] = role if isinstance(role, OrgRole) else OrgRole[role]
+
+    def reset(self):
+        self._org_roles = None
+        self._team_roles = None
+
+    @property
+    def org_roles(self):
+        if self._org_roles is None:
+            self._load()
+        return self._org_roles
+
+    @property
+    def team_roles(self):
+        if self._team_roles is None:
+            self._load()
+        return self._team_roles
+
+    def get_org_role(self, org_id):
+        return self.org_roles.get(org_id)
+
+    def get_team_role(self, team_id):
+        return self.team_roles.get(team_id)
+
+
+def reset_auth_contexts():
+    """Drop the memberships cached for this request, e.g. after a Core write to membership rows"""
+    if not has_app_context():
+        return
+    for context in g.get("auth_contexts", {}).values():
+        context.reset()
+
+
+@event.listens_for(Session, "after_flush")
+def _reset_auth_contexts(session, flush_context):
+    """Drop cached memberships once a flush touches membership rows"""
+    changed = (session.new | session.dirty | session.deleted)
+    if any(isinstance(obj, (OrganizationMember, TeamMember)) for obj in changed):
+        reset_auth_contexts()
+
+
 # MODELS
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -104,36 +198,34 @@ class User(db.Model):
             "createdAt": self.created_at.isoformat() if self.created_at else None,
         }
 
+    @property
+    def auth(self):
+        """Request-scoped membership cache used by the role checks below"""
+        return AuthContext.for_user(self.id)
+
     def get_org_role(self, org_id):
         """Get user's role in a specific organization"""
-        membership = OrganizationMember.query.filter_by(
-            user_id=self.id,
-            org_id=org_id
-        ).first()
-        return membership.role if membership else None
+        return self.auth.get_org_role(org_id)
 
     def is_org_member(self, org_id):
         """Check if user is a member of the organization"""
-        return OrganizationMember.query.filter_by(
-            user_id=self.id,
-            org_id=org_id
-        ).first() is not None
+        return self.auth.get_org_role(org_id) is not None
 
     def is_org_admin(self, org_id):
         """Check if user is a leader or co-leader of the organization"""
-        membership = OrganizationMember.query.filter_by(
-            user_id=self.id,
-            org_id=org_id
-        ).first()
-        return membership and membership.role in [OrgRole.LEADER, OrgRole.COLEADER]
+        return self.auth.get_org_role(org_id) in [OrgRole.LEADER, OrgRole.COLEADER]
 
     def is_org_leader(self, org_id):
         """Check if user is a leader of the organization"""
-        membership = OrganizationMember.query.filter_by(
-            user_id=self.id,
-            org_id=org_id
-        ).first()
-        return membership and membership.role == OrgRole.LEADER
+        return self.auth.get_org_role(org_id) == OrgRole.LEADER
+
+    def get_team_role(self, team_id):
+        """Get user's role in a specific team"""
+        return self.auth.get_team_role(team_id)
+
+    def is_team_member(self, team_id):
+        """Check if user is a member of the team"""
+        return self.auth.get_team_role(team_id) is not None
 
 
 class Organization(db.Model):
@@ -167,6 +259,11 @@ class Organization(db.Model):
         db.Index("idx_org_code", "code"),
     )
 
+    @classmethod
+    def live(cls):
+        """Query of the organizations that are not being deleted"""
+        return cls.query.filter(cls.id.not_in(orgs_being_deleted()))
+
     def to_json(self):
         return {
             "id": self.id,
@@ -220,6 +317,9 @@ class Event(db.Model):
 
     __table_args__ = (
         db.Index("idx_event_org_title", "org_id", "title"),
+        db.Index("idx_event_org_start", "org_id", "start_date"),
+        db.Index("idx_event_public_start", "is_public", "start_date"),
+        db.Index("idx_event_org_updated", "org_id", "updated_at"),
     )
 
     def to_json(self, include_creator=False):
@@ -267,9 +367,13 @@ class Team(db.Model):
 
     __table_args__ = (
         db.Index("idx_team_org_name", "org_id", "name"),
+        db.Index("idx_team_org_updated", "org_id", "updated_at"),
     )
 
-    def to_json(self, include_members=True):
+    def to_json(self, include_members=True, task_assignees=None):
+        if task_assignees is None:
+            task_assignees = Task.load_assignees([task.id for task in self.tasks])
+
         data = {
             "id": self.id,
             "orgId": self.org_id,
@@ -279,7 +383,7 @@ class Team(db.Model):
             "createdAt": self.created_at.isoformat() if self.created_at else None,
             "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
             "members": [member.user.to_json() for member in self.members],
-            "tasks": [task.to_json() for task in self.tasks] if self.tasks else []
+            "tasks": [task.to_json(assignees=task_assignees[task.id]) for task in self.tasks] if self.tasks else []
         }
 
         if include_members:
@@ -291,6 +395,21 @@ class Team(db.Model):
 
         return data
 
+    @staticmethod
+    def load_options():
+        """Loader options covering everything to_json touches"""
+        return [
+            selectinload(Team.members).joinedload(TeamMember.user),
+            selectinload(Team.tasks),
+        ]
+
+    @staticmethod
+    def bulk_to_json(teams, include_members=True):
+        """Serialize teams, loading the assignees of all their tasks in one query"""
+        task_assignees = Task.load_assignees(
+            [task.id for team in teams for task in team.tasks])
+        return [team.to_json(include_members, task_assignees) for team in teams]
+
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -324,9 +443,15 @@ class Task(db.Model):
     __table_args__ = (
         db.Index("idx_task_team_status", "team_id", "status"),
         db.Index("idx_task_event_status", "event_id", "status"),
+        # Count and max(updated_at) per org, for conditional GETs
+        db.Index("idx_task_org_updated", "org_id", "updated_at"),
+        # Only the rows the overdue sweeper looks at
+        db.Index("idx_task_status_due", "status", "due_date",
+                 postgresql_where=status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
+                 sqlite_where=status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])),
     )
 
-    def to_json(self):
+    def to_json(self, assignees=None):
         data = {
             "id": self.id,
             "eventId": self.event_id,
@@ -340,17 +465,103 @@ class Task(db.Model):
             "createdAt": self.created_at.isoformat() if self.created_at else None,
         }
 
-        assignees = (
-            db.session.query(User.id, User.first_name, User.last_name)
-            .join(TaskAssignee, TaskAssignee.user_id == User.id)
-            .filter(TaskAssignee.task_id == self.id)
-            .all()
-        )
+        if assignees is None:
+            assignees = Task.load_assignees([self.id])[self.id]
 
-        data["assignees"] = [
-            {"id": user.id, "name": user.first_name + " " + user.last_name} for user in assignees]
+        data["assignees"] = assignees
         return data
 
+    @staticmethod
+    def load_assignees(task_ids):
+        """Get assignees of many tasks in one query, grouped by task id"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+
+        rows = db.session.execute(Task.assignees_statement(task_ids)).all()
+        return Task.group_assignees(task_ids, rows)
+
+    @staticmethod
+    def assignees_statement(task_ids):
+        """SELECT of the assignees of `task_ids`, a list or a subquery of task ids"""
+        return (
+            db.select(TaskAssignee.task_id, User.id, User.first_name, User.last_name)
+            .join(User, TaskAssignee.user_id == User.id)
+            .where(TaskAssignee.task_id.in_(task_ids))
+        )
+
+    @staticmethod
+    def group_assignees(task_ids, rows):
+        """Group assignees_statement rows by task id, with an empty list for tasks without any"""
+        grouped = {task_id: [] for task_id in task_ids}
+        for row in rows:
+            grouped.setdefault(row.task_id, []).append(
+                {"id": row.id, "name": row.first_name + " " + row.last_name})
+        return grouped
+
+    @staticmethod
+    def bulk_to_json(tasks):
+        """Serialize tasks, loading all of their assignees in one query"""
+        assignees = Task.load_assignees([task.id for task in tasks])
+        return [task.to_json(assignees=assignees[task.id]) for task in tasks]
+
+    @staticmethod
+    def bulk_assign(assignments):
+        """Assign team members to many (task, user_ids) pairs with one query and one batched INSERT.
+
+        Ids that are not members of the task's team or are already assigned
+        are skipped. Returns the ids newly assigned to each task, in the
+        order of `assignments`.
+        """
+        assignments = [(task, list(dict.fromkeys(user_ids))) for task, user_ids in assignments]
+        team_ids = {task.team_id for task, user_ids in assignments if user_ids and task.team_id is not None}
+        if not team_ids:
+            return [[] for _ in assignments]
+
+        requested = {uid for _, user_ids in assignments for uid in user_ids}
+        members = {
+            (row.team_id, row.user_id) for row in db.session.query(TeamMember.team_id, TeamMember.user_id)
+            .filter(TeamMember.team_id.in_(team_ids), TeamMember.user_id.in_(requested))
+        }
+        now = datetime.utcnow()
+        rows = [
+            {"task_id": task.id, "user_id": uid, "assigned_at": now}
+            for task, user_ids in assignments for uid in user_ids if (task.team_id, uid) in members
+        ]
+
+        inserted = {}
+        if rows:
+            statement = insert_ignoring_conflicts(TaskAssignee).returning(TaskAssignee.task_id, TaskAssignee.user_id)
+            for row in db.session.execute(statement, rows):
+                inserted.setdefault(row.task_id, set()).add(row.user_id)
+
+        return [task._assignees_changed(user_ids, inserted.get(task.id, set())) for task, user_ids in assignments]
+
+    def assign_users(self, user_ids):
+        """Assign the team members among `user_ids`, returning the ids newly assigned"""
+        return Task.bulk_assign([(self, user_ids)])[0]
+
+    def unassign_users(self, user_ids):
+        """Remove assignees among `user_ids`, returning the ids actually removed"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return []
+
+        statement = (
+            db.delete(TaskAssignee)
+            .where(TaskAssignee.task_id == self.id, TaskAssignee.user_id.in_(user_ids))
+            .returning(TaskAssignee.user_id)
+        )
+        removed = {row.user_id for row in db.session.execute(statement)}
+        return self._assignees_changed(user_ids, removed)
+
+    def _assignees_changed(self, user_ids, changed):
+        # Bulk statements skip the flush events that touch the parent task, so
+        # bump updated_at here to keep ETags and cached team payloads fresh.
+        if changed:
+            self.updated_at = datetime.utcnow()
+        return [uid for uid in user_ids if uid in changed]
+
 
 class Budget(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -358,14 +569,27 @@ class Budget(db.Model):
         'organization.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    total_amount = db.Column(db.Float, nullable=False)
-    spent_amount = db.Column(db.Float, default=0.0)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False)
+    spent_amount = db.Column(db.Numeric(12, 2), default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    expenses = db.relationship(
+        "Expense",
+        backref="budget",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+    rollups = db.relationship(
+        "ExpenseRollup",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
     __table_args__ = (
         db.Index("idx_budget_org_name", "org_id", "name"),
+        db.Index("idx_budget_org_updated", "org_id", "updated_at"),
     )
 
     def to_json(self):
@@ -374,9 +598,234 @@ class Budget(db.Model):
             "orgId": self.org_id,
             "name": self.name,
             "description": self.description,
-            "totalAmount": self.total_amount,
-            "spentAmount": self.spent_amount,
-            "remainingAmount": self.total_amount - self.spent_amount,
+            "totalAmount": float(self.total_amount),
+            "spentAmount": float(self.spent_amount or 0),
+            "remainingAmount": float(self.total_amount - (self.spent_amount or 0)),
             "createdAt": self.created_at.isoformat() if self.created_at else None,
             "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class Expense(db.Model):
+    """A line item posted against a budget; refunds are negative"""
+    id = db.Column(db.Integer, primary_key=True)
+    budget_id = db.Column(db.Integer, db.ForeignKey(
+        "budget.id", ondelete="CASCADE"), nullable=False)
+    org_id = db.Column(db.Integer, db.ForeignKey(
+        "organization.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="SET NULL"), nullable=True)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    spent_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("idx_expense_budget_spent", "budget_id", "spent_at"),
+        db.Index("idx_expense_org_spent", "org_id", "spent_at"),
+    )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "budgetId": self.budget_id,
+            "orgId": self.org_id,
+            "userId": self.user_id,
+            "amount": float(self.amount),
+            "description": self.description,
+            "spentAt": self.spent_at.isoformat() if self.spent_at else None,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class ExpenseRollup(db.Model):
+    """Expenses of a budget summed per day, week (from Monday) and month, kept by src/ledger.py"""
+    budget_id = db.Column(db.Integer, db.ForeignKey(
+        "budget.id", ondelete="CASCADE"), primary_key=True)
+    period = db.Column(db.String(5), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey(
+        "organization.id", ondelete="CASCADE"), nullable=False)
+    amount = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+    entries = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index("idx_expense_rollup_org", "org_id", "period", "period_start"),
+    )
+
+
+class OrgStats(db.Model):
+    """Per-organization counters, updated in the same transaction as the rows they count"""
+    org_id = db.Column(db.Integer, db.ForeignKey(
+        "organization.id", ondelete="CASCADE"), primary_key=True)
+    members_leader = db.Column(db.Integer, default=0, nullable=False)
+    members_coleader = db.Column(db.Integer, default=0, nullable=False)
+    members_member = db.Column(db.Integer, default=0, nullable=False)
+    members_volunteer = db.Column(db.Integer, default=0, nullable=False)
+    events_draft = db.Column(db.Integer, default=0, nullable=False)
+    events_planned = db.Column(db.Integer, default=0, nullable=False)
+    events_ongoing = db.Column(db.Integer, default=0, nullable=False)
+    events_completed = db.Column(db.Integer, default=0, nullable=False)
+    events_cancelled = db.Column(db.Integer, default=0, nullable=False)
+    tasks_pending = db.Column(db.Integer, default=0, nullable=False)
+    tasks_in_progress = db.Column(db.Integer, default=0, nullable=False)
+    tasks_completed = db.Column(db.Integer, default=0, nullable=False)
+    tasks_overdue = db.Column(db.Integer, default=0, nullable=False)
+    total_teams = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def member_column(role):
+        return f"members_{role.value}"
+
+    @staticmethod
+    def event_column(status):
+        return f"events_{status.value}"
+
+    @staticmethod
+    def task_column(status):
+        return f"tasks_{status.value}"
+
+    def _counts(self, enum, column_name):
+        counts = {}
+        for value in enum:
+            count = getattr(self, column_name(value)) or 0
+            if count:
+                counts[value.value] = count
+        return counts
+
+    def to_json(self):
+        members_by_role = self._counts(OrgRole, OrgStats.member_column)
+        events_by_status = self._counts(EventStatus, OrgStats.event_column)
+        tasks_by_status = self._counts(TaskStatus, OrgStats.task_column)
+
+        return {
+            "totalMembers": sum(members_by_role.values()),
+            "totalEvents": sum(events_by_status.values()),
+            "totalTeams": self.total_teams or 0,
+            "totalTasks": sum(tasks_by_status.values()),
+            "membersByRole": members_by_role,
+            "eventsByStatus": events_by_status,
+            "tasksByStatus": tasks_by_status,
+        }
+
+
+class Job(db.Model):
+    """A unit of background work, claimed and run by src/worker.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # Not a foreign key: a delete-org job outlives its organization
+    org_id = db.Column(db.Integer, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey(
+        "user.id", ondelete="SET NULL"), nullable=True)
+    progress = db.Column(db.Integer, default=0, nullable=False)
+    total = db.Column(db.Integer, nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("idx_job_status_run_after", "status", "run_after"),
+        db.Index("idx_job_org_kind", "org_id", "kind"),
+        db.Index("idx_job_created_by", "created_by"),
+        db.Index("idx_job_kind_status", "kind", "status"),
+    )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value if self.status else None,
+            "orgId": self.org_id,
+            "progress": self.progress,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def orgs_being_deleted():
+    """Select the ids of organizations with an unfinished delete-org job.
+
+    DELETE /api/org/delete only queues the job, so the organization is gone
+    for clients from then on: hidden from listings and closed to members.
+    A job that failed for good keeps it hidden; `flask enqueue-job
+    delete-org --org-id <id>` retries it.
+    """
+    return db.select(Job.org_id).where(
+        Job.kind == "delete-org", Job.status != JobStatus.SUCCEEDED, Job.org_id.isnot(None))
+
+
+# Full-text search. The GIN indexes only exist on PostgreSQL; other
+# databases fall back to the in-process index in src/search.py.
+SEARCH_COLUMNS = {
+    Organization: (Organization.name, Organization.college, Organization.description),
+    Event: (Event.title, Event.description, Event.location),
+}
+
+
+def search_document(model):
+    """tsvector expression over a model's searchable columns, matching its GIN index"""
+    columns = SEARCH_COLUMNS[model]
+    text = func.coalesce(columns[0], "")
+    for column in columns[1:]:
+        text = text + " " + func.coalesce(column, "")
+    return to_tsvector(literal_column("'simple'::regconfig"), text)
+
+
+def dialect_insert(model):
+    """INSERT for `model` from the current database's dialect, which has ON CONFLICT support"""
+    dialect = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+def insert_ignoring_conflicts(model):
+    """INSERT for `model` that skips rows conflicting with an existing key"""
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+db.Index("idx_org_search", search_document(Organization), postgresql_using="gin",
+         _table=Organization.__table__).ddl_if(dialect="postgresql")
+db.Index("idx_event_search", search_document(Event), postgresql_using="gin",
+         _table=Event.__table__).ddl_if(dialect="postgresql")
+
+
+def create_missing_indexes():
+    """Create declared indexes that create_all skipped because their table already existed"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+# Columns that used to be floats; create_all leaves existing columns alone
+MONEY_COLUMNS = [Budget.__table__.c.total_amount, Budget.__table__.c.spent_amount]
+
+
+def upgrade_money_columns():
+    """Convert float amount columns of an existing PostgreSQL schema to NUMERIC(12, 2)"""
+    if db.engine.dialect.name != "postgresql":
+        return
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as connection:
+        for column in MONEY_COLUMNS:
+            current = {c["name"]: c["type"] for c in inspector.get_columns(column.table.name)}[column.name]
+            if isinstance(current, db.Numeric) and not isinstance(current, db.Float):
+                continue
+            connection.execute(db.text(
+                f'ALTER TABLE "{column.table.name}" ALTER COLUMN {column.name} '
+                f'TYPE NUMERIC(12, 2) USING round({column.name}::numeric, 2)'))
@@ -1,13 +1,38 @@
-from src.config import db
+from src.config import db, JOB_MAX_UPLOAD_BYTES
 from datetime import datetime
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, DataError
 from flask import Blueprint, request, jsonify
-from src.lib import generate_code, token_required
-from src.models import Organization, OrganizationMember, OrgRole, TeamMember, EventStatus
+from sqlalchemy import select, true
+from sqlalchemy.orm import joinedload, selectinload
+from src.lib import generate_code, token_required, paginate, query_budget
+from src.stats import get_org_stats
+from src.search import search_page
+from src.cache import cache
+from src.streaming import stream_batches, streamed_response
+from src.importer import IMPORTERS, detect_format, read_rows, import_rows
+from src.worker import enqueue, pending_job
+from src.conditional import conditional, cached_response
+from src.models import (Organization, OrganizationMember, OrgRole, TeamMember, EventStatus, Team, Task,
+                        User, Event, Budget, OrgStats, orgs_being_deleted)
 
 org_bp = Blueprint("org", __name__)
 
 
+def _member_ids(org_id):
+    return select(OrganizationMember.user_id).where(OrganizationMember.org_id == org_id)
+
+
+def _org_sources(current_user, org_id, *extra):
+    """Validator sources for member-only org views"""
+    if not current_user.is_org_member(org_id):
+        return None
+    return [
+        (Organization, Organization.id == org_id),
+        (OrganizationMember, OrganizationMember.org_id == org_id),
+        *extra,
+    ]
+
+
 @org_bp.route("/create", methods=["POST"])
 @token_required
 def create_org(current_user):
@@ -60,15 +85,22 @@ def create_org(current_user):
 
 @org_bp.route("/get-all", methods=["GET"])
 def get_all_orgs():
-    orgs = Organization.query.all()
-    json_orgs = list(map(lambda org: org.to_json(), orgs))
-    return jsonify({"data": json_orgs})
+    try:
+        page, etag = cache.lookup(
+            f"orgs?{request.query_string.decode()}", ["orgs"],
+            lambda: paginate(Organization.live(), Organization, lambda orgs: [org.to_json() for org in orgs]),
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    return cached_response(page, etag)
 
 
 @org_bp.route("/get/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, org_id: [(Organization, Organization.id == org_id)])
 def get_org_by_id(current_user, org_id):
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -83,7 +115,7 @@ def get_org_by_id(current_user, org_id):
 @org_bp.route("/update/<int:org_id>", methods=["PATCH"])
 @token_required
 def update_org(current_user, org_id):
-    org = Organization.query.filter_by(id=org_id).first()
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -136,18 +168,24 @@ def delete_org(current_user, org_id):
         org_name = org.name
 
         # Check if user has other organizations before deleting
-        user_orgs = OrganizationMember.query.filter_by(user_id=current_user.id).all()
-        has_other_orgs = len([m for m in user_orgs if m.org_id != org_id]) > 0
-
-        # Delete the organization (cascade will handle related records)
-        db.session.delete(org)
+        has_other_orgs = any(
+            member_org_id != org_id for member_org_id in current_user.auth.org_roles)
+
+        # The cascade can touch every row of a large club, so the worker
+        # deletes it in batches; a repeated request returns the same job
+        job = pending_job("delete-org", org_id) or enqueue(
+            "delete-org", {"orgId": org_id}, user_id=current_user.id, org_id=org_id)
+        # The queued job already hides the club (see orgs_being_deleted).
+        # Touching the row drops the cached listings and ETags that show it.
+        org.updated_at = datetime.utcnow()
         db.session.commit()
 
         return jsonify({
-            "message": f"Club '{org_name}' has been successfully deleted",
+            "message": f"Club '{org_name}' is being deleted",
             "deletedOrgId": org_id,
-            "hasOtherOrgs": has_other_orgs
-        }), 200
+            "hasOtherOrgs": has_other_orgs,
+            "job": job.to_json(),
+        }), 202
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": f"Failed to delete club: {str(e)}"}), 500
@@ -155,8 +193,14 @@ def delete_org(current_user, org_id):
 
 @org_bp.route("/members/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, org_id: _org_sources(
+    current_user, org_id, (User, User.id.in_(_member_ids(org_id)))))
 def get_org_members(current_user, org_id):
-    org = Organization.query.get(org_id)
+    org = (
+        Organization.live().filter_by(id=org_id)
+        .options(selectinload(Organization.members).joinedload(OrganizationMember.user))
+        .first()
+    )
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -179,7 +223,7 @@ def get_org_members(current_user, org_id):
 @token_required
 def update_member_role(current_user, org_id):
     """Update a member's role in the organization"""
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -233,7 +277,7 @@ def update_member_role(current_user, org_id):
 @token_required
 def remove_member(current_user, org_id):
     """Remove a member from the organization"""
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -249,11 +293,6 @@ def remove_member(current_user, org_id):
     if user_id == org.owner_id:
         return jsonify({"message": "Cannot remove the organization owner"}), 400
 
-    # Leaders cannot be removed by co-leaders
-    target_role = org.get_member_role(user_id)
-    if target_role == OrgRole.LEADER and not current_user.is_org_leader(org_id):
-        return jsonify({"message": "Co-leaders cannot remove leaders"}), 403
-
     membership = OrganizationMember.query.filter_by(
         user_id=user_id,
         org_id=org_id
@@ -262,6 +301,10 @@ def remove_member(current_user, org_id):
     if not membership:
         return jsonify({"message": "User is not a member of this organization"}), 404
 
+    # Leaders cannot be removed by co-leaders
+    if membership.role == OrgRole.LEADER and not current_user.is_org_leader(org_id):
+        return jsonify({"message": "Co-leaders cannot remove leaders"}), 403
+
     try:
         db.session.delete(membership)
         db.session.commit()
@@ -273,22 +316,28 @@ def remove_member(current_user, org_id):
 
 @org_bp.route("/search", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [(Organization, true())])
 def search_orgs(current_user):
     query = request.args.get("q", "").strip()
     if not query:
         return jsonify({"message": "Query parameter 'q' is required"}), 400
 
-    orgs = Organization.query.filter(
-        (Organization.name.ilike(f"%{query}")) | (Organization.code == query)
-    ).all()
+    try:
+        page = search_page(
+            Organization.live(), Organization, query,
+            lambda orgs: [org.to_json() for org in orgs],
+            exact=Organization.code == query,
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    return jsonify({"data": [org.to_json() for org in orgs]}), 200
+    return jsonify(page), 200
 
 
 @org_bp.route("/leave/<int:org_id>", methods=["POST"])
 @token_required
 def leave_org(current_user, org_id):
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -313,42 +362,158 @@ def leave_org(current_user, org_id):
         return jsonify({"message": str(e)}), 500
 
 
+def _member_json(membership, owner_id):
+    user_data = membership.user.to_json()
+    user_data["orgRole"] = membership.role.value
+    user_data["isOwner"] = membership.user_id == owner_id
+    return user_data
+
+
+def org_details_options():
+    """Loader plan for everything the org details page serializes"""
+    return [
+        selectinload(Organization.members).joinedload(OrganizationMember.user),
+        selectinload(Organization.teams).options(*Team.load_options()),
+        selectinload(Organization.events),
+        selectinload(Organization.tasks),
+        selectinload(Organization.budgets),
+    ]
+
+
+def org_details_sources(org_id):
+    """Validator sources of the org details page, shared with its async handler in src/asgi.py"""
+    return [
+        (Organization, Organization.id == org_id),
+        (OrganizationMember, OrganizationMember.org_id == org_id),
+        (User, User.id.in_(_member_ids(org_id))),
+        (Team, Team.org_id == org_id),
+        (Event, Event.org_id == org_id),
+        (Task, Task.org_id == org_id),
+        (Budget, Budget.org_id == org_id),
+    ]
+
+
 @org_bp.route("/details/<int:org_id>", methods=["GET"])
+@query_budget(12)
 @token_required
+@conditional(lambda current_user, org_id:
+             org_details_sources(org_id) if current_user.is_org_member(org_id) else None)
 def get_org_full_details(current_user, org_id):
-    org = Organization.query.get(org_id)
-    if not org:
-        return jsonify({"message": "Organization not found"}), 404
-
     # Check if user is a member to view full details
     if not current_user.is_org_member(org_id):
+        if not Organization.live().filter_by(id=org_id).first():
+            return jsonify({"message": "Organization not found"}), 404
         return jsonify({"message": "Not authorized. Only members can view full organization details"}), 403
 
+    org = db.session.get(Organization, org_id, options=org_details_options())
+    if not org:
+        return jsonify({"message": "Organization not found"}), 404
+
     # Get user's role in the organization
     user_role = current_user.get_org_role(org_id)
 
     # Prepare members data with roles
-    members_data = []
-    for m in org.members:
-        user_data = m.user.to_json()
-        user_data["orgRole"] = m.role.value
-        user_data["joinedAt"] = m.joined_at.isoformat(
-        ) if m.joined_at else None
-        user_data["isOwner"] = m.user_id == org.owner_id
-        members_data.append(user_data)
+    members_data = [_member_json(m, org.owner_id) for m in org.members]
+
+    # One assignee lookup serves both the team task lists and the org task list
+    task_ids = {t.id for t in org.tasks} | {t.id for team in org.teams for t in team.tasks}
+    task_assignees = Task.load_assignees(task_ids)
 
     return jsonify({
         "org": org.to_json(),
         "userRole": user_role.value if user_role else None,
         "isOwner": org.owner_id == current_user.id,
         "members": members_data,
-        "teams": [t.to_json() for t in org.teams],
+        "teams": [t.to_json(task_assignees=task_assignees) for t in org.teams],
         "events": [e.to_json() for e in org.events],
-        "tasks": [t.to_json() for t in org.tasks],
+        "tasks": [t.to_json(assignees=task_assignees[t.id]) for t in org.tasks],
         "budgets": [b.to_json() for b in org.budgets]
     }), 200
 
 
+@org_bp.route("/<int:org_id>/export", methods=["GET"])
+@token_required
+def export_org(current_user, org_id):
+    """Stream a full dump of an organization as JSON, or NDJSON with ?format=ndjson"""
+    if not current_user.is_org_member(org_id):
+        if not Organization.live().filter_by(id=org_id).first():
+            return jsonify({"message": "Organization not found"}), 404
+        return jsonify({"message": "Not authorized. Only members can export the organization"}), 403
+
+    org = db.session.get(Organization, org_id)
+    if not org:
+        return jsonify({"message": "Organization not found"}), 404
+    org_data, owner_id = org.to_json(), org.owner_id
+
+    members = stream_batches(
+        select(OrganizationMember).where(OrganizationMember.org_id == org_id)
+        .options(joinedload(OrganizationMember.user)).order_by(OrganizationMember.user_id))
+    teams = stream_batches(
+        select(Team).where(Team.org_id == org_id).options(*Team.load_options()).order_by(Team.id))
+    events = stream_batches(select(Event).where(Event.org_id == org_id).order_by(Event.id))
+    tasks = stream_batches(select(Task).where(Task.org_id == org_id).order_by(Task.id))
+    budgets = stream_batches(select(Budget).where(Budget.org_id == org_id).order_by(Budget.id))
+
+    return streamed_response([
+        ("org", org_data),
+        ("members", ([_member_json(m, owner_id) for m in batch] for batch in members)),
+        ("teams", (Team.bulk_to_json(batch) for batch in teams)),
+        ("events", ([e.to_json() for e in batch] for batch in events)),
+        ("tasks", (Task.bulk_to_json(batch) for batch in tasks)),
+        ("budgets", ([b.to_json() for b in batch] for batch in budgets)),
+    ])
+
+
+@org_bp.route("/<int:org_id>/import/<kind>", methods=["POST"])
+@token_required
+def import_org_rows(current_user, org_id, kind):
+    """Import members, team-members, events or tasks from a CSV or NDJSON upload"""
+    if kind not in IMPORTERS:
+        return jsonify({"message": f"Unknown import type: {kind}"}), 404
+
+    if not Organization.live().filter_by(id=org_id).first():
+        return jsonify({"message": "Organization not found"}), 404
+
+    if not current_user.is_org_admin(org_id):
+        return jsonify({"message": "Only leaders and co-leaders can import data"}), 403
+
+    # Either a multipart "file" field or the raw request body
+    upload = request.files.get("file")
+    try:
+        if upload:
+            fmt = detect_format(request.args.get("format"), upload.mimetype, upload.filename)
+            stream = upload.stream
+        else:
+            fmt = detect_format(request.args.get("format"), request.mimetype, None)
+            stream = request.stream
+
+        # ?async=true hands the upload to the worker and returns its job to poll
+        if request.args.get("async", "").lower() in ("1", "true", "yes"):
+            # The upload waits in the job's payload, so it has to stay small
+            data = stream.read(JOB_MAX_UPLOAD_BYTES + 1)
+            if len(data) > JOB_MAX_UPLOAD_BYTES:
+                return jsonify({"message": f"Uploads over {JOB_MAX_UPLOAD_BYTES // 1024} KB cannot be queued; "
+                                           "import them without ?async=true"}), 413
+            data = data.decode("utf-8-sig")
+            job = enqueue("import", {"kind": kind, "format": fmt, "data": data},
+                          user_id=current_user.id, org_id=org_id)
+            db.session.commit()
+            return jsonify({"message": "Import queued", "job": job.to_json()}), 202
+
+        result = import_rows(kind, org_id, current_user, read_rows(stream, fmt))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except DataError as e:
+        return jsonify({"message": "Invalid value in import", "error": str(e.orig)}), 400
+    except IntegrityError as e:
+        return jsonify({"message": "Database integrity error", "error": str(e)}), 500
+
+    return jsonify({
+        "message": f"Imported {result['imported']} row(s), {result['failed']} failed",
+        **result,
+    }), 200
+
+
 @org_bp.route("/join", methods=["POST"])
 @token_required
 def join_org(current_user):
@@ -357,16 +522,12 @@ def join_org(current_user):
         if not code:
             return jsonify({"message": "Organization code is required"}), 400
 
-        org = Organization.query.filter_by(code=code).first()
+        org = Organization.live().filter_by(code=code).first()
         if not org:
             return jsonify({"message": "Organization not found with this code"}), 404
 
         # Prevent joining if already a member
-        existing_member = OrganizationMember.query.filter_by(
-            user_id=current_user.id,
-            org_id=org.id
-        ).first()
-        if existing_member:
+        if current_user.is_org_member(org.id):
             return jsonify({"message": "You are already a member of this organization"}), 400
 
         # New members join as MEMBER role by default
@@ -396,10 +557,16 @@ def join_org(current_user):
 
 @org_bp.route("/my-organizations", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [
+    (OrganizationMember, OrganizationMember.user_id == current_user.id),
+    (Organization, Organization.id.in_(
+        select(OrganizationMember.org_id).where(OrganizationMember.user_id == current_user.id))),
+])
 def get_my_organizations(current_user):
     """Get all organizations where the current user is a member"""
-    memberships = OrganizationMember.query.filter_by(
-        user_id=current_user.id).all()
+    memberships = OrganizationMember.query.filter(
+        OrganizationMember.user_id == current_user.id,
+        OrganizationMember.org_id.not_in(orgs_being_deleted())).all()
 
     orgs_data = []
     for membership in memberships:
@@ -417,7 +584,7 @@ def get_my_organizations(current_user):
 @token_required
 def transfer_ownership(current_user, org_id):
     """Transfer ownership of the organization to another member"""
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -463,9 +630,13 @@ def transfer_ownership(current_user, org_id):
 
 @org_bp.route("/statistics/<int:org_id>", methods=["GET"])
 @token_required
+# The counters in org_stats change with every row they count, so its
+# updated_at stands in for the team, event and task tables
+@conditional(lambda current_user, org_id: _org_sources(
+    current_user, org_id, (OrgStats, OrgStats.org_id == org_id)))
 def get_org_statistics(current_user, org_id):
     # """Get organization statistics"""
-    org = Organization.query.get(org_id)
+    org = Organization.live().filter_by(id=org_id).first()
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
@@ -473,39 +644,11 @@ def get_org_statistics(current_user, org_id):
     if not current_user.is_org_member(org_id):
         return jsonify({"message": "Not authorized. Only members can view organization statistics"}), 403
 
-    # Calculate statistics
-    total_members = len(org.members)
-    total_events = len(org.events)
-    total_teams = len(org.teams)
-    total_tasks = len(org.tasks)
-
-    # Count by role
-    role_counts = {}
-    for member in org.members:
-        role = member.role.value
-        role_counts[role] = role_counts.get(role, 0) + 1
-
-    # Count events by status
-    event_status_counts = {}
-    for event in org.events:
-        status = event.status.value
-        event_status_counts[status] = event_status_counts.get(status, 0) + 1
-
-    # Count tasks by status
-    task_status_counts = {}
-    for task in org.tasks:
-        status = task.status.value
-        task_status_counts[status] = task_status_counts.get(status, 0) + 1
+    stats = get_org_stats(org_id)
 
     return jsonify({
         "data": {
-            "totalMembers": total_members,
-            "totalEvents": total_events,
-            "totalTeams": total_teams,
-            "totalTasks": total_tasks,
-            "membersByRole": role_counts,
-            "eventsByStatus": event_status_counts,
-            "tasksByStatus": task_status_counts,
+            **stats,
             "organizationAge": (datetime.utcnow() - org.created_at).days if org.created_at else 0
         }
     }), 200
@@ -0,0 +1,43 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+READ_METHODS = ("GET", "HEAD")
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of GET requests to the "replica" bind.
+
+    Everything else uses the primary. As soon as a session flushes or runs
+    an INSERT/UPDATE/DELETE it sticks to the primary for the rest of the
+    request, so a request always reads its own writes. Without a replica
+    bind configured this behaves like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                self.info["read_replica"] = True
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["use_primary"] = True
+        if self.info.get("use_primary"):
+            return False
+        return has_request_context() and request.method in READ_METHODS
+
+
+def read_from_primary(session):
+    """Send the rest of the request's reads to the primary.
+
+    Objects already loaded from the replica are expired, so they reload
+    from the primary too. Used before building a payload that outlives
+    the request, e.g. a cache entry, which must not capture replica lag.
+    """
+    session.info["use_primary"] = True
+    if session.info.pop("read_replica", False):
+        session.expire_all()
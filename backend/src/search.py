@@ -0,0 +1,184 @@
+import re
+import bisect
+import threading
+from src.config import db
+from flask import request
+from collections import Counter
+from sqlalchemy import Float, case, cast, event, func, literal, literal_column, true, tuple_
+from sqlalchemy.orm import Session
+from src.lib import page_limit, encode_cursor, decode_cursor, is_id
+from src.conditional import validators
+from src.models import SEARCH_COLUMNS, search_document
+
+
+def _tokenize(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def prefix_tsquery(text):
+    """tsquery matching every term of `text`, the last one as a prefix, or None if it has no terms.
+
+    Search boxes send what the user has typed so far, so "spring fe" has to
+    find "Spring Fest". Terms are runs of word characters, which cannot hold
+    tsquery operators, so they need no further escaping.
+    """
+    terms = _tokenize(text)
+    if not terms:
+        return None
+    terms[-1] += ":*"
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(terms))
+
+
+class InvertedIndex:
+    """In-process token index over a model's searchable columns.
+
+    Used when the database has no full-text search (SQLite in tests). It is
+    rebuilt on the first search after a flush in this process touches the
+    model, or after the table's row count or latest updated_at moves, which
+    catches writes by other processes and by Core statements.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._postings = None
+        self._terms = []
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._postings = None
+
+    def _build(self):
+        postings = {}
+        columns = SEARCH_COLUMNS[self.model]
+        for row in db.session.query(self.model.id, *columns):
+            terms = Counter(term for value in row[1:] for term in _tokenize(value))
+            for term, count in terms.items():
+                postings.setdefault(term, {})[row[0]] = count
+        return postings
+
+    def _prefixed(self, prefix):
+        """Postings of every indexed term starting with `prefix`, merged"""
+        merged = Counter()
+        start = bisect.bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            merged.update(self._postings[term])
+        return merged
+
+    def search(self, text):
+        """{id: score} of rows containing every term of `text`, the last as a prefix"""
+        terms = _tokenize(text)
+        if not terms:
+            return {}
+
+        signature = validators([(self.model, true())])
+        with self._lock:
+            if self._postings is None or signature != self._signature:
+                self._postings = self._build()
+                self._terms = sorted(self._postings)
+                self._signature = signature
+
+            *whole, prefix = terms
+            matches = [self._postings.get(term, {}) for term in set(whole)] + [self._prefixed(prefix)]
+
+        ids = set.intersection(*(set(match) for match in matches))
+        return {row_id: sum(match[row_id] for match in matches) for row_id in ids}
+
+
+_fallback_indexes = {model: InvertedIndex(model) for model in SEARCH_COLUMNS}
+
+
+def invalidate_fallback_index(model):
+    """Drop the in-process index of `model`, e.g. after a bulk write that skipped the ORM"""
+    index = _fallback_indexes.get(model)
+    if index is not None:
+        index.invalidate()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_fallback_indexes(session, flush_context):
+    for obj in session.new | session.dirty | session.deleted:
+        invalidate_fallback_index(type(obj))
+
+
+def _request_cursor(size):
+    """Sort values of the last row of the previous page, from the `after` request arg"""
+    after = request.args.get("after")
+    if not after:
+        return None
+
+    values = decode_cursor(after, [None] * size)
+    *scores, row_id = values
+    if not is_id(row_id) or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in scores):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _ascending(values):
+    """Sort key of cursor `values`: every score descending, then the id ascending"""
+    *scores, row_id = values
+    return (*(-score for score in scores), row_id)
+
+
+def search_page(query, model, text, serialize, exact=None):
+    """Rank rows of `query` against `text` and return one page of results.
+
+    Uses the tsvector GIN index on PostgreSQL and the in-process inverted
+    index elsewhere. Rows matching the optional `exact` criterion are
+    included and listed first. Pages are keyset-paginated on (exact match,
+    rank, id) and follow the `limit` and `after` request args like the
+    other list endpoints. Raises ValueError on invalid arguments.
+    """
+    limit = page_limit()
+    after = _request_cursor(3 if exact is not None else 2)
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        document = search_document(model)
+        tsquery = prefix_tsquery(text)
+        if tsquery is None:
+            if exact is None:
+                return {"data": serialize([]), "nextCursor": None}
+            # A cast, since a bare constant in ORDER BY is read as a column position
+            match, score = exact, cast(literal(0), Float)
+        else:
+            match, score = document.op("@@")(tsquery), func.ts_rank(document, tsquery)
+        ranks = [score]
+        if exact is not None:
+            match = match | exact
+            ranks.insert(0, case((exact, 1), else_=0))
+
+        query = query.add_columns(*ranks).filter(match)
+        if after:
+            query = query.filter(tuple_(*(-rank for rank in ranks), model.id) > tuple_(*_ascending(after)))
+        page = [(row, [*values, row.id])
+                for row, *values in query.order_by(*(rank.desc() for rank in ranks), model.id).limit(limit + 1)]
+    else:
+        scores = _fallback_indexes[model].search(text)
+        exact_ids = set()
+        if exact is not None:
+            exact_ids = {row_id for row_id, in query.filter(exact).with_entities(model.id)}
+
+        def values(row_id):
+            ranks = [int(row_id in exact_ids)] if exact is not None else []
+            return [*ranks, scores.get(row_id, 0), row_id]
+
+        # Only ids are ranked in memory; rows are loaded a page at a time,
+        # dropping the matches that `query` filters out
+        ranked = sorted((values(row_id) for row_id in scores.keys() | exact_ids), key=_ascending)
+        position = bisect.bisect_right(ranked, _ascending(after), key=_ascending) if after else 0
+        page = []
+        while len(page) <= limit and position < len(ranked):
+            batch = ranked[position:position + limit + 1]
+            position += len(batch)
+            rows = {row.id: row for row in query.filter(model.id.in_([v[-1] for v in batch]))}
+            page.extend((rows[v[-1]], v) for v in batch if v[-1] in rows)
+
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    return {
+        "data": serialize([row for row, _ in page]),
+        "nextCursor": encode_cursor(page[-1][1]) if has_more else None,
+    }
@@ -0,0 +1,144 @@
+"""Production server: `python -m src.serve`
+
+Runs the Flask app under gunicorn. The app is imported once in the master
+process, which also creates the schema and checks the database. Each
+worker then drops the connections it inherited and warms its own pool
+before taking requests.
+
+Unless SERVE_JOB_WORKER is off, the master also starts one job worker
+process (`python -m src.worker`), which runs queued jobs such as club
+deletions and the overdue sweeper. Set it off when the worker is deployed
+on its own.
+"""
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import subprocess
+from gunicorn.app.base import BaseApplication
+from src.config import (db, WEB_PORT, WEB_WORKERS, WEB_THREADS, WEB_WORKER_CLASS, WEB_TIMEOUT, DB_POOL_SIZE,
+                        DB_MAX_OVERFLOW, DB_MAX_CONNECTIONS, DB_PGBOUNCER, SERVE_JOB_WORKER, METRICS_DIR)
+from src.main import app, init_database
+from src.cache import cache
+from src.metrics import set_snapshot_dir
+
+
+def worker_layout(cpus=None):
+    """(workers, threads) for this machine.
+
+    Each thread can hold one pooled connection, so a worker runs
+    DB_POOL_SIZE threads. Workers follow the usual 2 * CPU + 1, capped so
+    that all their pools (overflow included) fit in DB_MAX_CONNECTIONS.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    threads = WEB_THREADS or max(1, DB_POOL_SIZE)
+    per_worker = threads if DB_PGBOUNCER else DB_POOL_SIZE + DB_MAX_OVERFLOW
+    workers = WEB_WORKERS or max(1, min(2 * cpus + 1, DB_MAX_CONNECTIONS // max(1, per_worker)))
+    return workers, threads
+
+
+def post_fork(server, worker):
+    """Drop the connections inherited from the master and open fresh ones"""
+    with app.app_context():
+        engines = list(db.engines.values())
+        for engine in engines:
+            engine.dispose(close=False)
+        for engine in engines:
+            warm = [engine.connect() for _ in range(min(DB_POOL_SIZE, worker.cfg.threads))]
+            for connection in warm:
+                connection.close()
+
+
+_job_worker = None
+_metrics_dir = None
+
+
+def when_ready(server):
+    """Start the job worker once gunicorn is listening"""
+    global _job_worker
+    if SERVE_JOB_WORKER:
+        _job_worker = subprocess.Popen([sys.executable, "-m", "src.worker"])
+        server.log.info("Started job worker (pid %d)", _job_worker.pid)
+
+
+def on_exit(server):
+    """Stop the job worker, which finishes its current batch on SIGTERM, and drop temporary metrics"""
+    if _job_worker is not None and _job_worker.poll() is None:
+        _job_worker.terminate()
+        try:
+            _job_worker.wait(timeout=WEB_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            _job_worker.kill()
+    if _metrics_dir is not None:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
+
+
+class Server(BaseApplication):
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def options():
+    workers, threads = worker_layout()
+    config = {
+        "bind": f"0.0.0.0:{WEB_PORT}",
+        "workers": workers,
+        "worker_class": WEB_WORKER_CLASS,
+        "threads": threads,
+        "timeout": WEB_TIMEOUT,
+        "keepalive": 5,
+        "preload_app": True,
+        "max_requests": 10000,
+        "max_requests_jitter": 1000,
+        "accesslog": "-",
+        "post_fork": post_fork,
+        "when_ready": when_ready,
+        "on_exit": on_exit,
+    }
+    if WEB_WORKER_CLASS == "gevent":
+        # Greenlets instead of threads; keep concurrency within the pool
+        config["worker_connections"] = threads
+    return config
+
+
+def main():
+    if not init_database(app):
+        sys.exit(1)
+
+    # An in-process cache cannot see the invalidations of the other web
+    # workers or of the job worker
+    workers, _ = worker_layout()
+    processes = workers + (1 if SERVE_JOB_WORKER else 0)
+    if processes > 1 and not cache.shared:
+        logging.warning("Read cache disabled: CACHE_URL must point at Redis to share it between %d processes",
+                        processes)
+        cache.disable()
+
+    # Every process counts its own requests; /metrics adds up their files
+    global _metrics_dir
+    if processes > 1 and not METRICS_DIR:
+        _metrics_dir = tempfile.mkdtemp(prefix="eventora-metrics-")
+        set_snapshot_dir(_metrics_dir)
+        # For the job worker, which reads it at import
+        os.environ["METRICS_DIR"] = _metrics_dir
+
+    # Workers open their own connections after the fork
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    Server(app, options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import click
+from src.config import db
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from flask.cli import with_appcontext
+from collections import Counter, defaultdict
+from src.models import (Organization, OrganizationMember, Event, Team, Task, OrgStats,
+                        OrgRole, EventStatus, TaskStatus)
+
+
+def _count_by(column, org_column, org_id):
+    rows = (
+        db.session.query(column, func.count())
+        .filter(org_column == org_id)
+        .group_by(column)
+        .all()
+    )
+    total = sum(count for _, count in rows)
+    return total, {key.value: count for key, count in rows if key is not None}
+
+
+def compute_org_stats(org_id):
+    """Count members, events, teams and tasks of an organization with GROUP BY queries"""
+    total_members, members_by_role = _count_by(
+        OrganizationMember.role, OrganizationMember.org_id, org_id)
+    total_events, events_by_status = _count_by(Event.status, Event.org_id, org_id)
+    total_tasks, tasks_by_status = _count_by(Task.status, Task.org_id, org_id)
+    total_teams = db.session.query(func.count(Team.id)).filter(Team.org_id == org_id).scalar()
+
+    return {
+        "totalMembers": total_members,
+        "totalEvents": total_events,
+        "totalTeams": total_teams,
+        "totalTasks": total_tasks,
+        "membersByRole": members_by_role,
+        "eventsByStatus": events_by_status,
+        "tasksByStatus": tasks_by_status,
+    }
+
+
+def get_org_stats(org_id):
+    """Read the materialized counters, falling back to live aggregation"""
+    stats = db.session.get(OrgStats, org_id)
+    if stats is None:
+        return compute_org_stats(org_id)
+    return stats.to_json()
+
+
+# Incremental maintenance
+
+def _as_enum(enum, value):
+    if value is None or isinstance(value, enum):
+        return value
+    try:
+        return enum(value)
+    except ValueError:
+        return enum[value] if value in enum.__members__ else None
+
+
+# Model -> (counted attribute, its enum, OrgStats column for a value)
+_COUNTED = {
+    OrganizationMember: ("role", OrgRole, OrgStats.member_column),
+    Event: ("status", EventStatus, OrgStats.event_column),
+    Task: ("status", TaskStatus, OrgStats.task_column),
+}
+
+
+def _bucket(obj, value):
+    attr, enum, column_name = _COUNTED[type(obj)]
+    value = _as_enum(enum, value)
+    return column_name(value) if value is not None else None
+
+
+def collect_deltas(session):
+    """Work out counter changes for everything the current flush wrote"""
+    deltas = defaultdict(Counter)
+
+    for obj in session.new:
+        if isinstance(obj, Team):
+            deltas[obj.org_id]["total_teams"] += 1
+        elif type(obj) in _COUNTED:
+            column = _bucket(obj, getattr(obj, _COUNTED[type(obj)][0]))
+            if column:
+                deltas[obj.org_id][column] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Team):
+            deltas[obj.org_id]["total_teams"] -= 1
+        elif type(obj) in _COUNTED:
+            history = inspect(obj).attrs[_COUNTED[type(obj)][0]].history
+            value = history.deleted[0] if history.deleted else getattr(obj, _COUNTED[type(obj)][0])
+            column = _bucket(obj, value)
+            if column:
+                deltas[obj.org_id][column] -= 1
+
+    for obj in session.dirty:
+        if type(obj) not in _COUNTED:
+            continue
+        history = inspect(obj).attrs[_COUNTED[type(obj)][0]].history
+        if not history.added:
+            continue
+        old_column = _bucket(obj, history.deleted[0]) if history.deleted else None
+        new_column = _bucket(obj, history.added[0])
+        if old_column != new_column:
+            if old_column:
+                deltas[obj.org_id][old_column] -= 1
+            if new_column:
+                deltas[obj.org_id][new_column] += 1
+
+    return deltas
+
+
+def apply_deltas(connection, deltas):
+    """Add counter deltas with UPDATE ... SET col = col + n, one statement per org"""
+    for org_id, changes in deltas.items():
+        values = {column: getattr(OrgStats, column) + delta
+                  for column, delta in changes.items() if delta}
+        if values:
+            connection.execute(
+                db.update(OrgStats).where(OrgStats.org_id == org_id).values(**values))
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_org_stats(session, flush_context):
+    connection = session.connection()
+
+    for obj in session.new:
+        if isinstance(obj, Organization):
+            connection.execute(db.insert(OrgStats).values(org_id=obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, Organization):
+            connection.execute(db.delete(OrgStats).where(OrgStats.org_id == obj.id))
+
+    apply_deltas(connection, collect_deltas(session))
+
+
+# Rebuild
+
+def _grouped_counts(column, org_column, org_id=None):
+    query = db.session.query(org_column, column, func.count()).group_by(org_column, column)
+    if org_id is not None:
+        query = query.filter(org_column == org_id)
+    return query.all()
+
+
+def rebuild_org_stats(org_id=None):
+    """Recompute counters from the source tables, for one org or all of them"""
+    org_ids = [org_id] if org_id is not None else [
+        row.id for row in db.session.query(Organization.id)]
+    rows = {oid: {"org_id": oid} for oid in org_ids}
+
+    for model in _COUNTED:
+        attr, enum, column_name = _COUNTED[model]
+        for oid, value, count in _grouped_counts(getattr(model, attr), model.org_id, org_id):
+            if oid in rows and value is not None:
+                rows[oid][column_name(value)] = count
+
+    teams = db.session.query(Team.org_id, func.count()).group_by(Team.org_id)
+    if org_id is not None:
+        teams = teams.filter(Team.org_id == org_id)
+    for oid, count in teams:
+        if oid in rows:
+            rows[oid]["total_teams"] = count
+
+    zeroed = {column.key: 0 for column in OrgStats.__table__.columns
+              if column.key not in ("org_id", "updated_at")}
+    for values in rows.values():
+        db.session.merge(OrgStats(**{**zeroed, **values}))
+    db.session.commit()
+    return len(rows)
+
+
+@click.command("rebuild-org-stats")
+@click.option("--org-id", type=int, default=None, help="Only rebuild this organization")
+@with_appcontext
+def rebuild_org_stats_command(org_id):
+    """Reconcile the org_stats table with the source rows"""
+    count = rebuild_org_stats(org_id)
+    click.echo(f"Rebuilt statistics for {count} organization(s)")
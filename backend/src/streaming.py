@@ -0,0 +1,58 @@
+from types import GeneratorType
+from src.config import db, STREAM_BATCH_SIZE
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON = "application/x-ndjson"
+
+
+def stream_batches(statement, batch_size=STREAM_BATCH_SIZE):
+    """Run an ORM select through a server-side cursor, yielding its entities in lists of `batch_size`"""
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    yield from result.scalars().partitions()
+
+
+def wants_ndjson():
+    return request.args.get("format") == "ndjson" or request.accept_mimetypes.best == NDJSON
+
+
+def _json_chunks(sections, dumps):
+    yield "{"
+    for i, (name, value) in enumerate(sections):
+        yield ("," if i else "") + dumps(name) + ":"
+        if not isinstance(value, GeneratorType):
+            yield dumps(value)
+            continue
+
+        yield "["
+        separator = ""
+        for batch in value:
+            if batch:
+                yield separator + ",".join(dumps(item) for item in batch)
+                separator = ","
+        yield "]"
+    yield "}"
+
+
+def _ndjson_chunks(sections, dumps):
+    for name, value in sections:
+        if not isinstance(value, GeneratorType):
+            yield dumps({"type": name, "data": value}) + "\n"
+            continue
+
+        for batch in value:
+            yield "".join(dumps({"type": name, "data": item}) + "\n" for item in batch)
+
+
+def streamed_response(sections):
+    """Stream (name, value) sections as one JSON object, or as NDJSON records with ?format=ndjson.
+
+    A value that is a generator of lists (see stream_batches) is written one
+    batch at a time, so memory stays flat however many rows it covers.
+    Sections are consumed lazily, inside the request context.
+    """
+    dumps = current_app.json.dumps
+    if wants_ndjson():
+        chunks, mimetype = _ndjson_chunks(sections, dumps), NDJSON
+    else:
+        chunks, mimetype = _json_chunks(sections, dumps), "application/json"
+    return Response(stream_with_context(chunks), mimetype=mimetype)
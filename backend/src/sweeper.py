@@ -0,0 +1,107 @@
+import time
+import click
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask.cli import with_appcontext
+from src.config import db, OVERDUE_SWEEP_BATCH_SIZE, OVERDUE_SWEEP_INTERVAL
+from src.models import Task, TaskStatus, OrgStats
+from src.stats import apply_deltas
+from src.cache import cache
+
+SWEPT_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+
+# Totals since the process started, plus the outcome of the last run
+sweep_metrics = {"runs": 0, "tasks_marked_overdue": 0, "last_run": None}
+
+
+def _sweep_batch(status, now, batch_size):
+    """Mark one batch of past-due tasks in `status` as OVERDUE, returning (org_id, team_id) per row"""
+    task = Task.__table__
+    candidates = (
+        db.select(task.c.id)
+        .where(task.c.status == status, task.c.due_date < now)
+        .order_by(task.c.id)
+        .limit(batch_size)
+    )
+    # The status and due date are checked again on the row itself, so a row
+    # another sweeper already moved is skipped rather than counted twice.
+    statement = (
+        db.update(task)
+        .where(task.c.id.in_(candidates), task.c.status == status, task.c.due_date < now)
+        .values(status=TaskStatus.OVERDUE, updated_at=now)
+        .returning(task.c.org_id, task.c.team_id)
+    )
+    return db.session.execute(statement).all()
+
+
+def sweep_overdue_tasks(now=None, batch_size=OVERDUE_SWEEP_BATCH_SIZE):
+    """Move past-due pending and in-progress tasks to OVERDUE, one set-based UPDATE per batch.
+
+    Each batch commits with its org_stats adjustment, so counters never
+    drift from the rows. Returns the number of tasks moved.
+    """
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    moved = batches = 0
+
+    for status in SWEPT_STATUSES:
+        while True:
+            rows = _sweep_batch(status, now, batch_size)
+            if not rows:
+                db.session.rollback()
+                break
+
+            deltas = defaultdict(Counter)
+            for row in rows:
+                deltas[row.org_id][OrgStats.task_column(status)] -= 1
+                deltas[row.org_id][OrgStats.task_column(TaskStatus.OVERDUE)] += 1
+            apply_deltas(db.session.connection(), deltas)
+            db.session.commit()
+
+            # Core statements bypass the flush listeners, so drop cached team payloads here
+            cache.invalidate(*{f"team:{row.team_id}" for row in rows if row.team_id})
+
+            moved += len(rows)
+            batches += 1
+            if len(rows) < batch_size:
+                break
+
+    elapsed = (time.perf_counter() - started) * 1000
+    sweep_metrics["runs"] += 1
+    sweep_metrics["tasks_marked_overdue"] += moved
+    sweep_metrics["last_run"] = {"at": now.isoformat(), "moved": moved, "batches": batches, "ms": round(elapsed, 1)}
+    logging.info("Overdue sweep moved %d task(s) in %d batch(es) in %.1f ms", moved, batches, elapsed)
+    return moved
+
+
+@click.command("sweep-overdue-tasks")
+@click.option("--batch-size", type=int, default=OVERDUE_SWEEP_BATCH_SIZE, help="Rows updated per statement")
+@with_appcontext
+def sweep_overdue_tasks_command(batch_size):
+    """Mark past-due pending and in-progress tasks as overdue"""
+    moved = sweep_overdue_tasks(batch_size=batch_size)
+    click.echo(f"Marked {moved} task(s) as overdue")
+
+
+def start_overdue_sweeper(app, interval=OVERDUE_SWEEP_INTERVAL):
+    """Run the sweeper every `interval` seconds on a daemon thread; a non-positive interval disables it"""
+    if interval <= 0:
+        return None
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    sweep_overdue_tasks()
+            except Exception:
+                logging.exception("Overdue sweep failed")
+            # The job worker serves no requests, so publish its sweep counts here
+            from src.metrics import write_snapshot
+            write_snapshot(force=True)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="overdue-sweeper", daemon=True)
+    thread.start()
+    return thread
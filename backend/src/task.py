@@ -1,91 +1,72 @@
 from src.config import db
 from datetime import datetime
-from src.lib import token_required
+from src.lib import token_required, paginated_response, parse_enum, bulk_items, is_id
+from src.conditional import conditional
 from sqlalchemy.exc import IntegrityError
 from flask import Blueprint, request, jsonify
-from src.models import Task, Team, TeamMember, TaskAssignee, TaskStatus, Priority
+from src.models import Task, Team, TaskAssignee, TaskStatus, Priority
 
 task_bp = Blueprint("task", __name__)
 
 
-@task_bp.route("/create", methods=["POST"])
-@token_required
-def create_task(current_user):
-    data = request.get_json() if request.is_json else request.json
-    event_id = data.get("eventId") or None
+def _task_fields(data):
+    """Validate a task payload, returning the Task columns and the user ids to assign.
+
+    Raises ValueError with a client-facing message on invalid input.
+    """
     team_id = data.get("teamId")
     org_id = data.get("orgId")
     title = data.get("title")
-    description = data.get("description")
     priority = data.get("priority", "low")
     status = data.get("status", "pending")
     due_date_str = data.get("dueDate")
-    user_ids = data.get("userIds", [])
 
     if not all([team_id, org_id, title, priority, status, due_date_str]):
-        return jsonify({"message": "teamId, orgId, title, priority, status, and dueDate are required"}), 400
+        raise ValueError("teamId, orgId, title, priority, status, and dueDate are required")
+    if not is_id(team_id) or not is_id(org_id):
+        raise ValueError("teamId and orgId must be integers")
 
     try:
         due_date = datetime.fromisoformat(due_date_str)
     except Exception:
-        return jsonify({"message": "Invalid dueDate format"}), 400
+        raise ValueError("Invalid dueDate format")
+
+    fields = {
+        "event_id": data.get("eventId") or None,
+        "team_id": team_id,
+        "org_id": org_id,
+        "title": title,
+        "description": data.get("description"),
+        "priority": parse_enum(Priority, priority, Priority.LOW),
+        "status": parse_enum(TaskStatus, status, TaskStatus.PENDING),
+        "due_date": due_date,
+    }
+    return fields, data.get("userIds", [])
 
-    team = Team.query.get(team_id)
+
+@task_bp.route("/create", methods=["POST"])
+@token_required
+def create_task(current_user):
+    data = request.get_json() if request.is_json else request.json
+    try:
+        fields, user_ids = _task_fields(data)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    team = Team.query.get(fields["team_id"])
     if not team:
         return jsonify({"message": "Team not found"}), 404
 
     # ✅ FIXED: Correct membership validation
-    member_ids = [member.user_id for member in team.members]
-    if current_user.id not in member_ids:
+    if not current_user.is_team_member(team.id):
         return jsonify({"message": "You are not a member of this team"}), 403
 
-    # Convert status/priority (string to Enum)
-    try:
-        priority_enum = Priority(priority.upper()) if hasattr(
-            priority, "upper") else Priority(priority)
-    except ValueError:
-        try:
-            priority_enum = Priority(priority.lower())
-        except Exception:
-            priority_enum = Priority.LOW
-
-    try:
-        status_enum = TaskStatus(
-            status.upper() if hasattr(status, "upper") else status)
-    except ValueError:
-        try:
-            status_enum = TaskStatus(status.lower())
-        except Exception:
-            status_enum = TaskStatus.PENDING
-
-    creator_id = current_user.id
-    new_task = Task(
-        event_id=event_id,
-        team_id=team_id,
-        org_id=org_id,
-        creator_id=creator_id,
-        title=title,
-        description=description,
-        priority=priority_enum,
-        status=status_enum,
-        due_date=due_date,
-    )
+    new_task = Task(creator_id=current_user.id, **fields)
     db.session.add(new_task)
     db.session.flush()
 
-    task_id = new_task.id
-
     # Assignment is optional
-    assigned = []
-    if user_ids:
-        for uid in user_ids:
-            # Check if user is a team member
-            if not TeamMember.query.filter_by(team_id=team.id, user_id=uid).first():
-                continue
-            # Check if already assigned
-            if not TaskAssignee.query.filter_by(task_id=task_id, user_id=uid).first():
-                db.session.add(TaskAssignee(task_id=task_id, user_id=uid))
-                assigned.append(uid)
+    assigned = new_task.assign_users(user_ids) if user_ids else []
 
     try:
         db.session.commit()
@@ -103,18 +84,93 @@ def create_task(current_user):
     }), 201
 
 
+@task_bp.route("/bulk-create", methods=["POST"])
+@token_required
+def bulk_create_tasks(current_user):
+    """Create many tasks and their assignees in one transaction, with a result per item"""
+    try:
+        items = bulk_items(request.get_json(), "tasks")
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    team_ids = {item.get("teamId") for item in items if is_id(item.get("teamId"))}
+    team_ids = {team.id for team in Team.query.filter(Team.id.in_(team_ids))} if team_ids else set()
+
+    results = [None] * len(items)
+    created = []
+    for index, item in enumerate(items):
+        try:
+            fields, user_ids = _task_fields(item)
+        except ValueError as e:
+            results[index] = {"index": index, "status": 400, "message": str(e)}
+            continue
+
+        if fields["team_id"] not in team_ids:
+            results[index] = {"index": index, "status": 404, "message": "Team not found"}
+        elif not current_user.is_team_member(fields["team_id"]):
+            results[index] = {"index": index, "status": 403, "message": "You are not a member of this team"}
+        else:
+            created.append((index, Task(creator_id=current_user.id, **fields), user_ids))
+
+    try:
+        # One batched INSERT for the tasks; flush events keep org stats and caches in sync
+        db.session.add_all([task for _, task, _ in created])
+        db.session.flush()
+        assigned = Task.bulk_assign([(task, user_ids) for _, task, user_ids in created])
+
+        assignees = Task.load_assignees([task.id for _, task, _ in created])
+        for (index, task, _), user_ids in zip(created, assigned):
+            results[index] = {
+                "index": index,
+                "status": 201,
+                "task": task.to_json(assignees=assignees[task.id]),
+                "assignedUserIds": user_ids,
+            }
+
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Database integrity error"}), 500
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify({
+        "message": f"Created {len(created)} of {len(items)} tasks",
+        "results": results,
+    }), 201 if created else 400
+
+
+def _filter_by_status(query):
+    """Apply the optional comma-separated `status` request arg, or return None if it is invalid"""
+    values = request.args.get("status")
+    if not values:
+        return query
+
+    statuses = [parse_enum(TaskStatus, value.strip()) for value in values.split(",")]
+    if not all(statuses):
+        return None
+    return query.filter(Task.status.in_(statuses))
+
+
 @task_bp.route("/event/<int:event_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, event_id: [(Task, Task.event_id == event_id)])
 def get_tasks_by_event_id(current_user, event_id):
-    tasks = Task.query.filter_by(event_id=event_id).all()
-    return jsonify({"data": [t.to_json() for t in tasks]}), 200
+    query = _filter_by_status(Task.query.filter_by(event_id=event_id))
+    if query is None:
+        return jsonify({"message": "Invalid status"}), 400
+    return paginated_response(query, Task, Task.bulk_to_json)
 
 
 @task_bp.route("/team/<int:team_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, team_id: [(Task, Task.team_id == team_id)])
 def get_tasks_by_team_id(current_user, team_id):
-    tasks = Task.query.filter_by(team_id=team_id).all()
-    return jsonify({"data": [t.to_json() for t in tasks]}), 200
+    query = _filter_by_status(Task.query.filter_by(team_id=team_id))
+    if query is None:
+        return jsonify({"message": "Invalid status"}), 400
+    return paginated_response(query, Task, Task.bulk_to_json)
 
 
 @task_bp.route("/update/<int:task_id>", methods=["PATCH"])
@@ -205,21 +261,7 @@ def assign_task(current_user):
     if not task:
         return jsonify({"message": "Task not found"}), 404
 
-    assigned = []
-    for uid in user_ids:
-        team_member = TeamMember.query.filter_by(
-            team_id=task.team_id,
-            user_id=uid,
-        ).first()
-        if not team_member:
-            continue
-
-        if not TaskAssignee.query.filter_by(
-            task_id=task.id,
-            user_id=uid,
-        ).first():
-            db.session.add(TaskAssignee(task_id=task_id, user_id=uid))
-            assigned.append(uid)
+    assigned = task.assign_users(user_ids)
 
     try:
         db.session.commit()
@@ -232,7 +274,7 @@ def assign_task(current_user):
 
 @task_bp.route("/unassign", methods=["DELETE"])
 @token_required
-def unassign_task():
+def unassign_task(current_user):
     data = request.get_json()
     task_id = data.get("task_id")
     user_ids = data.get("user_ids", [])
@@ -244,14 +286,7 @@ def unassign_task():
     if not task:
         return jsonify({"error": "Task not found"}), 404
 
-    removed = []
-    for uid in user_ids:
-        record = TaskAssignee.query.filter_by(
-            task_id=task_id, user_id=uid).first()
-        if record:
-            db.session.delete(record)
-            removed.append(uid)
-
+    removed = task.unassign_users(user_ids)
     db.session.commit()
     return jsonify({"message": "Users unassigned", "removed_user_ids": removed}), 200
 
@@ -265,6 +300,10 @@ def update_task_status(current_user, task_id):
     if not new_status:
         return jsonify({"error": "Status is required"}), 400
 
+    new_status = parse_enum(TaskStatus, new_status)
+    if not new_status:
+        return jsonify({"error": "Invalid status"}), 400
+
     task = Task.query.get(task_id)
     if not task:
         return jsonify({"error": "Task not found"}), 404
@@ -290,3 +329,58 @@ def update_task_status(current_user, task_id):
         "message": "Status updated successfully",
         "task": task.to_json()
     }), 200
+
+
+@task_bp.route("/bulk-update-status", methods=["PATCH"])
+@token_required
+def bulk_update_task_status(current_user):
+    """Update the status of many tasks assigned to the caller, with a result per item"""
+    try:
+        items = bulk_items(request.get_json(), "updates")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    task_ids = {item.get("taskId") for item in items if is_id(item.get("taskId"))}
+    tasks, assigned = {}, set()
+    if task_ids:
+        tasks = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}
+        assigned = {
+            row.task_id for row in db.session.query(TaskAssignee.task_id)
+            .filter(TaskAssignee.task_id.in_(task_ids), TaskAssignee.user_id == current_user.id)
+        }
+
+    results = []
+    updated = []
+    for index, item in enumerate(items):
+        task = tasks.get(item["taskId"]) if is_id(item.get("taskId")) else None
+        status = parse_enum(TaskStatus, item.get("status")) if item.get("status") else None
+
+        if not is_id(item.get("taskId")):
+            results.append({"index": index, "status": 400, "error": "taskId must be an integer"})
+        elif not status:
+            results.append({"index": index, "status": 400, "error": "Invalid status"})
+        elif not task:
+            results.append({"index": index, "status": 404, "error": "Task not found"})
+        elif task.id not in assigned:
+            results.append({"index": index, "status": 403, "error": "Not authorized"})
+        else:
+            task.status = status
+            updated.append(task)
+            results.append({"index": index, "status": 200, "task": task})
+
+    try:
+        # Rows changing the same columns flush as one executemany UPDATE
+        db.session.flush()
+        serialized = dict(zip([task.id for task in updated], Task.bulk_to_json(updated)))
+        for result in results:
+            if "task" in result:
+                result["task"] = serialized[result["task"].id]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "message": f"Updated {len(updated)} of {len(items)} tasks",
+        "results": results,
+    }), 200 if updated else 400
@@ -1,12 +1,29 @@
 from src.config import db
-from src.lib import token_required
+from src.lib import token_required, paginated_response
+from src.cache import cache
+from sqlalchemy import select, true
+from sqlalchemy.orm import selectinload
+from src.conditional import conditional, cached_response, DELETIONS
 from sqlalchemy.exc import IntegrityError
 from flask import Blueprint, request, jsonify
-from src.models import Team, Organization, TeamMember, User, OrgRole, OrganizationMember
+from src.models import (Team, Organization, TeamMember, User, OrgRole, OrganizationMember, Task,
+                        orgs_being_deleted)
 
 team_bp = Blueprint("team", __name__)
 
 
+def _team_sources(current_user, team_id):
+    """Validator sources for a single team, if the caller may see it"""
+    team = db.session.get(Team, team_id)
+    if not team or not current_user.is_org_member(team.org_id):
+        return None
+    return [
+        (Team, Team.id == team_id),
+        (Task, Task.team_id == team_id),
+        (User, User.id.in_(select(TeamMember.user_id).where(TeamMember.team_id == team_id))),
+    ]
+
+
 @team_bp.route("/create", methods=["POST"])
 @token_required
 def create_team(current_user):
@@ -28,11 +45,7 @@ def create_team(current_user):
     if not org:
         return jsonify({"message": "Organization not found"}), 404
 
-    is_user_in_org = OrganizationMember.query.filter_by(
-        user_id=current_user.id,
-        org_id=org.id,
-    ).first()
-    if not is_user_in_org:
+    if not current_user.is_org_member(org.id):
         return jsonify({"message": "Not authorized"}), 400
 
     leader_id = current_user.id
@@ -65,44 +78,45 @@ def create_team(current_user):
 
 
 @team_bp.route("/get-all", methods=["GET"])
+@conditional(lambda: [(Team, true()), (Task, Task.team_id.isnot(None)), DELETIONS])
 def get_all_teams():
-    teams = Team.query.all()
-    json_teams = list(map(lambda team: team.to_json(), teams))
-    return jsonify({"data": json_teams})
+    return paginated_response(
+        Team.query.filter(Team.org_id.not_in(orgs_being_deleted())).options(*Team.load_options()),
+        Team, Team.bulk_to_json)
 
 
 @team_bp.route("/get/<int:team_id>", methods=["GET"])
 @token_required
 def get_team_by_id(current_user, team_id):
-    team = Team.query.get(team_id)
+    team = db.session.get(Team, team_id)
     if not team:
         return jsonify({"message": "Team not found"}), 404
 
     # Verify user is member of the organization
-    is_user_in_org = OrganizationMember.query.filter_by(
-        user_id=current_user.id,
-        org_id=team.org_id
-    ).first()
-    if not is_user_in_org:
+    if not current_user.is_org_member(team.org_id):
         return jsonify({"message": "Not authorized"}), 403
 
-    return jsonify({"data": team.to_json()}), 200
+    data, etag = cache.lookup(
+        f"team:{team_id}", [f"team:{team_id}"],
+        # The access check already loaded the team, so only a refresh applies the load plan
+        lambda: db.session.get(Team, team_id, options=Team.load_options(), populate_existing=True).to_json(),
+    )
+    return cached_response({"data": data}, etag)
 
 
 @team_bp.route("/get-all/<int:org_id>", methods=["GET"])
 @token_required
+@conditional(lambda current_user, org_id: [
+    (Team, Team.org_id == org_id),
+    (Task, Task.org_id == org_id),
+] if current_user.is_org_member(org_id) else None)
 def get_teams_by_org_id(current_user, org_id):
     # Verify user is member of the organization
-    is_user_in_org = OrganizationMember.query.filter_by(
-        user_id=current_user.id,
-        org_id=org_id
-    ).first()
-    if not is_user_in_org:
+    if not current_user.is_org_member(org_id):
         return jsonify({"message": "Not authorized"}), 403
 
-    teams = Team.query.filter_by(org_id=org_id).all()
-    json_teams = list(map(lambda team: team.to_json(), teams))
-    return jsonify({"data": json_teams}), 200
+    return paginated_response(
+        Team.query.filter_by(org_id=org_id).options(*Team.load_options()), Team, Team.bulk_to_json)
 
 
 @team_bp.route("/update/<int:team_id>", methods=["PATCH"])
@@ -293,8 +307,15 @@ def remove_member_from_team(current_user, team_id):
 
 @team_bp.route("/members/<int:team_id>", methods=["GET"])
 @token_required
+@conditional(_team_sources)
 def list_team_members(current_user, team_id):
-    team = Team.query.get(team_id)
+    # populate_existing, since the validators already loaded the team without its members
+    team = (
+        Team.query.filter_by(id=team_id)
+        .options(selectinload(Team.members).joinedload(TeamMember.user))
+        .populate_existing()
+        .first()
+    )
     if not team:
         return jsonify({"message": "Team not found"}), 404
 
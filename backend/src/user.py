@@ -1,48 +1,77 @@
 from src.config import db
-from src.models import User
-from src.lib import token_required
+from sqlalchemy import select
+from src.conditional import conditional
+from src.models import User, Team, Task, Organization, OrganizationMember, TeamMember, Event, TaskAssignee
+from src.lib import token_required, token_cache
 from flask import Blueprint, jsonify, request
 
 user_bp = Blueprint("user", __name__)
 
+
+def _member_team_ids(current_user):
+    return select(TeamMember.team_id).where(TeamMember.user_id == current_user.id)
+
+
 @user_bp.route("/owned-org", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [(Organization, Organization.owner_id == current_user.id)])
 def get_user_owned_orgs(current_user):
     try:
-        owned_orgs = [org.to_json() for org in current_user.owned_organizations]
+        owned_orgs = [org.to_json() for org in Organization.live().filter_by(owner_id=current_user.id)]
         return jsonify({"data": owned_orgs}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/member-org", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [
+    (OrganizationMember, OrganizationMember.user_id == current_user.id),
+    (Organization, Organization.id.in_(
+        select(OrganizationMember.org_id).where(OrganizationMember.user_id == current_user.id))),
+])
 def get_user_member_orgs(current_user):
     try:
-        member_orgs = [membership.organization.to_json() for membership in current_user.organization_memberships]
+        # auth.org_roles leaves out organizations being deleted
+        member_orgs = [membership.organization.to_json() for membership in current_user.organization_memberships
+                       if membership.org_id in current_user.auth.org_roles]
         return jsonify({"data": member_orgs}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/lead-team", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [
+    (Team, Team.leader_id == current_user.id),
+    (Task, Task.team_id.in_(select(Team.id).where(Team.leader_id == current_user.id))),
+])
 def get_user_lead_teams(current_user):
     try:
-        led_teams = [team.to_json() for team in current_user.led_teams]
+        led_teams = Team.bulk_to_json(
+            Team.query.filter(Team.leader_id == current_user.id)
+            .options(*Team.load_options()).order_by(Team.id).all())
         return jsonify({"data": led_teams}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/member-team", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [
+    (TeamMember, TeamMember.user_id == current_user.id),
+    (Team, Team.id.in_(_member_team_ids(current_user))),
+    (Task, Task.team_id.in_(_member_team_ids(current_user))),
+])
 def get_user_member_teams(current_user):
     try:
-        member_teams = [membership.team.to_json() for membership in current_user.team_memberships]
+        member_teams = Team.bulk_to_json(
+            Team.query.filter(Team.id.in_(_member_team_ids(current_user)))
+            .options(*Team.load_options()).order_by(Team.id).all())
         return jsonify({"data": member_teams}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/created-event", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [(Event, Event.creator_id == current_user.id)])
 def get_user_created_events(current_user):
     try:
         created_events = [event.to_json() for event in current_user.created_events]
@@ -52,15 +81,20 @@ def get_user_created_events(current_user):
 
 @user_bp.route("/created-task", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [(Task, Task.creator_id == current_user.id)])
 def get_user_created_tasks(current_user):
     try:
-        created_tasks = [task.to_json() for task in current_user.created_tasks]
+        created_tasks = Task.bulk_to_json(current_user.created_tasks)
         return jsonify({"data": created_tasks}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/assigned-task", methods=["GET"])
 @token_required
+@conditional(lambda current_user: [
+    (TaskAssignee, TaskAssignee.user_id == current_user.id),
+    (Task, Task.id.in_(select(TaskAssignee.task_id).where(TaskAssignee.user_id == current_user.id))),
+])
 def get_user_assigned_tasks(current_user):
     try:
         assigned_tasks = [task.to_json() for task in current_user.tasks_assigned]
@@ -69,6 +103,7 @@ def get_user_assigned_tasks(current_user):
         return jsonify({"message": str(e)}), 500
 
 @user_bp.route("/get/<int:user_id>", methods=["GET"])
+@conditional(lambda user_id: [(User, User.id == user_id)])
 def get_user_by_id(user_id):
     try:
         user = User.query.get(user_id)
@@ -86,6 +121,7 @@ def delete_user(user_id):
             return jsonify({"message": "User not found"}), 404
         db.session.delete(user)
         db.session.commit()
+        token_cache.evict_user(user_id)
         return jsonify({"message": "User deleted"}), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
@@ -101,9 +137,9 @@ def update_user(user_id):
         user.first_name = data.get("firstName", user.first_name)
         user.last_name = data.get("lastName", user.last_name)
         user.email = data.get("email", user.email)
-        user.role = data.get("role", user.role)
 
         db.session.commit()
+        token_cache.evict_user(user_id)
 
         return jsonify({"message": "User updated"}), 200
     except Exception as e:
@@ -0,0 +1,337 @@
+"""Background jobs: a queue table and the worker that drains it.
+
+Requests enqueue a Job row and return; `python -m src.worker` (or
+`flask run-worker`) claims queued jobs with SELECT ... FOR UPDATE SKIP
+LOCKED, so any number of workers can poll the same table without handing
+out a job twice. Long jobs work in batches that each commit with the
+job's progress, so clients polling /api/job/get/<id> see them advance and
+a job picked up again after a crash resumes where it stopped.
+"""
+import io
+import os
+import time
+import click
+import signal
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask.cli import with_appcontext
+from src.config import (db, JOB_BATCH_SIZE, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL)
+from src.cache import cache
+from src.search import invalidate_fallback_index
+from src.models import (Job, JobStatus, User, Organization, OrganizationMember, Team, TeamMember, Event, Task,
+                        TaskAssignee, Budget, Expense, ExpenseRollup, OrgStats, reset_auth_contexts)
+
+# kind -> (handler, max attempts)
+HANDLERS = {}
+
+
+def job_handler(kind, max_attempts=JOB_MAX_ATTEMPTS):
+    """Register the function that runs jobs of `kind`. It receives the claimed Job and returns its result"""
+    def decorator(f):
+        HANDLERS[kind] = (f, max_attempts)
+        return f
+
+    return decorator
+
+
+def enqueue(kind, payload=None, user_id=None, org_id=None):
+    """Add a job to the queue. The caller commits"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job type: {kind}")
+    job = Job(kind=kind, payload=payload or {}, created_by=user_id, org_id=org_id,
+              status=JobStatus.QUEUED, run_after=datetime.utcnow())
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def pending_job(kind, org_id):
+    """The queued or running job of `kind` for an organization, if any"""
+    return Job.query.filter(
+        Job.kind == kind, Job.org_id == org_id, Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+    ).order_by(Job.id).first()
+
+
+def report_progress(job, progress, total=None):
+    """Record progress and renew the job's lease; committed with the caller's batch"""
+    job.progress = progress
+    if total is not None:
+        job.total = total
+    job.locked_at = datetime.utcnow()
+
+
+# Claiming
+
+def claim_job(worker_id, now=None):
+    """Take the oldest due job off the queue and mark it running. Returns it, or None"""
+    now = now or datetime.utcnow()
+    # SKIP LOCKED lets concurrent workers pass over a row another one is
+    # claiming instead of queueing behind its lock. Databases without it
+    # ignore the hint, so the UPDATE checks the status again.
+    job_id = db.session.scalar(
+        db.select(Job.id)
+        .where(Job.status == JobStatus.QUEUED, Job.run_after <= now)
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True))
+    if job_id is None:
+        db.session.rollback()
+        return None
+
+    claimed = db.session.execute(
+        db.update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1, locked_by=worker_id, locked_at=now,
+                started_at=now, updated_at=now)
+    ).rowcount
+    db.session.commit()
+    return db.session.get(Job, job_id) if claimed else None
+
+
+def requeue_stale_jobs(now=None, lease=JOB_LEASE_SECONDS):
+    """Hand running jobs whose worker went quiet for `lease` seconds back to the queue"""
+    now = now or datetime.utcnow()
+    stale = db.session.execute(
+        db.update(Job)
+        .where(Job.status == JobStatus.RUNNING, Job.locked_at < now - timedelta(seconds=lease))
+        .values(status=JobStatus.QUEUED, locked_by=None, locked_at=None, run_after=now, updated_at=now)
+    ).rowcount
+    db.session.commit()
+    if stale:
+        logging.warning("Requeued %d job(s) whose worker stopped reporting", stale)
+    return stale
+
+
+def run_job(job):
+    """Run a claimed job, then mark it succeeded, queue a retry or mark it failed"""
+    handler, max_attempts = HANDLERS.get(job.kind, (None, 1))
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job type: {job.kind}")
+        result = handler(job)
+    except Exception as e:
+        db.session.rollback()
+        logging.exception("Job %d (%s) failed on attempt %d", job.id, job.kind, job.attempts)
+        job.error = str(e)
+        job.locked_by = job.locked_at = None
+        if job.attempts < max_attempts:
+            # Back off 30s, 60s, 120s, ... between attempts
+            job.status = JobStatus.QUEUED
+            job.run_after = datetime.utcnow() + timedelta(seconds=30 * 2 ** (job.attempts - 1))
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return False
+
+    job.status = JobStatus.SUCCEEDED
+    job.result = result
+    job.error = None
+    job.locked_by = job.locked_at = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logging.info("Job %d (%s) finished in %.1f ms", job.id, job.kind, (time.perf_counter() - started) * 1000)
+    return True
+
+
+def work(app, worker_id=None, poll_interval=JOB_POLL_INTERVAL, stop=None, once=False):
+    """Claim and run jobs until `stop` is set, sleeping `poll_interval` seconds while the queue is empty.
+
+    With `once`, returns as soon as the queue is empty. Returns the number
+    of jobs run.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    ran = 0
+    logging.info("Worker %s polling for jobs", worker_id)
+
+    while not stop.is_set():
+        job = None
+        try:
+            with app.app_context():
+                requeue_stale_jobs()
+                job = claim_job(worker_id)
+                if job is not None:
+                    run_job(job)
+                    ran += 1
+        except Exception:
+            logging.exception("Worker %s failed to poll the job queue", worker_id)
+
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+
+    logging.info("Worker %s stopped after %d job(s)", worker_id, ran)
+    return ran
+
+
+# Handlers
+
+def _delete_in_batches(job, parent, criterion, children, batch_size, entity=None):
+    """Delete `parent` rows matching `criterion` with their `children`, one committed batch at a time.
+
+    `children` are (model, foreign key column) pairs deleted before their
+    parents. With `entity`, e.g. "team:{}", the cached payloads of the
+    deleted rows are invalidated after each batch.
+    """
+    while True:
+        ids = db.session.scalars(
+            db.select(parent.id).where(criterion).order_by(parent.id).limit(batch_size)).all()
+        if not ids:
+            return
+
+        for child, column in children:
+            db.session.execute(db.delete(child).where(column.in_(ids)))
+        db.session.execute(db.delete(parent).where(parent.id.in_(ids)))
+        report_progress(job, job.progress + len(ids))
+        db.session.commit()
+        if entity:
+            cache.invalidate(*(entity.format(row_id) for row_id in ids))
+
+
+@job_handler("delete-org")
+def delete_org_job(job):
+    """Delete an organization and everything in it, `JOB_BATCH_SIZE` rows per transaction.
+
+    Rows go in foreign key order: tasks and their assignees, teams and
+    their members, budgets and their ledgers, events, then memberships.
+    These are Core deletes, so caches, the search fallback index and
+    cached memberships are dropped here rather than by the flush listeners.
+    """
+    org_id = job.payload["orgId"]
+    batch_size = job.payload.get("batchSize", JOB_BATCH_SIZE)
+
+    def count(model, criterion):
+        return db.select(db.func.count()).select_from(model).where(criterion).scalar_subquery()
+
+    total = db.session.execute(db.select(
+        count(Task, Task.org_id == org_id) + count(Team, Team.org_id == org_id)
+        + count(Budget, Budget.org_id == org_id) + count(Event, Event.org_id == org_id)
+        + count(OrganizationMember, OrganizationMember.org_id == org_id))).scalar()
+    report_progress(job, 0, total)
+    db.session.commit()
+
+    _delete_in_batches(job, Task, Task.org_id == org_id, [(TaskAssignee, TaskAssignee.task_id)], batch_size)
+    _delete_in_batches(job, Team, Team.org_id == org_id, [(TeamMember, TeamMember.team_id)], batch_size,
+                       entity="team:{}")
+    _delete_in_batches(job, Budget, Budget.org_id == org_id,
+                       [(ExpenseRollup, ExpenseRollup.budget_id), (Expense, Expense.budget_id)], batch_size)
+    _delete_in_batches(job, Event, Event.org_id == org_id, [], batch_size, entity="event:{}")
+
+    # Memberships have a composite key, so batch on user_id within the org
+    member = OrganizationMember
+    while True:
+        user_ids = db.select(member.user_id).where(member.org_id == org_id).limit(batch_size)
+        deleted = db.session.execute(
+            db.delete(member).where(member.org_id == org_id, member.user_id.in_(user_ids))).rowcount
+        if not deleted:
+            break
+        report_progress(job, job.progress + deleted)
+        db.session.commit()
+    reset_auth_contexts()
+
+    # The organization goes last, together with anything added to it while
+    # the batches ran
+    db.session.execute(db.delete(TaskAssignee).where(
+        TaskAssignee.task_id.in_(db.select(Task.id).where(Task.org_id == org_id))))
+    db.session.execute(db.delete(TeamMember).where(
+        TeamMember.team_id.in_(db.select(Team.id).where(Team.org_id == org_id))))
+    for model in (Task, Team, ExpenseRollup, Expense, Budget, Event, OrganizationMember, OrgStats):
+        db.session.execute(db.delete(model).where(model.org_id == org_id))
+    deleted = db.session.execute(db.delete(Organization).where(Organization.id == org_id)).rowcount
+    report_progress(job, job.progress)
+    db.session.commit()
+
+    reset_auth_contexts()
+    cache.invalidate("orgs", f"org:{org_id}:events")
+    invalidate_fallback_index(Organization)
+    invalidate_fallback_index(Event)
+    return {"orgId": org_id, "deleted": bool(deleted), "rows": job.progress}
+
+
+# Imports commit chunk by chunk and a retry would import the same rows twice
+@job_handler("import", max_attempts=1)
+def import_job(job):
+    """Run an upload enqueued by POST /api/org/<id>/import/<kind>?async=true"""
+    from src.importer import read_rows, import_rows
+
+    payload = job.payload
+    user = db.session.get(User, job.created_by)
+    if user is None:
+        raise ValueError("The user who started this import no longer exists")
+    if not db.session.get(Organization, job.org_id):
+        raise ValueError("Organization not found")
+
+    rows = read_rows(io.BytesIO(payload["data"].encode("utf-8")), payload["format"])
+    return import_rows(payload["kind"], job.org_id, user, rows)
+
+
+@job_handler("rebuild-org-stats")
+def rebuild_org_stats_job(job):
+    """Recompute org_stats for the job's organization, or every organization"""
+    from src.stats import rebuild_org_stats
+
+    rebuild_org_stats(job.org_id)
+    return {"orgId": job.org_id}
+
+
+@job_handler("rebuild-expense-rollups")
+def rebuild_expense_rollups_job(job):
+    """Recompute expense_rollup for the job's organization, or every organization"""
+    from src.ledger import rebuild_rollups
+
+    return {"orgId": job.org_id, "rows": rebuild_rollups(job.org_id)}
+
+
+# CLI
+
+@click.command("enqueue-job")
+@click.argument("kind", type=click.Choice(sorted(HANDLERS)))
+@click.option("--org-id", type=int, default=None, help="Organization the job works on")
+@with_appcontext
+def enqueue_job_command(kind, org_id):
+    """Queue a background job, e.g. rebuild-org-stats"""
+    payload = {"orgId": org_id} if kind == "delete-org" else {}
+    job = enqueue(kind, payload, org_id=org_id)
+    db.session.commit()
+    click.echo(f"Queued job {job.id} ({kind})")
+
+
+@click.command("run-worker")
+@click.option("--once", is_flag=True, help="Exit once the queue is empty")
+@with_appcontext
+def run_worker_command(once):
+    """Run queued background jobs, and the overdue sweeper unless --once"""
+    from flask import current_app
+    from src.sweeper import start_overdue_sweeper
+
+    app = current_app._get_current_object()
+    if not once:
+        start_overdue_sweeper(app)
+    work(app, once=once)
+
+
+def main():
+    from src.main import app, init_database
+    from src.sweeper import start_overdue_sweeper
+
+    if not init_database(app):
+        raise SystemExit(1)
+
+    # The sweeper runs in the worker process, so once per deployment rather
+    # than once per web worker
+    start_overdue_sweeper(app)
+
+    # Finish the current batch, then exit on SIGTERM/SIGINT
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    work(app, stop=stop)
+
+
+if __name__ == "__main__":
+    main()
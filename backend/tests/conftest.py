@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta
+from src.app import create_app
+from src.cache import cache
+from src.config import db
+from src.lib import generate_token, token_cache
+from src.models import User, create_missing_indexes
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The full app on a fresh SQLite database"""
+    app = create_app(f"sqlite:///{tmp_path / 'test.db'}")
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        create_missing_indexes()
+
+    # Module-level caches outlive the app, so start every test empty
+    cache.backend.flushdb()
+    token_cache.clear()
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(app, email):
+    """Create a user and return (id, auth headers)"""
+    with app.app_context():
+        user = User(first_name="Test", last_name=email.split("@")[0], email=email, password="unused",
+                    college="Test College")
+        db.session.add(user)
+        db.session.commit()
+        return user.id, {"Authorization": f"Bearer {generate_token(user.id, email)}"}
+
+
+def make_org(client, headers, name="Test Club"):
+    """Create an organization through the API and return its id"""
+    response = client.post("/api/org/create", headers=headers, json={
+        "name": name, "college": "Test College", "contactEmail": "club@example.com", "contactPhone": "0000000000",
+    })
+    # The route jsonifies a (body, status) tuple, so the body arrives as [body, 201]
+    body, status = response.json
+    assert status == 201, body
+    return body["data"]["id"]
+
+
+@pytest.fixture
+def owner(app):
+    return make_user(app, "owner@example.com")
+
+
+@pytest.fixture
+def org_id(client, owner):
+    return make_org(client, owner[1])
+
+
+@pytest.fixture
+def team_id(client, owner, org_id):
+    response = client.post("/api/team/create", headers=owner[1],
+                           json={"orgId": org_id, "name": "Team", "description": "Test team"})
+    assert response.status_code == 201, response.json
+    return response.json["data"]["id"]
+
+
+def create_event(client, headers, org_id, title="Launch"):
+    start = datetime.utcnow() + timedelta(days=30)
+    response = client.post("/api/event/create", headers=headers, json={
+        "orgId": org_id, "title": title, "location": "Hall", "eventType": "talk",
+        "startDate": start.isoformat(), "endDate": (start + timedelta(hours=2)).isoformat(), "isPublic": True,
+    })
+    assert response.status_code == 201, response.json
+    return response.json["data"]["id"]
+
+
+@pytest.fixture
+def event_id(client, owner, org_id):
+    return create_event(client, owner[1], org_id)
+
+
+def create_task(client, headers, org_id, team_id, **fields):
+    response = client.post("/api/task/create", headers=headers, json={
+        "orgId": org_id, "teamId": team_id, "title": "Task",
+        "dueDate": (datetime.utcnow() + timedelta(days=3)).isoformat(), **fields,
+    })
+    assert response.status_code == 201, response.json
+    return response.json["task"]["id"]
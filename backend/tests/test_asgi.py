@@ -0,0 +1,97 @@
+import jwt
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+import src.metrics as metrics
+from src.config import SECRET_KEY
+from tests.conftest import make_user, create_event, create_task
+
+pytest.importorskip("aiosqlite")
+from src.asgi import create_asgi_app  # noqa: E402
+
+
+@pytest.fixture
+def asgi(app):
+    """The ASGI app on the test database, driven on one event loop"""
+    loop = asyncio.new_event_loop()
+    application = create_asgi_app(app, app.config["SQLALCHEMY_DATABASE_URI"])
+
+    def get(path, headers=None):
+        scope = {
+            "type": "http", "method": "GET", "path": path, "query_string": b"", "client": ("127.0.0.1", 50000),
+            "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        loop.run_until_complete(application(scope, receive, send))
+        start, body = messages
+        return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body["body"]
+
+    yield get
+
+    async def shutdown():
+        async def receive():
+            return {"type": "lifespan.shutdown"}
+
+        async def send(message):
+            pass
+
+        await application({"type": "lifespan"}, receive, send)
+
+    loop.run_until_complete(shutdown())
+    loop.close()
+
+
+def test_details_match_the_flask_route(app, client, asgi, owner, org_id, team_id):
+    create_event(client, owner[1], org_id)
+    create_task(client, owner[1], org_id, team_id)
+    client.post("/api/budget/create", headers=owner[1], json={"orgId": org_id, "name": "Food", "totalAmount": 50})
+    outsider = make_user(app, "outsider@example.com")
+    token = jwt.encode({"id": owner[0], "exp": datetime.utcnow() - timedelta(minutes=1)}, SECRET_KEY, algorithm="HS256")
+    expired = {"Authorization": f"Bearer {token}"}
+
+    cases = [
+        (f"/api/org/details/{org_id}", owner[1]),
+        (f"/api/org/details/{org_id}", outsider[1]),
+        ("/api/org/details/999", owner[1]),
+        (f"/api/org/details/{org_id}", {"Authorization": "Bearer not-a-token"}),
+        (f"/api/org/details/{org_id}", expired),
+        (f"/api/org/details/{org_id}", {}),
+    ]
+    statuses = []
+    for path, headers in cases:
+        flask_response = client.get(path, headers=headers)
+        status, response_headers, body = asgi(path, headers)
+        assert (status, body) == (flask_response.status_code, flask_response.get_data())
+        assert response_headers.get("etag") == flask_response.headers.get("ETag")
+        statuses.append(status)
+    assert statuses == [200, 403, 404, 401, 401, 401]
+
+
+def test_details_answer_conditional_requests(client, asgi, owner, org_id):
+    status, headers, _ = asgi(f"/api/org/details/{org_id}", owner[1])
+    assert status == 200
+
+    status, _, body = asgi(f"/api/org/details/{org_id}", {**owner[1], "If-None-Match": headers["etag"]})
+    assert (status, body) == (304, b"")
+
+    client.patch(f"/api/org/update/{org_id}", headers=owner[1], json={"description": "Changed"})
+    status, _, _ = asgi(f"/api/org/details/{org_id}", {**owner[1], "If-None-Match": headers["etag"]})
+    assert status == 200
+
+
+def test_details_go_through_the_flask_hooks(asgi, owner, org_id):
+    metrics._stats.clear()
+    _, headers, _ = asgi(f"/api/org/details/{org_id}", {**owner[1], "Origin": "http://localhost:3000"})
+
+    # Flask-CORS reflects the origin, where the handler used to send a fixed "*"
+    assert headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert "server-timing" in headers
+    stats = metrics._stats[("org.get_org_full_details", "GET")]
+    assert stats.count == 1 and stats.queries > 0
@@ -0,0 +1,48 @@
+import jwt
+import json
+import base64
+from src.lib import count_queries
+from tests.conftest import make_user
+
+
+def _forge(token, **claims):
+    """`token` with its payload replaced and the original signature kept"""
+    header, payload, signature = token.split(".")
+    data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    data.update(claims)
+    forged = base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{header}.{forged}.{signature}"
+
+
+def _reads_users(statements):
+    return [statement for statement in statements if 'FROM "user"' in statement or "FROM user" in statement]
+
+
+def test_cached_token_is_reused(client, owner):
+    _, headers = owner
+    with count_queries() as first:
+        assert client.get("/api/user/owned-org", headers=headers).status_code == 200
+    assert _reads_users(first.statements)
+
+    with count_queries() as second:
+        assert client.get("/api/user/owned-org", headers=headers).status_code == 200
+    assert _reads_users(second.statements) == []
+
+
+def test_reused_signature_is_not_trusted(app, client, owner):
+    _, headers = owner
+    other_id, _ = make_user(app, "other@example.com")
+
+    # Warm the cache with the genuine token first
+    assert client.get("/api/user/owned-org", headers=headers).status_code == 200
+
+    token = headers["Authorization"].split(" ")[1]
+    forged = _forge(token, id=other_id, email="other@example.com")
+    response = client.get("/api/user/owned-org", headers={"Authorization": f"Bearer {forged}"})
+    assert response.status_code == 401
+
+
+def test_invalid_token_is_rejected(client):
+    token = jwt.encode({"id": 1, "email": "x@example.com"}, "not-the-secret", algorithm="HS256")
+    response = client.get("/api/user/owned-org", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
@@ -0,0 +1,65 @@
+from src.config import db
+from src.models import Budget
+
+
+def create_budget(client, headers, org_id, total, spent=0):
+    response = client.post("/api/budget/create", headers=headers, json={
+        "orgId": org_id, "name": "Supplies", "totalAmount": total, "spentAmount": spent,
+    })
+    assert response.status_code == 201, response.json
+    return response.json["data"]
+
+
+def add_expense(client, headers, budget_id, amount):
+    return client.post(f"/api/budget/add-expense/{budget_id}", headers=headers, json={"amount": amount})
+
+
+def test_amounts_add_up_in_exact_cents(client, owner, org_id):
+    budget = create_budget(client, owner[1], org_id, "0.30")
+    for _ in range(3):
+        assert add_expense(client, owner[1], budget["id"], "0.1").status_code == 200
+
+    data = client.get(f"/api/budget/get/{budget['id']}", headers=owner[1]).json["data"]
+    assert (data["spentAmount"], data["remainingAmount"]) == (0.3, 0)
+    assert add_expense(client, owner[1], budget["id"], "0.01").status_code == 400
+
+
+def test_null_spent_amount_counts_as_zero(app, client, owner, org_id):
+    budget = create_budget(client, owner[1], org_id, 100)
+    with app.app_context():
+        db.session.execute(db.update(Budget).values(spent_amount=None))
+        db.session.commit()
+
+    response = add_expense(client, owner[1], budget["id"], 40)
+    assert response.status_code == 200, response.json
+    assert response.json["data"]["spentAmount"] == 40
+
+
+def test_rejection_reports_the_stored_spent_amount(app, client, owner, org_id):
+    budget = create_budget(client, owner[1], org_id, 100, spent=10)
+    # Spent elsewhere after the route loaded the budget
+    with app.app_context():
+        db.session.execute(db.update(Budget).values(spent_amount=95))
+        db.session.commit()
+
+    response = add_expense(client, owner[1], budget["id"], 10)
+    assert response.status_code == 400
+    assert "Current spent: 95.0, Total budget: 100.0" in response.json["message"]
+
+
+def test_update_keeps_spent_amount_to_the_ledger(client, owner, org_id):
+    budget = create_budget(client, owner[1], org_id, 100)
+    add_expense(client, owner[1], budget["id"], 60)
+    url = f"/api/budget/update/{budget['id']}"
+
+    response = client.patch(url, headers=owner[1], json={"spentAmount": 0})
+    assert response.status_code == 400
+
+    response = client.patch(url, headers=owner[1], json={"totalAmount": 50})
+    assert response.status_code == 400
+    assert "Current spent: 60.0" in response.json["message"]
+
+    response = client.patch(url, headers=owner[1], json={"totalAmount": 60, "name": "Trimmed"})
+    assert response.status_code == 200, response.json
+    assert (response.json["data"]["totalAmount"], response.json["data"]["name"]) == (60, "Trimmed")
+    assert response.json["data"]["spentAmount"] == 60
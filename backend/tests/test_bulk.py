@@ -0,0 +1,32 @@
+def statuses(response):
+    return [result["status"] for result in response.json["results"]]
+
+
+def test_bulk_status_update_rejects_malformed_task_ids(client, owner, org_id, team_id):
+    response = client.patch("/api/task/bulk-update-status", headers=owner[1], json={"updates": [
+        {"taskId": [1], "status": "completed"},
+        {"taskId": "5", "status": "completed"},
+        {"taskId": True, "status": "completed"},
+        {"taskId": 999, "status": "completed"},
+    ]})
+    assert statuses(response) == [400, 400, 400, 404]
+
+
+def test_bulk_create_rejects_malformed_team_ids(client, owner, org_id, team_id):
+    task = {"orgId": org_id, "title": "Posters", "dueDate": "2030-01-01T10:00:00"}
+    response = client.post("/api/task/bulk-create", headers=owner[1], json={"tasks": [
+        {**task, "teamId": [team_id]},
+        {**task, "teamId": str(team_id)},
+        {**task, "teamId": team_id},
+    ]})
+    assert response.status_code == 201, response.json
+    assert statuses(response) == [400, 400, 201]
+
+
+def test_bulk_expenses_reject_malformed_budget_ids(client, owner, org_id):
+    response = client.post("/api/budget/bulk-add-expenses", headers=owner[1], json={"expenses": [
+        {"budgetId": {"id": 1}, "amount": 5},
+        {"budgetId": "1", "amount": 5},
+    ]})
+    assert response.status_code == 400
+    assert statuses(response) == [400, 400]
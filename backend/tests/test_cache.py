@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from src.config import db
+from src.models import OrganizationMember, OrgRole
+from src.sweeper import sweep_overdue_tasks
+from tests.conftest import make_user, create_event, create_task
+
+
+def get(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+# Hits and misses
+
+@pytest.mark.parametrize("url", [
+    "/api/org/get-all",
+    "/api/event/get/{event_id}",
+    "/api/event/upcoming/{org_id}",
+    "/api/team/get/{team_id}",
+])
+def test_hit_returns_the_miss_body(client, owner, org_id, team_id, event_id, url):
+    create_task(client, owner[1], org_id, team_id)
+    url = url.format(org_id=org_id, team_id=team_id, event_id=event_id)
+
+    miss = get(client, url, owner[1])
+    hit = get(client, url, owner[1])
+    assert hit == miss
+
+
+def test_event_dates_keep_their_format(client, owner, event_id):
+    miss = get(client, f"/api/event/get/{event_id}", owner[1])["data"]
+    hit = get(client, f"/api/event/get/{event_id}", owner[1])["data"]
+    assert hit["startDate"] == miss["startDate"]
+    assert hit["createdAt"] == miss["createdAt"]
+
+
+# Invalidation after writes
+
+def test_org_list_after_org_update(client, owner, org_id):
+    get(client, "/api/org/get-all")
+    client.patch(f"/api/org/update/{org_id}", headers=owner[1], json={"name": "Renamed"})
+    assert [org["name"] for org in get(client, "/api/org/get-all")["data"]] == ["Renamed"]
+
+
+def test_event_after_event_update(client, owner, event_id):
+    get(client, f"/api/event/get/{event_id}", owner[1])
+    client.patch(f"/api/event/update/{event_id}", headers=owner[1], json={"title": "Relaunch"})
+    assert get(client, f"/api/event/get/{event_id}", owner[1])["data"]["title"] == "Relaunch"
+
+
+def test_upcoming_after_event_changes(client, owner, org_id, event_id):
+    url = f"/api/event/upcoming/{org_id}"
+    assert [e["id"] for e in get(client, url)["data"]] == [event_id]
+
+    client.patch(f"/api/event/update/{event_id}", headers=owner[1], json={"title": "Relaunch"})
+    assert [e["title"] for e in get(client, url)["data"]] == ["Relaunch"]
+
+    second = create_event(client, owner[1], org_id, title="Second")
+    assert {e["id"] for e in get(client, url)["data"]} == {event_id, second}
+
+    client.delete(f"/api/event/delete/{event_id}", headers=owner[1])
+    assert [e["id"] for e in get(client, url)["data"]] == [second]
+
+
+def test_team_after_team_update(client, owner, team_id):
+    get(client, f"/api/team/get/{team_id}", owner[1])
+    client.patch(f"/api/team/update/{team_id}", headers=owner[1], json={"name": "Renamed"})
+    assert get(client, f"/api/team/get/{team_id}", owner[1])["data"]["name"] == "Renamed"
+
+
+def test_team_after_member_added(app, client, owner, org_id, team_id):
+    member_id, _ = make_user(app, "member@example.com")
+    with app.app_context():
+        db.session.add(OrganizationMember(user_id=member_id, org_id=org_id, role=OrgRole.MEMBER))
+        db.session.commit()
+
+    get(client, f"/api/team/get/{team_id}", owner[1])
+    response = client.post(f"/api/team/add-member/{team_id}", headers=owner[1], json={"memberId": member_id})
+    assert response.status_code == 200, response.json
+    members = get(client, f"/api/team/get/{team_id}", owner[1])["data"]["members"]
+    assert member_id in [member["id"] for member in members]
+
+
+def test_team_after_task_changes(client, owner, org_id, team_id):
+    url = f"/api/team/get/{team_id}"
+    get(client, url, owner[1])
+
+    task_id = create_task(client, owner[1], org_id, team_id)
+    assert [task["id"] for task in get(client, url, owner[1])["data"]["tasks"]] == [task_id]
+
+    # Assignment goes through a bulk INSERT that skips the flush listeners
+    response = client.post("/api/task/assign", headers=owner[1], json={"taskId": task_id, "userIds": [owner[0]]})
+    assert response.status_code == 200, response.json
+    task = get(client, url, owner[1])["data"]["tasks"][0]
+    assert [assignee["id"] for assignee in task["assignees"]] == [owner[0]]
+
+
+def test_team_after_overdue_sweep(app, client, owner, org_id, team_id):
+    create_task(client, owner[1], org_id, team_id, dueDate=(datetime.utcnow() - timedelta(days=1)).isoformat())
+    assert get(client, f"/api/team/get/{team_id}", owner[1])["data"]["tasks"][0]["status"] == "pending"
+
+    # The sweeper updates tasks with Core statements and invalidates by hand
+    with app.app_context():
+        assert sweep_overdue_tasks() == 1
+    assert get(client, f"/api/team/get/{team_id}", owner[1])["data"]["tasks"][0]["status"] == "overdue"
@@ -0,0 +1,42 @@
+from tests.conftest import create_event, create_task
+
+
+def revalidate(client, url, headers, etag):
+    return client.get(url, headers={**(headers or {}), "If-None-Match": etag})
+
+
+def test_cached_etag_matches_body(client, owner, team_id):
+    url = f"/api/team/get/{team_id}"
+    miss = client.get(url, headers=owner[1])
+    hit = client.get(url, headers=owner[1])
+    assert miss.headers["ETag"] == hit.headers["ETag"]
+    assert revalidate(client, url, owner[1], miss.headers["ETag"]).status_code == 304
+
+    client.patch(f"/api/team/update/{team_id}", headers=owner[1], json={"name": "Renamed"})
+    changed = revalidate(client, url, owner[1], miss.headers["ETag"])
+    assert changed.status_code == 200
+    assert changed.json["data"]["name"] == "Renamed"
+    assert changed.headers["ETag"] != miss.headers["ETag"]
+
+
+def test_upcoming_etag_follows_events(client, owner, org_id):
+    url = f"/api/event/upcoming/{org_id}"
+    etag = client.get(url).headers["ETag"]
+    assert revalidate(client, url, None, etag).status_code == 304
+
+    create_event(client, owner[1], org_id)
+    response = revalidate(client, url, None, etag)
+    assert response.status_code == 200
+    assert len(response.json["data"]) == 1
+
+
+def test_statistics_etag_follows_counters(client, owner, org_id, team_id):
+    url = f"/api/org/statistics/{org_id}"
+    first = client.get(url, headers=owner[1])
+    assert first.status_code == 200
+    assert revalidate(client, url, owner[1], first.headers["ETag"]).status_code == 304
+
+    create_task(client, owner[1], org_id, team_id)
+    response = revalidate(client, url, owner[1], first.headers["ETag"])
+    assert response.status_code == 200
+    assert response.json["data"]["totalTasks"] == 1
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from src.event import MAX_EVENT_DURATION
+
+
+def post_event(client, owner, org_id, title, start, length):
+    return client.post("/api/event/create", headers=owner[1], json={
+        "orgId": org_id, "title": title, "location": "Hall", "eventType": "talk",
+        "startDate": start.isoformat(), "endDate": (start + length).isoformat(),
+    })
+
+
+def test_range_finds_events_overlapping_the_window(client, owner, org_id):
+    window = datetime(2030, 6, 1)
+    for title, start, length in [
+        ("Festival", window - MAX_EVENT_DURATION + timedelta(days=1), MAX_EVENT_DURATION),
+        ("Inside", window + timedelta(days=2), timedelta(hours=2)),
+        ("Over before", window - timedelta(days=3), timedelta(days=1)),
+        ("Later", window + timedelta(days=30), timedelta(hours=2)),
+    ]:
+        assert post_event(client, owner, org_id, title, start, length).status_code == 201
+
+    response = client.get("/api/event/range", headers=owner[1], query_string={
+        "from": window.isoformat(), "to": (window + timedelta(days=7)).isoformat(), "orgId": org_id})
+    assert response.status_code == 200, response.json
+    assert [event["title"] for event in response.json["data"]] == ["Festival", "Inside"]
+
+
+def test_events_cannot_outlast_the_range_bound(client, owner, org_id):
+    start = datetime(2030, 6, 1)
+    response = post_event(client, owner, org_id, "Marathon", start, MAX_EVENT_DURATION + timedelta(hours=1))
+    assert response.status_code == 400
+
+    event_id = post_event(client, owner, org_id, "Short", start, timedelta(hours=1)).json["data"]["id"]
+    response = client.patch(f"/api/event/update/{event_id}", headers=owner[1],
+                            json={"endDate": (start + MAX_EVENT_DURATION * 2).isoformat()})
+    assert response.status_code == 400
+
+
+def test_cached_event_follows_creator_changes(client, owner, org_id, event_id):
+    url = f"/api/event/get/{event_id}"
+    assert client.get(url, headers=owner[1]).json["data"]["creator"]["firstName"] != "Renamed"
+
+    assert client.patch(f"/api/user/update/{owner[0]}", json={"firstName": "Renamed"}).status_code == 200
+    assert client.get(url, headers=owner[1]).json["data"]["creator"]["firstName"] == "Renamed"
+
+
+def test_listing_pages_newest_first(client, owner, org_id):
+    start = datetime(2030, 6, 1)
+    for title in ("First", "Second", "Third"):
+        assert post_event(client, owner, org_id, title, start, timedelta(hours=2)).status_code == 201
+
+    url = f"/api/event/get-all/{org_id}"
+    page = client.get(url, headers=owner[1], query_string={"order": "desc", "limit": 2}).json
+    assert [event["title"] for event in page["data"]] == ["Third", "Second"]
+    rest = client.get(url, headers=owner[1],
+                      query_string={"order": "desc", "limit": 2, "after": page["nextCursor"]}).json
+    assert ([event["title"] for event in rest["data"]], rest["nextCursor"]) == (["First"], None)
+
+    assert client.get(url, headers=owner[1], query_string={"order": "sideways"}).status_code == 400
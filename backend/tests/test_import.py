@@ -0,0 +1,75 @@
+import json
+from src.config import db
+from src.importer import import_rows
+from src.models import OrgRole, OrgStats, User
+from src.stats import compute_org_stats
+from src.worker import delete_org_job, enqueue
+from tests.conftest import make_user
+
+
+def import_csv(client, headers, org_id, kind, text):
+    response = client.post(f"/api/org/{org_id}/import/{kind}?format=csv", headers=headers, data=text,
+                           content_type="text/csv")
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def test_import_adds_to_the_stored_statistics(app, client, owner, org_id, team_id):
+    for name in ("ada", "bob"):
+        make_user(app, f"{name}@example.com")
+    import_csv(client, owner[1], org_id, "members",
+               "email,role\nada@example.com,coleader\nbob@example.com,member\nnobody@example.com,member\n")
+    import_csv(client, owner[1], org_id, "events",
+               "title,location,eventType,startDate,endDate,status\n"
+               "Fest,Hall,social,2030-01-01T10:00:00,2030-01-01T12:00:00,planned\n")
+    import_csv(client, owner[1], org_id, "tasks",
+               f"teamId,title,dueDate,status\n{team_id},Posters,2030-01-01T10:00:00,pending\n")
+
+    with app.app_context():
+        stored = db.session.get(OrgStats, org_id).to_json()
+        assert stored == compute_org_stats(org_id)
+        assert stored["membersByRole"]["coleader"] == 1
+        assert stored["totalEvents"] == stored["totalTasks"] == 1
+
+
+def test_imported_members_are_seen_in_the_same_request(app, owner, org_id):
+    member_id = make_user(app, "ada@example.com")[0]
+    with app.test_request_context():
+        member = db.session.get(User, member_id)
+        assert member.get_org_role(org_id) is None
+
+        import_rows("members", org_id, db.session.get(User, owner[0]),
+                    [(2, {"email": "ada@example.com", "role": "member"})])
+        assert member.get_org_role(org_id) == OrgRole.MEMBER
+
+
+def test_org_deletion_drops_cached_memberships(app, owner, org_id):
+    with app.app_context():
+        user = db.session.get(User, owner[0])
+        assert user.get_org_role(org_id) == OrgRole.LEADER
+
+        job = enqueue("delete-org", {"orgId": org_id}, user.id, org_id)
+        db.session.commit()
+        delete_org_job(job)
+        assert user.get_org_role(org_id) is None
+
+
+def test_mistyped_ndjson_values_are_row_errors(client, owner, org_id, team_id):
+    event = {"location": "Hall", "eventType": "social",
+             "startDate": "2030-01-01T10:00:00", "endDate": "2030-01-01T12:00:00"}
+    rows = [
+        {**event, "title": "Huge", "capacity": 1e30},
+        {**event, "title": {"a": 1}},
+        {**event, "title": "Fee", "entryFee": float("inf")},
+        {**event, "title": "Fest", "capacity": 50},
+    ]
+    response = client.post(f"/api/org/{org_id}/import/events?format=ndjson", headers=owner[1],
+                           data="\n".join(json.dumps(row) for row in rows), content_type="application/x-ndjson")
+    assert response.status_code == 200, response.json
+    assert response.json["imported"] == 1
+    assert [error["line"] for error in response.json["errors"]] == [1, 2, 3]
+
+    response = client.post(f"/api/org/{org_id}/import/members?format=ndjson", headers=owner[1],
+                           data=json.dumps({"email": ["ada@example.com"]}), content_type="application/x-ndjson")
+    assert response.status_code == 200, response.json
+    assert response.json["errors"] == [{"line": 1, "message": "email must be text"}]
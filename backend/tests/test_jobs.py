@@ -0,0 +1,76 @@
+import src.org
+from src.config import db
+from src.models import Job, JobStatus, Organization
+from src.worker import work
+from tests.conftest import make_user, create_event
+
+
+def delete(client, owner, org_id):
+    response = client.delete(f"/api/org/delete/{org_id}", headers=owner[1])
+    assert response.status_code == 202, response.json
+    return response.json["job"]
+
+
+def test_queued_delete_hides_the_org(client, owner, org_id, team_id):
+    create_event(client, owner[1], org_id)
+    code = client.get(f"/api/org/get/{org_id}", headers=owner[1]).json["data"]["code"]
+    # Warm the cached listings first, so hiding has to invalidate them
+    assert len(client.get("/api/org/get-all").json["data"]) == 1
+    assert len(client.get(f"/api/event/upcoming/{org_id}").json["data"]) == 1
+
+    delete(client, owner, org_id)
+
+    assert client.get("/api/org/get-all").json["data"] == []
+    assert client.get(f"/api/org/get/{org_id}", headers=owner[1]).status_code == 404
+    assert client.get(f"/api/event/upcoming/{org_id}").status_code == 404
+    assert client.get("/api/team/get-all").json["data"] == []
+    assert client.get("/api/user/owned-org", headers=owner[1]).json["data"] == []
+
+    # Members lose access, so nothing new is written to it
+    assert client.get(f"/api/team/get/{team_id}", headers=owner[1]).status_code == 403
+    response = client.patch(f"/api/org/update/{org_id}", headers=owner[1], json={"name": "Renamed"})
+    assert response.status_code == 404
+    response = client.post("/api/team/create", headers=owner[1], json={"orgId": org_id, "name": "Late"})
+    assert response.status_code == 400
+
+    joiner = make_user(client.application, "joiner@example.com")
+    assert client.post("/api/org/join", headers=joiner[1], json={"code": code}).status_code == 404
+
+
+def test_repeated_delete_returns_the_same_job(client, owner, org_id):
+    assert delete(client, owner, org_id)["id"] == delete(client, owner, org_id)["id"]
+
+
+def test_worker_deletes_the_org(app, client, owner, org_id, team_id):
+    create_event(client, owner[1], org_id)
+    job = delete(client, owner, org_id)
+
+    assert work(app, once=True) == 1
+
+    response = client.get(f"/api/job/get/{job['id']}", headers=owner[1])
+    assert response.json["data"]["status"] == "succeeded"
+    assert response.json["data"]["result"]["deleted"] is True
+    with app.app_context():
+        assert db.session.get(Organization, org_id) is None
+
+
+def test_failed_delete_keeps_the_org_hidden(app, client, owner, org_id):
+    job = delete(client, owner, org_id)
+    with app.app_context():
+        db.session.get(Job, job["id"]).status = JobStatus.FAILED
+        db.session.commit()
+
+    assert client.get("/api/org/get-all").json["data"] == []
+
+
+def test_async_import_is_capped(client, owner, org_id, monkeypatch):
+    monkeypatch.setattr(src.org, "JOB_MAX_UPLOAD_BYTES", 64)
+    url = f"/api/org/{org_id}/import/members?async=true&format=csv"
+
+    small = "email,role\nowner@example.com,member\n"
+    response = client.post(url, headers=owner[1], data=small, content_type="text/csv")
+    assert response.status_code == 202, response.json
+
+    large = "email,role\n" + "".join(f"user{i}@example.com,member\n" for i in range(10))
+    response = client.post(url, headers=owner[1], data=large, content_type="text/csv")
+    assert response.status_code == 413
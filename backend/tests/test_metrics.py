@@ -0,0 +1,78 @@
+import os
+import json
+import subprocess
+import pytest
+import src.metrics as metrics
+from src.sweeper import sweep_metrics
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    # Counters are per process, so earlier tests' requests are still in them
+    metrics._stats.clear()
+    metrics.set_snapshot_dir(str(tmp_path))
+    yield tmp_path
+    metrics.set_snapshot_dir(None)
+
+
+def sample(name, text):
+    """Value of the first sample of metric `name` in the exposition `text`"""
+    for line in text.splitlines():
+        if line.startswith(name) and not line.startswith("#"):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def other_process(snapshot_dir, pid, requests, checkouts):
+    data = {
+        "endpoints": [["org.get_all_orgs", "GET", {"200": requests}, [requests] * len(metrics.BUCKETS),
+                       requests, 0.5, 2 * requests, 0.1, 0.05]],
+        "pool": {"checkouts": checkouts, "wait_ms_total": 10.0, "wait_ms_max": 7.0, "slow_checkouts": 0},
+        "sweep": {"runs": 1, "tasks_marked_overdue": 3},
+    }
+    (snapshot_dir / f"{pid}-1.json").write_text(json.dumps(data))
+
+
+def exited_pid():
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+def test_metrics_add_up_every_process(client, snapshot_dir):
+    other_process(snapshot_dir, os.getppid(), requests=5, checkouts=4)
+    client.get("/api/org/get-all")
+
+    text = client.get("/metrics").get_data(as_text=True)
+    requests = 'eventora_http_requests_total{endpoint="org.get_all_orgs",method="GET",status="200"}'
+    assert sample(requests, text) == 6
+    assert sample("eventora_overdue_sweeps_total", text) == 1 + sweep_metrics["runs"]
+    assert sample("eventora_db_pool_wait_seconds_max", text) >= 0.007
+
+
+def test_exited_processes_are_folded_without_losing_counts(client, snapshot_dir):
+    pid = exited_pid()
+    other_process(snapshot_dir, pid, requests=5, checkouts=4)
+    requests = 'eventora_http_requests_total{endpoint="org.get_all_orgs",method="GET",status="200"}'
+
+    assert sample(requests, client.get("/metrics").get_data(as_text=True)) == 5
+    assert not (snapshot_dir / f"{pid}-1.json").exists()
+    assert (snapshot_dir / "retired.json").exists()
+
+    # Folded counts are reported once, and later scrapes never go backwards
+    client.get("/api/org/get-all")
+    assert sample(requests, client.get("/metrics").get_data(as_text=True)) == 6
+
+
+def test_metrics_refuse_remote_clients_without_a_token(client):
+    response = client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"})
+    assert response.status_code == 403
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_require_the_token_when_set(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "secret")
+    remote = {"REMOTE_ADDR": "203.0.113.7"}
+    assert client.get("/metrics", environ_base=remote).status_code == 401
+    assert client.get("/metrics", environ_base=remote, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", environ_base=remote, headers={"Authorization": "Bearer secret"}).status_code == 200
@@ -0,0 +1,100 @@
+from src.config import db
+from src.lib import count_queries
+from src.models import OrganizationMember, OrgRole, TeamMember
+from tests.conftest import make_user, create_event, create_task
+
+
+def seed(app, client, owner, org_id, teams=3, members=4):
+    """Members, teams with assigned tasks, events and budgets, so N+1 queries would show"""
+    member_ids = [make_user(app, f"member{i}@example.com")[0] for i in range(members)]
+    with app.app_context():
+        db.session.add_all(OrganizationMember(user_id=user_id, org_id=org_id, role=OrgRole.MEMBER)
+                           for user_id in member_ids)
+        db.session.commit()
+
+    for i in range(teams):
+        response = client.post("/api/team/create", headers=owner[1], json={"orgId": org_id, "name": f"Team {i}"})
+        team_id = response.json["data"]["id"]
+        for _ in range(2):
+            task_id = create_task(client, owner[1], org_id, team_id)
+            client.post("/api/task/assign", headers=owner[1], json={"taskId": task_id, "userIds": member_ids[:2]})
+        create_event(client, owner[1], org_id, title=f"Event {i}")
+        response = client.post("/api/budget/create", headers=owner[1],
+                               json={"orgId": org_id, "name": f"Budget {i}", "totalAmount": 100})
+        assert response.status_code == 201, response.json
+
+
+def details_queries(client, owner, org_id):
+    with count_queries() as counter:
+        response = client.get(f"/api/org/details/{org_id}", headers=owner[1])
+    assert response.status_code == 200, response.json
+    return counter.count, response.json
+
+
+def test_details_stays_within_its_query_budget(app, client, owner, org_id):
+    seed(app, client, owner, org_id)
+    budget = app.view_functions["org.get_org_full_details"].query_budget
+
+    count, details = details_queries(client, owner, org_id)
+    assert len(details["teams"]) == 3 and len(details["members"]) == 5
+    assert count <= budget
+
+
+def test_details_queries_do_not_grow_with_rows(app, client, owner, org_id):
+    seed(app, client, owner, org_id, teams=1, members=1)
+    small, _ = details_queries(client, owner, org_id)
+
+    for i in range(4):
+        response = client.post("/api/team/create", headers=owner[1], json={"orgId": org_id, "name": f"More {i}"})
+        create_task(client, owner[1], org_id, response.json["data"]["id"])
+    large, details = details_queries(client, owner, org_id)
+    assert len(details["teams"]) == 5
+    assert large == small
+
+
+def team_queries(app, client, owner, org_id, name, members):
+    response = client.post("/api/team/create", headers=owner[1], json={"orgId": org_id, "name": name})
+    team_id = response.json["data"]["id"]
+    member_ids = [make_user(app, f"{name}{i}@example.com")[0] for i in range(members)]
+    with app.app_context():
+        db.session.add_all(TeamMember(team_id=team_id, user_id=user_id, role=OrgRole.MEMBER)
+                           for user_id in member_ids)
+        db.session.commit()
+
+    with count_queries() as counter:
+        response = client.get(f"/api/team/get/{team_id}", headers=owner[1])
+    assert response.status_code == 200, response.json
+    assert len(response.json["data"]["members"]) == members + 1
+    return counter.count
+
+
+def test_team_queries_do_not_grow_with_members(app, client, owner, org_id):
+    small = team_queries(app, client, owner, org_id, "small", 1)
+    assert team_queries(app, client, owner, org_id, "large", 8) == small
+
+
+def listing_queries(client, owner, urls):
+    counts = []
+    for url in urls:
+        with count_queries() as counter:
+            response = client.get(url, headers=owner[1])
+        assert response.status_code == 200, response.json
+        counts.append(counter.count)
+    return counts
+
+
+def test_member_listings_do_not_grow_with_members(app, client, owner, org_id):
+    team_id = client.post("/api/team/create", headers=owner[1],
+                          json={"orgId": org_id, "name": "Crew"}).json["data"]["id"]
+    urls = ["/api/user/lead-team", "/api/user/member-team", f"/api/org/members/{org_id}",
+            f"/api/team/members/{team_id}"]
+    small = listing_queries(client, owner, urls)
+
+    member_ids = [make_user(app, f"crew{i}@example.com")[0] for i in range(6)]
+    with app.app_context():
+        db.session.add_all(OrganizationMember(user_id=user_id, org_id=org_id, role=OrgRole.MEMBER)
+                           for user_id in member_ids)
+        db.session.add_all(TeamMember(team_id=team_id, user_id=user_id, role=OrgRole.MEMBER)
+                           for user_id in member_ids)
+        db.session.commit()
+    assert listing_queries(client, owner, urls) == small
@@ -0,0 +1,93 @@
+import pytest
+from src.app import create_app
+from src.cache import cache
+from src.config import db
+from src.models import User
+from src.routing import REPLICA_BIND
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    """An app whose primary and replica are separate SQLite files holding different rows"""
+    app = create_app(f"sqlite:///{tmp_path / 'primary.db'}", f"sqlite:///{tmp_path / 'replica.db'}")
+    app.config["TESTING"] = True
+    with app.app_context():
+        for name, engine in (("primary", db.engine), ("replica", db.engines[REPLICA_BIND])):
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(db.insert(User).values(
+                    first_name=name, last_name="Copy", email=f"{name}@example.com", password="x"))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app registered an (empty) metadata for the bind on the shared db;
+    # apps built later without the bind would fail to create it
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def first_names():
+    return db.session.scalars(db.select(User.first_name).order_by(User.id)).all()
+
+
+def add_user(email):
+    db.session.add(User(first_name="new", last_name="User", email=email, password="x"))
+
+
+def test_get_reads_from_the_replica(routed_app):
+    with routed_app.test_request_context("/", method="GET"):
+        assert first_names() == ["replica"]
+
+
+def test_other_methods_use_the_primary(routed_app):
+    for method in ("POST", "PATCH", "DELETE"):
+        with routed_app.test_request_context("/", method=method):
+            assert first_names() == ["primary"]
+            db.session.remove()
+
+
+def test_no_request_uses_the_primary(routed_app):
+    with routed_app.app_context():
+        assert first_names() == ["primary"]
+
+
+def test_get_reads_its_own_writes_after_commit(routed_app):
+    with routed_app.test_request_context("/", method="GET"):
+        assert first_names() == ["replica"]
+        add_user("new@example.com")
+        db.session.commit()
+        # The replica has not caught up, so reading it would lose the write
+        assert first_names() == ["primary", "new"]
+
+
+def test_core_write_sticks_to_the_primary(routed_app):
+    with routed_app.test_request_context("/", method="GET"):
+        db.session.execute(db.update(User).values(last_name="Updated"))
+        db.session.commit()
+        assert db.session.scalars(db.select(User.last_name)).all() == ["Updated"]
+        assert first_names() == ["primary"]
+
+
+def test_next_request_reads_from_the_replica_again(routed_app):
+    with routed_app.test_request_context("/", method="GET"):
+        add_user("new@example.com")
+        db.session.commit()
+        db.session.remove()
+
+    with routed_app.test_request_context("/", method="GET"):
+        assert first_names() == ["replica"]
+
+
+def test_cache_misses_are_filled_from_the_primary(routed_app):
+    cache.backend.flushdb()
+    with routed_app.test_request_context("/", method="GET"):
+        # Loaded from the replica before the miss, e.g. by an access check
+        assert db.session.get(User, 1).first_name == "replica"
+        data, _ = cache.lookup("user:1", ["user:1"], lambda: db.session.get(User, 1).first_name)
+        assert data == "primary"
+
+    # Later requests are served the primary's payload from the cache
+    with routed_app.test_request_context("/", method="GET"):
+        data, _ = cache.lookup("user:1", ["user:1"], lambda: "not computed")
+        assert data == "primary"
@@ -0,0 +1,84 @@
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from src.config import db
+from src.models import Event, Organization
+from src.search import prefix_tsquery
+from tests.conftest import create_event, make_org
+
+
+def search(client, owner, text):
+    response = client.get("/api/event/search", headers=owner[1], query_string={"q": text})
+    assert response.status_code == 200, response.json
+    return [event["title"] for event in response.json["data"]]
+
+
+def test_last_term_matches_as_a_prefix(client, owner, org_id):
+    create_event(client, owner[1], org_id, title="Spring Fest")
+    create_event(client, owner[1], org_id, title="Spring Hackathon")
+
+    assert search(client, owner, "spr") == ["Spring Fest", "Spring Hackathon"]
+    assert search(client, owner, "spring fe") == ["Spring Fest"]
+    # Only the last term is a prefix
+    assert search(client, owner, "spr fest") == []
+
+
+def test_more_occurrences_rank_first(client, owner, org_id):
+    create_event(client, owner[1], org_id, title="Robotics workshop")
+    create_event(client, owner[1], org_id, title="Robotics robotics showcase")
+    assert search(client, owner, "robotics") == ["Robotics robotics showcase", "Robotics workshop"]
+
+
+def test_fallback_sees_writes_from_other_connections(app, client, owner, org_id):
+    event_id = create_event(client, owner[1], org_id, title="Launch")
+    assert search(client, owner, "launch") == ["Launch"]
+
+    # Another process writing the table never runs this process's flush
+    # listeners; the index notices through the table's updated_at
+    other = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+    with other.begin() as connection:
+        connection.execute(db.update(Event).where(Event.id == event_id).values(title="Relaunch"))
+    other.dispose()
+
+    assert search(client, owner, "relaunch") == ["Relaunch"]
+    assert search(client, owner, "launch") == []
+
+
+def test_postgres_query_prefixes_the_last_term():
+    compiled = prefix_tsquery("Spring  FE!").compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    assert str(compiled) == "to_tsquery('simple'::regconfig, 'spring & fe:*')"
+    assert prefix_tsquery(" !? ") is None
+
+
+def test_pages_continue_after_the_last_rank(client, owner, org_id):
+    for title in ("Robotics workshop", "Robotics robotics showcase", "Robotics lab", "Robotics robotics robotics"):
+        create_event(client, owner[1], org_id, title=title)
+
+    titles, after = [], None
+    while True:
+        args = {"q": "robotics", "limit": 1, **({"after": after} if after else {})}
+        response = client.get("/api/event/search", headers=owner[1], query_string=args)
+        assert response.status_code == 200, response.json
+        titles += [event["title"] for event in response.json["data"]]
+        after = response.json["nextCursor"]
+        if not after:
+            break
+    assert titles == ["Robotics robotics robotics", "Robotics robotics showcase", "Robotics workshop", "Robotics lab"]
+
+    response = client.get("/api/event/search", headers=owner[1], query_string={"q": "robotics", "after": "bm9wZQ=="})
+    assert response.status_code == 400
+
+
+def test_exact_code_match_pages_first(app, client, owner):
+    ids = [make_org(client, owner[1], name=name) for name in ("Chess Club", "Chess Society")]
+    with app.app_context():
+        code = db.session.get(Organization, ids[1]).code
+
+    first = client.get("/api/org/search", headers=owner[1], query_string={"q": code, "limit": 1}).json
+    assert [org["id"] for org in first["data"]] == [ids[1]]
+    assert first["nextCursor"] is None
+
+    first = client.get("/api/org/search", headers=owner[1], query_string={"q": "chess", "limit": 1}).json
+    rest = client.get("/api/org/search", headers=owner[1],
+                      query_string={"q": "chess", "limit": 1, "after": first["nextCursor"]}).json
+    assert [org["id"] for org in first["data"] + rest["data"]] == ids
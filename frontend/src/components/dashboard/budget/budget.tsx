@@ -9,6 +9,7 @@ import { BudgetProgress } from "./budget-progress";
 import { BudgetOverviewCards } from "./overview-cards";
 import { CreateBudgetModal } from "./create-budget-modal";
 import { BudgetGrid } from "./budget-grid";
+import { LoadMore } from "../load-more";
 import { useOrgId } from "@/hooks/use-org-id";
 import { useGetBudgetAnalytics, useGetAllBudgets, canManageBudget } from "@/hooks/use-budget";
 import { useOrgMembers } from "@/hooks/use-org";
@@ -22,7 +23,9 @@ export const BudgetComponent = () => {
     const { data: currentUser } = useCurrentUser();
     const { data: orgMembers } = useOrgMembers(Number(orgId));
     const { data: analytics, isLoading: analyticsLoading, error: analyticsError } = useGetBudgetAnalytics(Number(orgId));
-    const { data: budgets, isLoading: budgetsLoading, error: budgetsError } = useGetAllBudgets(Number(orgId));
+    const {
+        data: budgets, isLoading: budgetsLoading, error: budgetsError, hasNextPage, isFetchingNextPage, loadMore
+    } = useGetAllBudgets(Number(orgId));
 
     // Check user permissions
     const currentUserOrgMember = orgMembers?.find((member) => member.id === currentUser?.id);
@@ -179,12 +182,13 @@ export const BudgetComponent = () => {
                     <div>
                         <h2 className="text-2xl font-bold text-gray-900">Budget Categories</h2>
                         <p className="text-gray-600 mt-1">
-                            {budgets.length} {budgets.length === 1 ? 'budget' : 'budgets'} •
+                            {overviewData.totalBudgets} {overviewData.totalBudgets === 1 ? 'budget' : 'budgets'} •
                             ₹{overviewData.totalBudget.toLocaleString()} total allocated
                         </p>
                     </div>
                 </div>
                 <BudgetGrid budgets={budgets} canManage={canManage} />
+                <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} onLoadMore={loadMore} />
             </div>
 
             {/* Create Budget Modal */}
@@ -7,6 +7,7 @@ import { Input } from "@/components/ui/input";
 import { Button } from "@/components/ui/button";
 
 import { EventsTab } from "./events-tab";
+import { LoadMore } from "../load-more";
 import { useModalStore } from "@/hooks/use-modal-store";
 import { useOrgEvents } from "@/hooks/use-event";
 import { useParams } from "next/navigation";
@@ -18,7 +19,7 @@ export const Events = () => {
     const { orgId } = useParams<{ orgId: string }>();
     const { data: currentUser } = useCurrentUser();
     const { data: orgMembers } = useOrgMembers(Number(orgId));
-    const { data: events } = useOrgEvents(Number(orgId));
+    const { data: events, hasNextPage, isFetchingNextPage, loadMore } = useOrgEvents(Number(orgId));
     const openModal = useModalStore(state => state.openModal);
     const [searchTerm, setSearchTerm] = useState("");
 
@@ -70,6 +71,7 @@ export const Events = () => {
                 userRole={currentUserRole || "member"}
                 setSearchTerm={setSearchTerm}
             />
+            <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} onLoadMore={loadMore} />
         </div>
     );
 }
@@ -0,0 +1,26 @@
+"use client";
+
+import { Loader2 } from "lucide-react";
+import { Button } from "@/components/ui/button";
+
+interface LoadMoreProps {
+    hasNextPage: boolean;
+    isFetchingNextPage: boolean;
+    onLoadMore: () => void;
+}
+
+// Fetches the next page of a paginated list; hidden once the last page is loaded
+export const LoadMore = ({ hasNextPage, isFetchingNextPage, onLoadMore }: LoadMoreProps) => {
+    if (!hasNextPage) {
+        return null;
+    }
+
+    return (
+        <div className="flex justify-center mt-6">
+            <Button variant="outline" onClick={onLoadMore} disabled={isFetchingNextPage}>
+                {isFetchingNextPage && <Loader2 className="h-4 w-4 animate-spin" />}
+                {isFetchingNextPage ? "Loading..." : "Load more"}
+            </Button>
+        </div>
+    );
+};
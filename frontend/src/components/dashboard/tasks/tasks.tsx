@@ -12,6 +12,7 @@ import { Badge } from "@/components/ui/badge";
 
 import { ListView } from "./list-view";
 import { CreateTaskModal } from "./create-task-modal";
+import { LoadMore } from "../load-more";
 import { useOrgId } from "@/hooks/use-org-id";
 import { useTasksByTeam } from "@/hooks/use-task";
 import { useOrgTeams, useTeamMembers } from "@/hooks/use-team";
@@ -54,7 +55,10 @@ export const Tasks = () => {
         data: tasks = [],
         isLoading: tasksLoading,
         error: tasksError,
-        refetch: refetchTasks
+        refetch: refetchTasks,
+        hasNextPage,
+        isFetchingNextPage,
+        loadMore
     } = useTasksByTeam(selectedTeamId || 0);
 
     useEffect(() => {
@@ -445,6 +449,9 @@ export const Tasks = () => {
                     currentUserId={currentUser?.id}
                 />
             )}
+            {selectedTeamId && !tasksError && !tasksLoading && (
+                <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} onLoadMore={loadMore} />
+            )}
 
             {/* Create Task Modal */}
             {showCreateModal && selectedTeamId && (
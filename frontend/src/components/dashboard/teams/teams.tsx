@@ -15,6 +15,7 @@ import { CreateTeamModal } from "./create-team-modal";
 import { useOrgMembers } from "@/hooks/use-org";
 import { useCurrentUser } from "@/hooks/use-auth";
 import { ManageMembersModal } from "./manage-members-modal";
+import { LoadMore } from "../load-more";
 
 export const Teams = () => {
     const { orgId } = useParams<{ orgId: string }>();
@@ -22,7 +23,9 @@ export const Teams = () => {
     const { data: currentUser } = useCurrentUser();
     const { openModal } = useModalStore();
     const { data: orgMembers } = useOrgMembers(Number(orgId));
-    const { data: teams, isLoading: isTeamsLoading, refetch } = useOrgTeams(Number(orgId));
+    const {
+        data: teams, isLoading: isTeamsLoading, refetch, hasNextPage, isFetchingNextPage, loadMore
+    } = useOrgTeams(Number(orgId));
 
     const currentUserMember = orgMembers?.find((member) => member.id === currentUser?.id);
 
@@ -94,6 +97,7 @@ export const Teams = () => {
                 </div>
 
                 <TeamsGrid teams={filteredTeams} canManageMembers={canManage} />
+                <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} onLoadMore={loadMore} />
                 <AllMembers members={orgMembers || []} canManageMembers={canManage} />
             </div>
             <CreateTeamModal />
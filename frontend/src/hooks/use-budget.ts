@@ -12,6 +12,7 @@ import {
   ExpenseRequest,
 } from "@/type";
 import { backend_api_url } from "@/constants";
+import { Page, fetchPage, usePaginatedQuery } from "@/lib/pagination";
 
 // ============================================================================
 // UTILITY FUNCTIONS
@@ -42,15 +43,11 @@ const createBudget = async (budgetData: CreateBudgetRequest) => {
   return response.data;
 };
 
-// Get All Budgets by Organization
-const getAllBudgets = async (orgId: number): Promise<Budget[]> => {
-  const response = await axios.get(
-    `${backend_api_url}/budget/get-all/${orgId}`,
-    {
-      headers: getAuthHeaders(),
-    }
-  );
-  return response.data.data;
+// Get a Page of Budgets by Organization
+const getBudgets = async (orgId: number, after: string | null): Promise<Page<Budget>> => {
+  return fetchPage<Budget>(`${backend_api_url}/budget/get-all/${orgId}`, {
+    headers: getAuthHeaders(),
+  }, after);
 };
 
 // Get Budget by ID
@@ -276,9 +273,9 @@ export const useRemoveExpense = (budgetId: number) => {
 // ============================================================================
 
 export const useGetAllBudgets = (orgId: number) => {
-  return useQuery({
+  return usePaginatedQuery({
     queryKey: ["budgets", orgId],
-    queryFn: () => getAllBudgets(orgId),
+    queryFn: (after) => getBudgets(orgId, after),
     enabled: !!orgId,
     staleTime: 5 * 60 * 1000, // 5 minutes
   });
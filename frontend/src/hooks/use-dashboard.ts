@@ -2,7 +2,7 @@
 
 import { Event, OrgStatistics } from "@/type";
 import { useQuery } from "@tanstack/react-query";
-import { getAllEventsByOrg } from "./use-event";
+import { getEventsByOrg } from "./use-event";
 import { getOrganizationStatistics } from "./use-org";
 
 interface DashboardStats extends OrgStatistics {
@@ -16,16 +16,11 @@ export const useOrgDashboard = (orgId: number) => {
       // Call the API function directly, not the hook
       const statistics = await getOrganizationStatistics(orgId);
 
-      // Fetch events separately (only if needed for recent events display)
-      const events = await getAllEventsByOrg(orgId);
-
-      // Sort events by creation date and get most recent
-      const sortedEvents = [...events].sort(
-        (a, b) =>
-          new Date(b.createdAt).getTime() - new Date(a.createdAt).getTime()
-      );
-
-      const recentEvents = sortedEvents.slice(0, 5);
+      // Only the newest page of events is needed for the recent events display
+      const { data: recentEvents } = await getEventsByOrg(orgId, null, {
+        limit: 5,
+        order: "desc",
+      });
 
       return {
         ...statistics,
@@ -6,6 +6,7 @@ import { Event, EventStatus } from "@/type";
 import { useRouter } from "next/navigation";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { backend_api_url } from "@/constants";
+import { Page, fetchPage, usePaginatedQuery } from "@/lib/pagination";
 
 interface CreateEventRequest {
     orgId: number;
@@ -101,11 +102,15 @@ const getEventById = async (id: number): Promise<Event> => {
     return response.data.data;
 };
 
-export const getAllEventsByOrg = async (orgId: number): Promise<Event[]> => {
-    const response = await axios.get(`${backend_api_url}/event/get-all/${orgId}`, {
-        headers: getAuthHeaders()
-    });
-    return response.data.data;
+export const getEventsByOrg = async (
+    orgId: number,
+    after: string | null = null,
+    params: Record<string, string | number> = {}
+): Promise<Page<Event>> => {
+    return fetchPage<Event>(`${backend_api_url}/event/get-all/${orgId}`, {
+        headers: getAuthHeaders(),
+        params,
+    }, after);
 };
 
 const searchEvents = async (params: SearchEventsParams): Promise<Event[]> => {
@@ -242,9 +247,9 @@ export const useEvent = (id: number) => {
 };
 
 export const useOrgEvents = (orgId: number) => {
-    return useQuery({
+    return usePaginatedQuery({
         queryKey: ["events", "org", orgId],
-        queryFn: () => getAllEventsByOrg(orgId),
+        queryFn: (after) => getEventsByOrg(orgId, after),
         enabled: !!orgId,
         staleTime: 5 * 60 * 1000, // 5 minutes
     });
@@ -6,6 +6,7 @@ import { toast } from "sonner";
 import { useRouter } from "next/navigation";
 import { useOrgStore } from "./use-org-store";
 import { backend_api_url } from "@/constants";
+import { Page, fetchPage, usePaginatedQuery } from "@/lib/pagination";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { Org, User, OrgRole, OrgStatistics, Team, Event, Task, Budget } from "@/type";
 
@@ -50,6 +51,16 @@ interface OrgMember extends User {
   isOwner: boolean;
 }
 
+interface Job {
+  id: number;
+  kind: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  orgId: number | null;
+  progress: number;
+  total: number | null;
+  error: string | null;
+}
+
 interface OrgDetails {
   org: Org;
   userRole: OrgRole | null;
@@ -121,7 +132,8 @@ const updateOrganization = async ({
   };
 };
 
-// Delete Organization
+// Delete Organization. The server only queues the deletion (202) and
+// hides the club right away; the returned job tracks the actual delete.
 const deleteOrganization = async (id: number) => {
   const res = await axios.delete(
     `${backend_api_url}/org/delete/${id}`,
@@ -134,6 +146,23 @@ const deleteOrganization = async (id: number) => {
     message: res.data.message,
     deletedId: res.data.deletedOrgId,
     hasOtherOrgs: res.data.hasOtherOrgs,
+    job: res.data.job as Job,
+  }
+};
+
+// Poll a background job until it finishes; rejects if it failed
+const waitForJob = async (jobId: number, intervalMs = 2000): Promise<Job> => {
+  for (;;) {
+    const res = await axios.get(`${backend_api_url}/job/get/${jobId}`, {
+      headers: getAuthHeaders(),
+    });
+    const job: Job = res.data.data;
+
+    if (job.status === "succeeded") return job;
+    if (job.status === "failed") {
+      throw new Error(job.error || "Club deletion failed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
   }
 };
 
@@ -145,12 +174,11 @@ const getOrganizationById = async (id: number): Promise<Org> => {
   return response.data.data;
 };
 
-// Get All Organizations
-const getAllOrganizations = async (): Promise<Org[]> => {
-  const res = await axios.get(`${backend_api_url}/org/get-all`, {
+// Get a Page of Organizations
+const getOrganizations = async (after: string | null): Promise<Page<Org>> => {
+  return fetchPage<Org>(`${backend_api_url}/org/get-all`, {
     headers: getAuthHeaders(),
-  });
-  return res.data.data;
+  }, after);
 };
 
 // Get My Organizations
@@ -357,7 +385,12 @@ export const useDeleteOrg = () => {
       queryClient.invalidateQueries({ queryKey: ["my-orgs"] });
       queryClient.invalidateQueries({ queryKey: ["orgs"] });
 
-      toast.success("Club deleted successfully!");
+      // The club is already hidden; follow the job until it is really gone
+      toast.promise(waitForJob(data.job.id), {
+        loading: "Club deletion queued...",
+        success: "Club deleted",
+        error: (error: any) => error?.message || "Club deletion failed",
+      });
 
       if (!data.hasOtherOrgs || data.hasOtherOrgs === false) {
         router.push("/create-org");
@@ -541,9 +574,9 @@ export const useOrg = (id: number) => {
 };
 
 export const useAllOrgs = () => {
-  return useQuery({
+  return usePaginatedQuery({
     queryKey: ["orgs"],
-    queryFn: getAllOrganizations,
+    queryFn: getOrganizations,
     staleTime: 5 * 60 * 1000, // 5 minutes
   });
 };
@@ -3,8 +3,9 @@
 import { Task, TaskPriority, TaskStatus } from "@/type";
 import { toast } from "sonner";
 import axios, { AxiosError } from "axios";
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { useMutation, useQueryClient } from "@tanstack/react-query";
 import { backend_api_url } from "@/constants";
+import { Page, fetchPage, usePaginatedQuery } from "@/lib/pagination";
 
 interface CreateTaskRequest {
     eventId: number;
@@ -84,18 +85,16 @@ const deleteTask = async (id: number) => {
     return response.data.message;
 };
 
-const getTasksByEvent = async (eventId: number): Promise<Task[]> => {
-    const response = await axios.get(`${backend_api_url}/task/event/${eventId}`, {
+const getTasksByEvent = async (eventId: number, after: string | null): Promise<Page<Task>> => {
+    return fetchPage<Task>(`${backend_api_url}/task/event/${eventId}`, {
         headers: getAuthHeaders()
-    });
-    return response.data.data;
+    }, after);
 };
 
-const getTasksByTeam = async (teamId: number): Promise<Task[]> => {
-    const response = await axios.get(`${backend_api_url}/task/team/${teamId}`, {
+const getTasksByTeam = async (teamId: number, after: string | null): Promise<Page<Task>> => {
+    return fetchPage<Task>(`${backend_api_url}/task/team/${teamId}`, {
         headers: getAuthHeaders()
-    });
-    return response.data.data;
+    }, after);
 };
 
 const assignTask = async (assignData: AssignTaskRequest) => {
@@ -283,18 +282,18 @@ export const useUpdateTaskStatus = () => {
 
 // Query Hooks
 export const useTasksByEvent = (eventId: number) => {
-    return useQuery({
+    return usePaginatedQuery({
         queryKey: ["tasks", "event", eventId],
-        queryFn: () => getTasksByEvent(eventId),
+        queryFn: (after) => getTasksByEvent(eventId, after),
         enabled: !!eventId,
         staleTime: 2 * 60 * 1000, // 2 minutes
     });
 };
 
 export const useTasksByTeam = (teamId: number) => {
-    return useQuery({
+    return usePaginatedQuery({
         queryKey: ["tasks", "team", teamId],
-        queryFn: () => getTasksByTeam(teamId),
+        queryFn: (after) => getTasksByTeam(teamId, after),
         enabled: !!teamId,
         staleTime: 2 * 60 * 1000, // 2 minutes
     });
@@ -5,6 +5,7 @@ import { toast } from "sonner";
 import axios, { AxiosError } from "axios";
 import { Team, User, OrgRole } from "@/type";
 import { backend_api_url } from "@/constants";
+import { Page, fetchPage, usePaginatedQuery } from "@/lib/pagination";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 
 // ============================================================================
@@ -137,15 +138,11 @@ const getTeamById = async (id: number): Promise<Team> => {
     return response.data.data;
 };
 
-// Get All Teams by Organization
-export const getAllTeamsByOrg = async (orgId: number): Promise<Team[]> => {
-    const response = await axios.get(
-        `${backend_api_url}/team/get-all/${orgId}`,
-        {
-            headers: getAuthHeaders()
-        }
-    );
-    return response.data.data;
+// Get a Page of Teams by Organization
+export const getTeamsByOrg = async (orgId: number, after: string | null): Promise<Page<Team>> => {
+    return fetchPage<Team>(`${backend_api_url}/team/get-all/${orgId}`, {
+        headers: getAuthHeaders()
+    }, after);
 };
 
 // Update Team Leader
@@ -464,9 +461,9 @@ export const useTeam = (id: number) => {
 };
 
 export const useOrgTeams = (orgId: number) => {
-    return useQuery({
+    return usePaginatedQuery({
         queryKey: ["teams", "org", orgId],
-        queryFn: () => getAllTeamsByOrg(orgId),
+        queryFn: (after) => getTeamsByOrg(orgId, after),
         enabled: !!orgId,
         staleTime: 5 * 60 * 1000, // 5 minutes
     });
@@ -0,0 +1,51 @@
+import axios, { AxiosRequestConfig } from "axios";
+import { QueryKey, useInfiniteQuery } from "@tanstack/react-query";
+
+// The backend's default page size (DEFAULT_PAGE_SIZE)
+const PAGE_SIZE = 100;
+
+export interface Page<T> {
+  data: T[];
+  nextCursor: string | null;
+}
+
+// List endpoints return one page at a time as { data, nextCursor }. Pass
+// the previous page's nextCursor as `after` to get the page that follows.
+export const fetchPage = async <T>(
+  url: string,
+  config: AxiosRequestConfig = {},
+  after: string | null = null
+): Promise<Page<T>> => {
+  const response = await axios.get<Page<T>>(url, {
+    ...config,
+    params: { limit: PAGE_SIZE, ...config.params, ...(after ? { after } : {}) },
+  });
+  return response.data;
+};
+
+interface PaginatedQueryOptions<T> {
+  queryKey: QueryKey;
+  queryFn: (after: string | null) => Promise<Page<T>>;
+  enabled?: boolean;
+  staleTime?: number;
+}
+
+// Loads the first page of a list, and the next one each time loadMore is
+// called. `data` holds every row loaded so far.
+export const usePaginatedQuery = <T>({ queryKey, queryFn, enabled, staleTime }: PaginatedQueryOptions<T>) => {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: ({ pageParam }) => queryFn(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
+    enabled,
+    staleTime,
+  });
+
+  return {
+    ...query,
+    data: query.data?.pages.flatMap((page) => page.data),
+    nextCursor: query.data?.pages[query.data.pages.length - 1]?.nextCursor ?? null,
+    loadMore: () => query.fetchNextPage(),
+  };
+};
@@ -191,7 +191,7 @@ export interface BudgetAnalytics {
   totalSpentAmount: number;
   totalRemainingAmount: number;
   utilizationPercentage: number;
-  budgets: Budget[];
+  budgets?: Budget[];
 }
 
 export interface CreateBudgetRequest {
@@ -206,7 +206,6 @@ export interface UpdateBudgetRequest {
   name?: string;
   description?: string;
   totalAmount?: number;
-  spentAmount?: number;
 }
 
 export interface ExpenseRequest {